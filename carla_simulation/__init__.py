@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The package modules import each other as top-level modules, which the
+# installed entry points reach through the package
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+if _PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, _PACKAGE_DIR)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+"""
+Non-blocking calls of the CARLA client API
+
+Every method of a CARLA world or actor is a remote procedure call that
+blocks until the simulator answers, so the calls of a frame add up their
+latencies. AsyncCarlaClient runs them on worker threads instead: the caller
+keeps working while a call is in flight and independent calls overlap. The
+CARLA client releases the GIL while it waits for the simulator.
+"""
+
+import asyncio
+import concurrent.futures
+from typing import Callable, List
+
+
+class AsyncCarlaClient(object):
+    """
+    Run blocking CARLA calls on dedicated worker threads
+
+    submit() returns a concurrent.futures.Future and keeps it pending until
+    flush(). call() is the awaitable counterpart for asyncio code. Submitted
+    calls run concurrently and complete in any order, so only submit calls
+    that do not depend on each other before flushing, e.g. reads of the
+    current frame and the controls for the next tick.
+
+    :param workers: number of worker threads, i.e. calls in flight at once
+    """
+
+    def __init__(self, workers: int = 4):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="carla_rpc")
+        self.pending = []
+        self.calls = 0
+
+    def submit(self, function: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Start function(*args, **kwargs) on a worker thread"""
+        future = self.executor.submit(function, *args, **kwargs)
+        self.pending.append(future)
+        self.calls += 1
+        return future
+
+    def flush(self) -> List:
+        """Wait for every pending call, returns their results in submission order
+
+        Raises the error of the first failed call once all calls completed.
+        """
+        pending, self.pending = self.pending, []
+        concurrent.futures.wait(pending)
+        return [future.result() for future in pending]
+
+    async def call(self, function: Callable, *args, **kwargs):
+        """Await function(*args, **kwargs) run on a worker thread"""
+        self.calls += 1
+        return await asyncio.wrap_future(self.executor.submit(function, *args, **kwargs))
+
+    def close(self):
+        """Wait for the calls in flight and stop the worker threads"""
+        self.pending = []
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
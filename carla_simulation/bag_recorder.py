@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""
+Recording of published topics to rosbag2
+
+Messages are handed to a bounded queue and written by a background thread,
+so publishing never waits for the disk. When the queue is full, messages are
+dropped and counted instead.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+# Supported rosbag2 storage plugins
+STORAGE_IDS = ("mcap", "sqlite3")
+
+_STOP = object()
+
+
+def message_type_name(msg_type) -> str:
+    """ROS type name of a message class, e.g. sensor_msgs/msg/Imu"""
+    return "{}/msg/{}".format(msg_type.__module__.split('.')[0], msg_type.__name__)
+
+
+class Rosbag2Writer(object):
+    """
+    Writer of serialized messages into a rosbag2
+
+    mcap bags are written with zstd compressed chunks (storage preset
+    zstd_fast). sqlite3 bags are split into files of max_bagfile_size bytes
+    that are zstd compressed once complete.
+
+    :param uri: directory of the bag
+    :param storage_id: "mcap" or "sqlite3"
+    :param compression: "zstd" or None
+    :param max_bagfile_size: size in bytes after which a new file is started,
+        0 for a single file
+    """
+
+    def __init__(self,
+                 uri: str,
+                 storage_id: str = "mcap",
+                 compression: str = "zstd",
+                 max_bagfile_size: int = 0):
+        import rosbag2_py
+
+        self.rosbag2_py = rosbag2_py
+        storage_options = rosbag2_py.StorageOptions(
+            uri=uri,
+            storage_id=storage_id,
+            max_bagfile_size=max_bagfile_size
+        )
+        if compression and storage_id == "mcap":
+            storage_options.storage_preset_profile = "zstd_fast"
+            self.writer = rosbag2_py.SequentialWriter()
+        elif compression:
+            self.writer = rosbag2_py.SequentialCompressionWriter(rosbag2_py.CompressionOptions(
+                compression_format=compression,
+                compression_mode=rosbag2_py.CompressionMode.FILE
+            ))
+        else:
+            self.writer = rosbag2_py.SequentialWriter()
+        self.writer.open(storage_options, rosbag2_py.ConverterOptions('cdr', 'cdr'))
+
+    def create_topic(self, name: str, type_name: str):
+        self.writer.create_topic(self.rosbag2_py.TopicMetadata(
+            name=name,
+            type=type_name,
+            serialization_format='cdr'
+        ))
+
+    def write(self, name: str, data: bytes, timestamp: int):
+        self.writer.write(name, data, timestamp)
+
+    def close(self):
+        # Older rosbag2_py writers only close when destroyed
+        close = getattr(self.writer, 'close', None)
+        if close is not None:
+            close()
+        self.writer = None
+
+
+class BagRecorder(object):
+    """
+    Write messages of known topics on a background thread
+
+    record() accepts serialized messages or message objects, which are
+    serialized on the writer thread. Messages that are modified in place
+    after publishing must be passed serialized.
+
+    :param writer: writer with create_topic(name, type_name),
+        write(name, data, timestamp) and close(), e.g. a Rosbag2Writer
+    :param topics: type name of every recorded topic, by topic name
+    :param queue_size: maximum number of messages waiting to be written
+    """
+
+    def __init__(self, writer, topics: Dict[str, str], queue_size: int = 256):
+        self.writer = writer
+        for name, type_name in topics.items():
+            writer.create_topic(name, type_name)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = Counter()
+        self.dropped = Counter()
+        self.bytes_written = 0
+        self.errors = 0
+        self.start_time = time.monotonic()
+        self.max_queue_depth = 0
+
+        self.thread = threading.Thread(target=self._write_loop, name="bag_recorder", daemon=True)
+        self.thread.start()
+
+    def record(self, name: str, msg, timestamp: int) -> bool:
+        """Queue a message for writing, returns False if it was dropped"""
+        try:
+            self.queue.put_nowait((name, msg, timestamp))
+        except queue.Full:
+            self.dropped[name] += 1
+            return False
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return True
+
+    def stats(self) -> Dict:
+        """Write rate in bytes/s, queue depth and written and dropped messages per topic"""
+        elapsed = time.monotonic() - self.start_time
+        return {
+            "bytes_per_second": self.bytes_written / elapsed if elapsed > 0 else 0.0,
+            "bytes": self.bytes_written,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "written": dict(self.written),
+            "dropped": dict(self.dropped),
+            "errors": self.errors
+        }
+
+    def close(self):
+        """Write the queued messages and close the bag"""
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.writer.close()
+        logging.info("Recorded {} messages ({} bytes), dropped {}".format(
+            sum(self.written.values()), self.bytes_written, sum(self.dropped.values())))
+
+    def _write_loop(self):
+        serialize_message = None
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+
+            name, msg, timestamp = item
+            try:
+                if not isinstance(msg, (bytes, bytearray)):
+                    if serialize_message is None:
+                        from rclpy.serialization import serialize_message
+                    msg = serialize_message(msg)
+                self.writer.write(name, msg, timestamp)
+            except Exception as error:
+                self.errors += 1
+                logging.error("Failed to record a message on {}: {}".format(name, error))
+                continue
+
+            self.written[name] += 1
+            self.bytes_written += len(msg)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+"""
+Indexed access to the CARLA blueprint library
+
+get_blueprint_library() is an RPC and filter() scans the whole library with
+wildcard matching. The index fetches the library once per world and resolves
+every blueprint pattern once.
+"""
+
+import logging
+from typing import Dict, List
+
+import carla
+
+
+class BlueprintIndex(object):
+    """
+    Blueprint lookups by exact id and by memoized wildcard pattern
+
+    find() returns a fresh blueprint on every call, so attributes set for
+    one actor never leak into the next one spawned from the same type.
+
+    :param blueprint_library: the blueprint library of a world
+    :type blueprint_library: carla.BlueprintLibrary
+    """
+
+    # One index per world id
+    _indexes = {}
+
+    def __init__(self, blueprint_library: carla.BlueprintLibrary):
+        self.library = blueprint_library
+        self.attributes = {
+            blueprint.id: {attribute.id for attribute in blueprint}
+            for blueprint in blueprint_library
+        }
+        self.patterns = {}
+
+    @classmethod
+    def for_world(cls, carla_world: carla.World) -> 'BlueprintIndex':
+        index = cls._indexes.get(carla_world.id)
+        if index is None:
+            index = cls(carla_world.get_blueprint_library())
+            cls._indexes[carla_world.id] = index
+            logging.debug("Indexed {} blueprints".format(len(index.attributes)))
+        return index
+
+    def resolve(self, pattern: str) -> str:
+        """Id of the first blueprint matching pattern, raises KeyError if there is none"""
+        if pattern in self.attributes:
+            return pattern
+
+        blueprint_id = self.patterns.get(pattern)
+        if blueprint_id is None:
+            matches = self.library.filter(pattern)
+            if not len(matches):
+                raise KeyError("No blueprint matches {}".format(pattern))
+            blueprint_id = matches[0].id
+            self.patterns[pattern] = blueprint_id
+        return blueprint_id
+
+    def find(self, pattern: str) -> carla.ActorBlueprint:
+        return self.library.find(self.resolve(pattern))
+
+    def validate(self, vehicle_config: Dict) -> List[str]:
+        """
+        Check that every type and attribute of a vehicle config exists
+
+        Returns a list of problems, empty if the config can be spawned.
+        """
+        errors = []
+        actors = [vehicle_config] + vehicle_config.get("sensors", [])
+        for actor in actors:
+            if not actor.get("type"):
+                errors.append("{}: missing type".format(actor.get("id")))
+                continue
+            try:
+                blueprint_id = self.resolve(actor.get("type"))
+            except KeyError as error:
+                errors.append("{}: {}".format(actor.get("id"), error.args[0]))
+                continue
+
+            for key in actor.get("attributes", {}):
+                if str(key) not in self.attributes[blueprint_id]:
+                    errors.append("{}: {} has no attribute {}".format(
+                        actor.get("id"), blueprint_id, key))
+        return errors
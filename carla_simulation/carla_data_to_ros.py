@@ -11,12 +11,180 @@ Tool functions to convert transforms from carla to ROS coordinate system
 """
 
 import math
+import threading
+from collections import OrderedDict
+
 import numpy
 import carla
 
 from geometry_msgs.msg import Vector3, Quaternion, Transform, Pose, Point, Twist, Accel  # pylint: disable=import-error
-from transforms3d.euler import euler2mat, quat2euler, euler2quat
-from transforms3d.quaternions import quat2mat, mat2quat
+
+
+def _RPY_to_quaternion(roll, pitch, yaw):
+    """
+    Closed-form equivalent of transforms3d.euler.euler2quat(roll, pitch, yaw)
+
+    :return: a tuple with 4 elements (w, x, y, z)
+    :rtype: tuple
+    """
+    ci = math.cos(roll * 0.5)
+    si = math.sin(roll * 0.5)
+    cj = math.cos(pitch * 0.5)
+    sj = math.sin(pitch * 0.5)
+    ck = math.cos(yaw * 0.5)
+    sk = math.sin(yaw * 0.5)
+    cc = ci * ck
+    cs = ci * sk
+    sc = si * ck
+    ss = si * sk
+
+    return (cj * cc + sj * ss,
+            cj * sc - sj * cs,
+            cj * ss + sj * cc,
+            cj * cs - sj * sc)
+
+
+def _RPY_to_rotation_matrix(roll, pitch, yaw):
+    """
+    Closed-form equivalent of transforms3d.euler.euler2mat(roll, pitch, yaw)
+
+    :return: a numpy.array with 3x3 elements
+    :rtype: numpy.array
+    """
+    ci = math.cos(roll)
+    si = math.sin(roll)
+    cj = math.cos(pitch)
+    sj = math.sin(pitch)
+    ck = math.cos(yaw)
+    sk = math.sin(yaw)
+    cc = ci * ck
+    cs = ci * sk
+    sc = si * ck
+    ss = si * sk
+
+    return numpy.array([
+        [cj * ck, sj * sc - cs, sj * cc + ss],
+        [cj * sk, sj * ss + cc, sj * cs - sc],
+        [-sj, cj * si, cj * ci]
+    ])
+
+
+class RotationMatrixCache(object):
+    """
+    Bounded LRU cache of rotation matrices keyed on quantized carla rotations
+
+    Rotations are rounded to multiples of quantization (in degrees) before
+    lookup and the matrix is computed from the rounded angles, so every
+    rotation within the same bucket gets the same matrix. Cached matrices are
+    read-only.
+
+    :param maxsize: maximum number of cached matrices
+    :type maxsize: int
+    :param quantization: angular resolution of the cache key in degrees
+    :type quantization: float
+    """
+
+    def __init__(self, maxsize=128, quantization=1e-3):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive, got {}".format(maxsize))
+        if quantization <= 0.0:
+            raise ValueError("quantization must be positive, got {}".format(quantization))
+
+        self.maxsize = maxsize
+        self.quantization = quantization
+        self.hits = 0
+        self.misses = 0
+        self._matrices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._matrices)
+
+    def get(self, carla_rotation):
+        """
+        Return the rotation matrix of a carla rotation, computing it on a miss
+
+        :param carla_rotation: the carla rotation
+        :type carla_rotation: carla.Rotation
+        :return: a read-only numpy.array with 3x3 elements
+        :rtype: numpy.array
+        """
+        key = (round(carla_rotation.roll / self.quantization),
+               round(carla_rotation.pitch / self.quantization),
+               round(carla_rotation.yaw / self.quantization))
+        with self._lock:
+            matrix = self._matrices.get(key)
+            if matrix is not None:
+                self._matrices.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+
+        matrix = _RPY_to_rotation_matrix(math.radians(key[0] * self.quantization),
+                                         -math.radians(key[1] * self.quantization),
+                                         -math.radians(key[2] * self.quantization))
+        matrix.flags.writeable = False
+        with self._lock:
+            self._matrices[key] = matrix
+            if len(self._matrices) > self.maxsize:
+                self._matrices.popitem(last=False)
+        return matrix
+
+    def invalidate(self):
+        """
+        Drop all cached matrices and reset the hit/miss counters
+        """
+        with self._lock:
+            self._matrices.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_rotation_matrix_cache = None
+
+
+def enable_rotation_matrix_cache(maxsize=128, quantization=1e-3):
+    """
+    Cache the rotation matrices used by carla_vector_to_ros_vector_rotated()
+    and carla_rotation_to_directional_numpy_vector()
+
+    Worth enabling when the same rotations repeat, e.g. for sensors rigidly
+    mounted on the ego vehicle. Replaces any previously enabled cache.
+
+    :param maxsize: maximum number of cached matrices
+    :type maxsize: int
+    :param quantization: angular resolution of the cache key in degrees
+    :type quantization: float
+    :return: the enabled cache
+    :rtype: RotationMatrixCache
+    """
+    global _rotation_matrix_cache
+    _rotation_matrix_cache = RotationMatrixCache(maxsize, quantization)
+    return _rotation_matrix_cache
+
+
+def disable_rotation_matrix_cache():
+    """
+    Disable the rotation matrix cache
+    """
+    global _rotation_matrix_cache
+    _rotation_matrix_cache = None
+
+
+def get_rotation_matrix_cache():
+    """
+    Return the enabled rotation matrix cache, or None if caching is disabled
+
+    :rtype: RotationMatrixCache
+    """
+    return _rotation_matrix_cache
+
+
+def _carla_rotation_to_rotation_matrix(carla_rotation):
+    cache = _rotation_matrix_cache
+    if cache is not None:
+        return cache.get(carla_rotation)
+    return carla_rotation_to_numpy_rotation_matrix(carla_rotation)
 
 
 def carla_location_to_numpy_vector(carla_location):
@@ -50,12 +218,27 @@ def carla_location_to_ros_vector3(carla_location):
     :return: a ROS vector3
     :rtype: geometry_msgs.msg.Vector3
     """
-    ros_translation = Vector3()
-    ros_translation.x = carla_location.x
-    ros_translation.y = -carla_location.y
-    ros_translation.z = carla_location.z
+    return carla_location_to_ros_vector3_into(Vector3(), carla_location)
+
+
+def carla_location_to_ros_vector3_into(ros_vector3, carla_location):
+    """
+    Write a carla location into an existing ROS vector3
+
+    In-place variant of carla_location_to_ros_vector3().
+
+    :param ros_vector3: the ROS vector3 to fill
+    :type ros_vector3: geometry_msgs.msg.Vector3
+    :param carla_location: the carla location
+    :type carla_location: carla.Location
+    :return: ros_vector3
+    :rtype: geometry_msgs.msg.Vector3
+    """
+    ros_vector3.x = carla_location.x
+    ros_vector3.y = -carla_location.y
+    ros_vector3.z = carla_location.z
 
-    return ros_translation
+    return ros_vector3
 
 
 def carla_location_to_ros_point(carla_location):
@@ -70,7 +253,22 @@ def carla_location_to_ros_point(carla_location):
     :return: a ROS point
     :rtype: geometry_msgs.msg.Point
     """
-    ros_point = Point()
+    return carla_location_to_ros_point_into(Point(), carla_location)
+
+
+def carla_location_to_ros_point_into(ros_point, carla_location):
+    """
+    Write a carla location into an existing ROS point
+
+    In-place variant of carla_location_to_ros_point().
+
+    :param ros_point: the ROS point to fill
+    :type ros_point: geometry_msgs.msg.Point
+    :param carla_location: the carla location
+    :type carla_location: carla.Location
+    :return: ros_point
+    :rtype: geometry_msgs.msg.Point
+    """
     ros_point.x = carla_location.x
     ros_point.y = -carla_location.y
     ros_point.z = carla_location.z
@@ -112,11 +310,30 @@ def carla_rotation_to_ros_quaternion(carla_rotation):
     :rtype: geometry_msgs.msg.Quaternion
     """
     roll, pitch, yaw = carla_rotation_to_RPY(carla_rotation)
-    quat = euler2quat(roll, pitch, yaw)
+    quat = _RPY_to_quaternion(roll, pitch, yaw)
     ros_quaternion = Quaternion(w=quat[0], x=quat[1], y=quat[2], z=quat[3])
     return ros_quaternion
 
 
+def carla_rotation_to_ros_quaternion_into(ros_quaternion, carla_rotation):
+    """
+    Write a carla rotation into an existing ROS quaternion
+
+    In-place variant of carla_rotation_to_ros_quaternion().
+
+    :param ros_quaternion: the ROS quaternion to fill
+    :type ros_quaternion: geometry_msgs.msg.Quaternion
+    :param carla_rotation: the carla rotation
+    :type carla_rotation: carla.Rotation
+    :return: ros_quaternion
+    :rtype: geometry_msgs.msg.Quaternion
+    """
+    roll, pitch, yaw = carla_rotation_to_RPY(carla_rotation)
+    ros_quaternion.w, ros_quaternion.x, ros_quaternion.y, ros_quaternion.z = \
+        _RPY_to_quaternion(roll, pitch, yaw)
+    return ros_quaternion
+
+
 def carla_rotation_to_numpy_rotation_matrix(carla_rotation):
     """
     Convert a carla rotation to a ROS quaternion
@@ -131,9 +348,7 @@ def carla_rotation_to_numpy_rotation_matrix(carla_rotation):
     :rtype: numpy.array
     """
     roll, pitch, yaw = carla_rotation_to_RPY(carla_rotation)
-    numpy_array = euler2mat(roll, pitch, yaw)
-    rotation_matrix = numpy_array[:3, :3]
-    return rotation_matrix
+    return _RPY_to_rotation_matrix(roll, pitch, yaw)
 
 
 def carla_rotation_to_directional_numpy_vector(carla_rotation):
@@ -147,9 +362,8 @@ def carla_rotation_to_directional_numpy_vector(carla_rotation):
         representation of the orientation
     :rtype: numpy.array
     """
-    rotation_matrix = carla_rotation_to_numpy_rotation_matrix(carla_rotation)
-    directional_vector = numpy.array([1, 0, 0])
-    rotated_directional_vector = rotation_matrix.dot(directional_vector)
+    rotation_matrix = _carla_rotation_to_rotation_matrix(carla_rotation)
+    rotated_directional_vector = rotation_matrix[:, 0].copy()
     return rotated_directional_vector
 
 
@@ -164,12 +378,29 @@ def carla_vector_to_ros_vector_rotated(carla_vector, carla_rotation):
     :return: rotated ros vector
     :rtype: Vector3
     """
-    rotation_matrix = carla_rotation_to_numpy_rotation_matrix(carla_rotation)
-    tmp_array = rotation_matrix.dot(numpy.array([carla_vector.x, carla_vector.y, carla_vector.z]))
-    ros_vector = Vector3()
-    ros_vector.x = tmp_array[0]
-    ros_vector.y = -tmp_array[1]
-    ros_vector.z = tmp_array[2]
+    return carla_vector_to_ros_vector_rotated_into(Vector3(), carla_vector, carla_rotation)
+
+
+def carla_vector_to_ros_vector_rotated_into(ros_vector, carla_vector, carla_rotation):
+    """
+    Rotate carla vector, write it into an existing ros vector
+
+    In-place variant of carla_vector_to_ros_vector_rotated().
+
+    :param ros_vector: the ROS vector to fill
+    :type ros_vector: Vector3
+    :param carla_vector: the carla vector
+    :type carla_vector: carla.Vector3D
+    :param carla_rotation: the carla rotation
+    :type carla_rotation: carla.Rotation
+    :return: ros_vector
+    :rtype: Vector3
+    """
+    rotation_matrix = _carla_rotation_to_rotation_matrix(carla_rotation)
+    tmp_array = rotation_matrix.dot((carla_vector.x, carla_vector.y, carla_vector.z))
+    ros_vector.x = float(tmp_array[0])
+    ros_vector.y = -float(tmp_array[1])
+    ros_vector.z = float(tmp_array[2])
     return ros_vector
 
 
@@ -189,11 +420,33 @@ def carla_velocity_to_ros_twist(carla_linear_velocity, carla_angular_velocity, c
     :return: a ROS twist (with rotation)
     :rtype: geometry_msgs.msg.Twist
     """
-    ros_twist = Twist()
+    return carla_velocity_to_ros_twist_into(
+        Twist(), carla_linear_velocity, carla_angular_velocity, carla_rotation)
+
+
+def carla_velocity_to_ros_twist_into(ros_twist, carla_linear_velocity, carla_angular_velocity,
+                                     carla_rotation=None):
+    """
+    Write a carla velocity into an existing ROS twist
+
+    In-place variant of carla_velocity_to_ros_twist().
+
+    :param ros_twist: the ROS twist to fill
+    :type ros_twist: geometry_msgs.msg.Twist
+    :param carla_velocity: the carla velocity
+    :type carla_velocity: carla.Vector3D
+    :param carla_angular_velocity: the carla angular velocity
+    :type carla_angular_velocity: carla.Vector3D
+    :param carla_rotation: the carla rotation. If None, no rotation is executed
+    :type carla_rotation: carla.Rotation
+    :return: ros_twist
+    :rtype: geometry_msgs.msg.Twist
+    """
     if carla_rotation:
-        ros_twist.linear = carla_vector_to_ros_vector_rotated(carla_linear_velocity, carla_rotation)
+        carla_vector_to_ros_vector_rotated_into(
+            ros_twist.linear, carla_linear_velocity, carla_rotation)
     else:
-        ros_twist.linear = carla_location_to_ros_vector3(carla_linear_velocity)
+        carla_location_to_ros_vector3_into(ros_twist.linear, carla_linear_velocity)
     ros_twist.angular.x = math.radians(carla_angular_velocity.x)
     ros_twist.angular.y = -math.radians(carla_angular_velocity.y)
     ros_twist.angular.z = -math.radians(carla_angular_velocity.z)
@@ -232,11 +485,24 @@ def carla_acceleration_to_ros_accel(carla_acceleration):
     :return: a ROS accel
     :rtype: geometry_msgs.msg.Accel
     """
-    ros_accel = Accel()
-    ros_accel.linear.x = carla_acceleration.x
-    ros_accel.linear.y = -carla_acceleration.y
-    ros_accel.linear.z = carla_acceleration.z
+    return carla_acceleration_to_ros_accel_into(Accel(), carla_acceleration)
+
+
+def carla_acceleration_to_ros_accel_into(ros_accel, carla_acceleration):
+    """
+    Write a carla acceleration into an existing ROS accel
 
+    In-place variant of carla_acceleration_to_ros_accel(). The angular
+    accelerations are left untouched.
+
+    :param ros_accel: the ROS accel to fill
+    :type ros_accel: geometry_msgs.msg.Accel
+    :param carla_acceleration: the carla acceleration
+    :type carla_acceleration: carla.Vector3D
+    :return: ros_accel
+    :rtype: geometry_msgs.msg.Accel
+    """
+    carla_location_to_ros_vector3_into(ros_accel.linear, carla_acceleration)
     return ros_accel
 
 
@@ -251,12 +517,26 @@ def carla_transform_to_ros_transform(carla_transform):
     :return: a ROS transform
     :rtype: geometry_msgs.msg.Transform
     """
-    ros_transform = Transform()
+    return carla_transform_to_ros_transform_into(Transform(), carla_transform)
+
+
+def carla_transform_to_ros_transform_into(ros_transform, carla_transform):
+    """
+    Write a carla transform into an existing ROS transform
+
+    In-place variant of carla_transform_to_ros_transform().
 
-    ros_transform.translation = carla_location_to_ros_vector3(
-        carla_transform.location)
-    ros_transform.rotation = carla_rotation_to_ros_quaternion(
-        carla_transform.rotation)
+    :param ros_transform: the ROS transform to fill
+    :type ros_transform: geometry_msgs.msg.Transform
+    :param carla_transform: the carla transform
+    :type carla_transform: carla.Transform
+    :return: ros_transform
+    :rtype: geometry_msgs.msg.Transform
+    """
+    carla_location_to_ros_vector3_into(
+        ros_transform.translation, carla_transform.location)
+    carla_rotation_to_ros_quaternion_into(
+        ros_transform.rotation, carla_transform.rotation)
 
     return ros_transform
 
@@ -272,12 +552,26 @@ def carla_transform_to_ros_pose(carla_transform):
     :return: a ROS pose
     :rtype: geometry_msgs.msg.Pose
     """
-    ros_pose = Pose()
+    return carla_transform_to_ros_pose_into(Pose(), carla_transform)
+
 
-    ros_pose.position = carla_location_to_ros_point(
-        carla_transform.location)
-    ros_pose.orientation = carla_rotation_to_ros_quaternion(
-        carla_transform.rotation)
+def carla_transform_to_ros_pose_into(ros_pose, carla_transform):
+    """
+    Write a carla transform into an existing ROS pose
+
+    In-place variant of carla_transform_to_ros_pose().
+
+    :param ros_pose: the ROS pose to fill
+    :type ros_pose: geometry_msgs.msg.Pose
+    :param carla_transform: the carla transform
+    :type carla_transform: carla.Transform
+    :return: ros_pose
+    :rtype: geometry_msgs.msg.Pose
+    """
+    carla_location_to_ros_point_into(
+        ros_pose.position, carla_transform.location)
+    carla_rotation_to_ros_quaternion_into(
+        ros_pose.orientation, carla_transform.rotation)
 
     return ros_pose
 
@@ -311,6 +605,7 @@ def RPY_to_carla_rotation(roll, pitch, yaw):
 
 
 def ros_quaternion_to_carla_rotation(ros_quaternion):
+    from transforms3d.euler import quat2euler
     roll, pitch, yaw = quat2euler([ros_quaternion.w,
                                    ros_quaternion.x,
                                    ros_quaternion.y,
@@ -331,6 +626,7 @@ def transform_matrix_to_ros_pose(mat):
     """
     Convert a transform matrix to a ROS pose.
     """
+    from transforms3d.quaternions import mat2quat
     quat = mat2quat(mat[:3, :3])
     msg = Pose()
     msg.position = Point(x=mat[0, 3], y=mat[1, 3], z=mat[2, 3])
@@ -342,8 +638,227 @@ def ros_pose_to_transform_matrix(msg):
     """
     Convert a ROS pose to a transform matrix
     """
+    from transforms3d.quaternions import quat2mat
     mat44 = numpy.eye(4)
     mat44[:3, :3] = quat2mat([msg.orientation.w, msg.orientation.x,
                               msg.orientation.y, msg.orientation.z])
     mat44[0:3, -1] = [msg.position.x, msg.position.y, msg.position.z]
-    return mat44
\ No newline at end of file
+    return mat44
+
+
+def carla_rotations_to_numpy_RPY(carla_rotations):
+    """
+    Convert an array of carla rotations to an array of roll, pitch, yaw
+
+    Batch counterpart of carla_rotation_to_RPY().
+    Considers the conversion from left-handed system (unreal) to right-handed
+    system (ROS).
+    Considers the conversion from degrees (carla) to radians (ROS).
+
+    :param carla_rotations: carla (roll, pitch, yaw) in degrees
+    :type carla_rotations: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx3 elements (roll, pitch, yaw) in radians
+    :rtype: numpy.array
+    """
+    rpy = numpy.radians(numpy.asarray(carla_rotations, dtype=numpy.float64).reshape(-1, 3))
+    rpy[:, 1:] *= -1.0
+    return rpy
+
+
+def carla_locations_to_numpy_vectors(carla_locations):
+    """
+    Convert an array of carla locations to an array of ROS vectors
+
+    Batch counterpart of carla_location_to_numpy_vector().
+    Considers the conversion from left-handed system (unreal) to right-handed
+    system (ROS)
+
+    :param carla_locations: carla (x, y, z) locations
+    :type carla_locations: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx3 elements
+    :rtype: numpy.array
+    """
+    vectors = numpy.array(carla_locations, dtype=numpy.float64).reshape(-1, 3)
+    vectors[:, 1] *= -1.0
+    return vectors
+
+
+def numpy_RPY_to_numpy_quaternions(rpy):
+    """
+    Convert an array of roll, pitch, yaw to an array of quaternions
+
+    Batch counterpart of _RPY_to_quaternion(), using the static xyz axes
+    convention of transforms3d.euler.euler2quat().
+
+    :param rpy: (roll, pitch, yaw) in radians, already in ROS convention
+    :type rpy: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx4 elements (w, x, y, z)
+    :rtype: numpy.array
+    """
+    half = numpy.asarray(rpy, dtype=numpy.float64).reshape(-1, 3) * 0.5
+    cos = numpy.cos(half)
+    sin = numpy.sin(half)
+    ci, cj, ck = cos[:, 0], cos[:, 1], cos[:, 2]
+    si, sj, sk = sin[:, 0], sin[:, 1], sin[:, 2]
+    cc = ci * ck
+    cs = ci * sk
+    sc = si * ck
+    ss = si * sk
+
+    quaternions = numpy.empty((half.shape[0], 4))
+    quaternions[:, 0] = cj * cc + sj * ss
+    quaternions[:, 1] = cj * sc - sj * cs
+    quaternions[:, 2] = cj * ss + sj * cc
+    quaternions[:, 3] = cj * cs - sj * sc
+    return quaternions
+
+
+def numpy_RPY_to_numpy_rotation_matrices(rpy):
+    """
+    Convert an array of roll, pitch, yaw to an array of rotation matrices
+
+    Batch counterpart of _RPY_to_rotation_matrix(), using the static xyz axes
+    convention of transforms3d.euler.euler2mat().
+
+    :param rpy: (roll, pitch, yaw) in radians, already in ROS convention
+    :type rpy: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx3x3 elements
+    :rtype: numpy.array
+    """
+    rpy = numpy.asarray(rpy, dtype=numpy.float64).reshape(-1, 3)
+    cos = numpy.cos(rpy)
+    sin = numpy.sin(rpy)
+    ci, cj, ck = cos[:, 0], cos[:, 1], cos[:, 2]
+    si, sj, sk = sin[:, 0], sin[:, 1], sin[:, 2]
+    cc = ci * ck
+    cs = ci * sk
+    sc = si * ck
+    ss = si * sk
+
+    matrices = numpy.empty((rpy.shape[0], 3, 3))
+    matrices[:, 0, 0] = cj * ck
+    matrices[:, 0, 1] = sj * sc - cs
+    matrices[:, 0, 2] = sj * cc + ss
+    matrices[:, 1, 0] = cj * sk
+    matrices[:, 1, 1] = sj * ss + cc
+    matrices[:, 1, 2] = sj * cs - sc
+    matrices[:, 2, 0] = -sj
+    matrices[:, 2, 1] = cj * si
+    matrices[:, 2, 2] = cj * ci
+    return matrices
+
+
+def carla_rotations_to_numpy_quaternions(carla_rotations):
+    """
+    Convert an array of carla rotations to an array of quaternions
+
+    Batch counterpart of carla_rotation_to_ros_quaternion().
+
+    :param carla_rotations: carla (roll, pitch, yaw) in degrees
+    :type carla_rotations: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx4 elements (w, x, y, z)
+    :rtype: numpy.array
+    """
+    return numpy_RPY_to_numpy_quaternions(carla_rotations_to_numpy_RPY(carla_rotations))
+
+
+def carla_rotations_to_numpy_rotation_matrices(carla_rotations):
+    """
+    Convert an array of carla rotations to an array of rotation matrices
+
+    Batch counterpart of carla_rotation_to_numpy_rotation_matrix().
+
+    :param carla_rotations: carla (roll, pitch, yaw) in degrees
+    :type carla_rotations: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx3x3 elements
+    :rtype: numpy.array
+    """
+    return numpy_RPY_to_numpy_rotation_matrices(carla_rotations_to_numpy_RPY(carla_rotations))
+
+
+def carla_transforms_to_numpy_poses(carla_locations, carla_rotations):
+    """
+    Convert arrays of carla locations and rotations to an array of poses
+
+    Batch counterpart of carla_transform_to_ros_pose().
+
+    :param carla_locations: carla (x, y, z) locations
+    :type carla_locations: numpy.array with Nx3 elements
+    :param carla_rotations: carla (roll, pitch, yaw) in degrees
+    :type carla_rotations: numpy.array with Nx3 elements
+    :return: a numpy.array with Nx7 elements (x, y, z, qw, qx, qy, qz)
+    :rtype: numpy.array
+    """
+    positions = carla_locations_to_numpy_vectors(carla_locations)
+    quaternions = carla_rotations_to_numpy_quaternions(carla_rotations)
+    if positions.shape[0] != quaternions.shape[0]:
+        raise ValueError("Got {} locations but {} rotations".format(
+            positions.shape[0], quaternions.shape[0]))
+
+    return numpy.hstack((positions, quaternions))
+
+
+def carla_transform_list_to_numpy_arrays(carla_transforms):
+    """
+    Unpack carla transforms into location and rotation arrays
+
+    :param carla_transforms: the carla transforms
+    :type carla_transforms: iterable of carla.Transform
+    :return: a tuple of two numpy.array with Nx3 elements
+        (carla locations, carla rotations in degrees)
+    :rtype: tuple
+    """
+    carla_transforms = list(carla_transforms)
+    values = numpy.empty((len(carla_transforms), 6))
+    for row, transform in zip(values, carla_transforms):
+        location = transform.location
+        rotation = transform.rotation
+        row[:] = (location.x, location.y, location.z,
+                  rotation.roll, rotation.pitch, rotation.yaw)
+
+    return values[:, :3], values[:, 3:]
+
+
+def carla_actors_to_numpy_poses(carla_actors):
+    """
+    Convert the current transforms of carla actors to an array of poses
+
+    Each actor is queried once with get_transform().
+
+    :param carla_actors: the carla actors
+    :type carla_actors: carla.ActorList or iterable of carla.Actor
+    :return: a tuple (ids, poses) with ids as numpy.array with N elements and
+        poses as numpy.array with Nx7 elements (x, y, z, qw, qx, qy, qz)
+    :rtype: tuple
+    """
+    carla_actors = list(carla_actors)
+    ids = numpy.fromiter((actor.id for actor in carla_actors), dtype=numpy.int64,
+                         count=len(carla_actors))
+    locations, rotations = carla_transform_list_to_numpy_arrays(
+        actor.get_transform() for actor in carla_actors)
+
+    return ids, carla_transforms_to_numpy_poses(locations, rotations)
+
+
+def carla_snapshot_to_numpy_poses(carla_snapshot, actor_ids=None):
+    """
+    Convert the actor transforms of a world snapshot to an array of poses
+
+    All poses refer to the same simulation frame.
+
+    :param carla_snapshot: the carla world snapshot
+    :type carla_snapshot: carla.WorldSnapshot
+    :param actor_ids: restrict the conversion to these actor ids.
+        If None, all actors of the snapshot are converted
+    :type actor_ids: iterable of int
+    :return: a tuple (ids, poses) with ids as numpy.array with N elements and
+        poses as numpy.array with Nx7 elements (x, y, z, qw, qx, qy, qz)
+    :rtype: tuple
+    """
+    if actor_ids is None:
+        actor_snapshots = list(carla_snapshot)
+    else:
+        actor_snapshots = [carla_snapshot.find(actor_id) for actor_id in actor_ids]
+        actor_snapshots = [snapshot for snapshot in actor_snapshots if snapshot is not None]
+
+    return carla_actors_to_numpy_poses(actor_snapshots)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+"""
+Frame pacing of the manual control loop
+
+Replaces pygame's Clock.tick_busy_loop, which spins a whole core while
+waiting for the next frame, by sleeping most of the interval and spinning
+only for its last fraction of a millisecond.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Dict
+
+
+class FramePacer(object):
+    """
+    Hold the loop at a target rate
+
+    tick() returns once the next frame is due. With a rate of 0 it returns
+    immediately, so the loop runs in lockstep with a blocking world.tick().
+    Like pygame.time.Clock, get_time() returns the duration of the last frame
+    in milliseconds.
+
+    :param rate: target frame rate in Hz, 0 for lockstep
+    :param spin_threshold: time in seconds spun instead of slept before
+        every deadline, covering the wake-up latency of sleep()
+    :param capacity: number of frame intervals kept for the statistics
+    :param timer: monotonic clock in seconds
+    :param sleep: sleep function taking seconds
+    """
+
+    def __init__(self,
+                 rate: float = 60.0,
+                 spin_threshold: float = 0.0005,
+                 capacity: int = 300,
+                 timer=time.perf_counter,
+                 sleep=time.sleep):
+        self.period = 1.0 / rate if rate > 0 else 0.0
+        self.spin_threshold = spin_threshold
+        self.timer = timer
+        self.sleep = sleep
+
+        self.intervals = deque(maxlen=capacity)
+        self.deadline = None
+        self.last_frame = None
+
+    def tick(self) -> float:
+        """Wait for the next frame, returns the duration of the last frame in ms"""
+        if self.period and self.deadline is not None:
+            remaining = self.deadline - self.timer()
+            if remaining > self.spin_threshold:
+                self.sleep(remaining - self.spin_threshold)
+            while self.timer() < self.deadline:
+                pass
+
+        now = self.timer()
+        if self.last_frame is not None:
+            self.intervals.append(now - self.last_frame)
+        self.last_frame = now
+
+        if self.period:
+            if self.deadline is None or now - self.deadline > self.period:
+                # Fell behind by more than a frame, do not try to catch up
+                self.deadline = now
+            self.deadline += self.period
+
+        return self.get_time()
+
+    def get_time(self) -> float:
+        return self.intervals[-1] * 1e3 if self.intervals else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Achieved rate in Hz and jitter (std. dev. of frame intervals) in ms"""
+        if not self.intervals:
+            return {"rate": 0.0, "jitter": 0.0}
+
+        mean = sum(self.intervals) / len(self.intervals)
+        variance = sum((x - mean) ** 2 for x in self.intervals) / len(self.intervals)
+        return {
+            "rate": 1.0 / mean if mean > 0 else 0.0,
+            "jitter": math.sqrt(variance) * 1e3
+        }
+
+    def summary_line(self) -> str:
+        stats = self.stats()
+        return 'Rate: %6.1f Hz jitter %5.2f ms' % (stats["rate"], stats["jitter"])
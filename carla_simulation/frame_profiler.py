@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""
+Per-phase timing of the manual control loop
+
+Durations of the last frames are kept in a fixed-size ring buffer, so that
+the percentiles always describe recent behaviour and memory stays bounded.
+"""
+
+import csv
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List
+
+import numpy
+
+
+class _PhaseTimer(object):
+    def __init__(self, profiler, column: int):
+        self.profiler = profiler
+        self.column = column
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.current[self.column] += time.perf_counter() - self.start
+        return False
+
+
+class FrameProfiler(object):
+    """
+    Record the duration of named phases of every frame
+
+    Wrap every phase in ``with profiler.phase(name):`` and call end_frame()
+    once per loop iteration. A disabled profiler records nothing.
+
+    :param phases: names of the phases, in loop order
+    :param capacity: number of frames kept in the ring buffer
+    :param enabled: whether timings are recorded
+    :param summary_interval: number of frames between refreshes of the
+        summary lines
+    """
+
+    def __init__(self,
+                 phases: Iterable[str],
+                 capacity: int = 600,
+                 enabled: bool = True,
+                 summary_interval: int = 30):
+        self.phases = list(phases)
+        self.columns = self.phases + ["frame"]
+        self.enabled = enabled
+        self.capacity = capacity
+
+        # One row per frame: the phase durations followed by the frame duration
+        self.durations = numpy.zeros((capacity, len(self.columns)))
+        self.current = numpy.zeros(len(self.columns))
+        self.frames = 0
+        self.frame_start = None
+
+        self.summary_interval = summary_interval
+        self._summary = []
+        self._summary_frame = None
+
+        self._timers = {name: _PhaseTimer(self, column) for column, name in enumerate(self.phases)}
+        self._disabled = nullcontext()
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return self._disabled
+        return self._timers[name]
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.current[-1] = now - self.frame_start
+            self.durations[self.frames % self.capacity] = self.current
+            self.frames += 1
+        self.frame_start = now
+        self.current[:] = 0.0
+
+    def recorded(self) -> numpy.ndarray:
+        """Recorded rows in chronological order, durations in seconds"""
+        if self.frames <= self.capacity:
+            return self.durations[:self.frames]
+        return numpy.roll(self.durations, -(self.frames % self.capacity), axis=0)
+
+    def percentiles(self, q=(50, 95, 99)) -> Dict[str, List[float]]:
+        """Percentiles q of every phase and of the whole frame, in seconds"""
+        recorded = self.recorded()
+        if not len(recorded):
+            return {}
+        values = numpy.percentile(recorded, q, axis=0)
+        return {name: values[:, column].tolist() for column, name in enumerate(self.columns)}
+
+    def summary_lines(self) -> List[str]:
+        """p50/p95/p99 per phase in milliseconds, formatted for the HUD"""
+        if (self._summary_frame is not None
+                and self.frames - self._summary_frame < self.summary_interval):
+            return self._summary
+
+        lines = []
+        for name, (p50, p95, p99) in self.percentiles().items():
+            lines.append('%-8s%5.1f %5.1f %5.1f ms' % (name, p50 * 1e3, p95 * 1e3, p99 * 1e3))
+        if lines:
+            lines.insert(0, '%-8s%5s %5s %5s' % ('', 'p50', 'p95', 'p99'))
+        self._summary = lines
+        self._summary_frame = self.frames
+        return lines
+
+    def dump_csv(self, path: str):
+        """Write the recorded frames to a CSV file, durations in milliseconds"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [name + "_ms" for name in self.columns])
+            first_frame = max(self.frames - self.capacity, 0)
+            for index, row in enumerate(self.recorded()):
+                writer.writerow([first_frame + index] + ['%.3f' % (value * 1e3) for value in row])
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+"""
+Incremental text rendering of the HUD
+
+Static labels are rendered once, rendered values are cached, and only lines
+whose text changed since the previous frame are redrawn. render() returns the
+dirty rectangles for pygame.display.update().
+"""
+
+from collections import OrderedDict
+from typing import List, Sequence
+
+import pygame
+
+
+class HUDRenderer(object):
+    """
+    Draw lines of text at fixed positions, redrawing only what changed
+
+    Every line is split after its first ':' into a label and a value. Labels
+    are kept for the lifetime of the renderer, values (and lines without a
+    label) in a bounded LRU dictionary.
+
+    :param font: the (monospace) font
+    :param origin: top left corner of the first line
+    :param line_height: vertical distance between lines in pixels
+    :param width: width of the cleared line area in pixels
+    :param color: text color
+    :param background: color the line area is cleared with
+    :param cache_size: maximum number of cached value surfaces
+    """
+
+    def __init__(self,
+                 font: pygame.font.Font,
+                 origin=(4, 4),
+                 line_height: int = 14,
+                 width: int = 300,
+                 color=(255, 255, 255),
+                 background=(0, 0, 0),
+                 cache_size: int = 256):
+        self.font = font
+        self.origin = origin
+        self.line_height = line_height
+        self.width = width
+        self.color = color
+        self.background = background
+        self.cache_size = cache_size
+
+        self.labels = {}
+        self.values = OrderedDict()
+        self.lines = []
+
+    def invalidate(self):
+        """Redraw every line on the next render, e.g. after the display was cleared"""
+        self.lines = []
+
+    def render(self, display: pygame.Surface, lines: Sequence[str]) -> List[pygame.Rect]:
+        dirty = []
+        x, y = self.origin
+        for index, text in enumerate(lines):
+            if index < len(self.lines) and self.lines[index] == text:
+                continue
+
+            rect = pygame.Rect(x, y + index * self.line_height, self.width, self.line_height)
+            display.fill(self.background, rect)
+
+            label, separator, value = text.partition(':')
+            if separator:
+                label_surface = self._label(label + separator)
+                display.blit(label_surface, rect.topleft)
+                display.blit(self._value(value), (rect.x + label_surface.get_width(), rect.y))
+            else:
+                display.blit(self._value(text), rect.topleft)
+            dirty.append(rect)
+
+        # Clear lines that are no longer shown
+        for index in range(len(lines), len(self.lines)):
+            rect = pygame.Rect(x, y + index * self.line_height, self.width, self.line_height)
+            display.fill(self.background, rect)
+            dirty.append(rect)
+
+        self.lines = list(lines)
+        return dirty
+
+    def _label(self, text: str) -> pygame.Surface:
+        surface = self.labels.get(text)
+        if surface is None:
+            surface = self.font.render(text, True, self.color)
+            self.labels[text] = surface
+        return surface
+
+    def _value(self, text: str) -> pygame.Surface:
+        if not text:
+            return self._label(text)
+        surface = self.values.get(text)
+        if surface is not None:
+            self.values.move_to_end(text)
+            return surface
+
+        surface = self.font.render(text, True, self.color)
+        self.values[text] = surface
+        if len(self.values) > self.cache_size:
+            self.values.popitem(last=False)
+        return surface
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+"""
+End-to-end latency tracing of republished sensor messages
+
+Every traced message carries its source CARLA frame and the wall-clock times
+(time.perf_counter_ns) at which the frame was ticked, the sensor message was
+ingested, the output was transformed and published. The frame and its tick
+time are looked up from the header stamp, which CARLA sets to the
+simulation time of the frame.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque, OrderedDict
+from typing import Dict, List, Optional
+
+import numpy
+
+# Consecutive timestamps of a traced message
+STAGES = ("tick", "ingest", "transform", "publish")
+
+# Latency intervals of the histograms, between the stages above
+INTERVALS = ("tick-ingest", "ingest-transform", "transform-publish", "total")
+
+# Histogram bin edges in seconds, logarithmic from 10 us to 10 s
+BIN_EDGES = numpy.logspace(-5, 1, 61)
+
+
+def stamp_key(sec: int, nanosec: int) -> int:
+    """Simulation time in units of 0.1 ms, to match header stamps with ticks"""
+    return int(round(sec * 1e4 + nanosec * 1e-5))
+
+
+class LatencyTracer(object):
+    """
+    Per-topic latency histograms and a ring buffer of recent traces
+
+    Thread-safe: ticks are typically reported from the CARLA client thread,
+    traces from executor threads.
+
+    :param capacity: number of recent traces kept for the Chrome trace export
+    :param tick_capacity: number of recent frames kept to look up stamps
+    """
+
+    def __init__(self, capacity: int = 2048, tick_capacity: int = 256):
+        self.lock = threading.Lock()
+        self.ticks = OrderedDict()
+        self.tick_capacity = tick_capacity
+        self.traces = deque(maxlen=capacity)
+        self.histograms = {}
+        self.counts = {}
+
+    def tick(self, frame: int, elapsed_seconds: float, wall_ns: int = None):
+        """Record the wall time of a simulator frame, e.g. from World.on_tick()"""
+        if wall_ns is None:
+            wall_ns = time.perf_counter_ns()
+        sec = int(elapsed_seconds)
+        key = stamp_key(sec, int(round((elapsed_seconds - sec) * 1e9)))
+        with self.lock:
+            self.ticks[key] = (frame, wall_ns)
+            if len(self.ticks) > self.tick_capacity:
+                self.ticks.popitem(last=False)
+
+    def lookup(self, stamp) -> tuple:
+        """Frame and tick wall time of a header stamp, (None, None) if unknown"""
+        key = stamp_key(stamp.sec, stamp.nanosec)
+        with self.lock:
+            for candidate in (key, key - 1, key + 1):
+                if candidate in self.ticks:
+                    return self.ticks[candidate]
+        return None, None
+
+    def record(self,
+               topic: str,
+               frame: Optional[int],
+               tick_ns: Optional[int],
+               ingest_ns: int,
+               transform_ns: int,
+               publish_ns: int):
+        """Add the timestamps of one published message"""
+        times = (tick_ns, ingest_ns, transform_ns, publish_ns)
+        latencies = [
+            (later - earlier) * 1e-9 if earlier is not None else None
+            for earlier, later in zip(times[:-1], times[1:])
+        ]
+        first = tick_ns if tick_ns is not None else ingest_ns
+        latencies.append((publish_ns - first) * 1e-9)
+
+        with self.lock:
+            histogram = self.histograms.get(topic)
+            if histogram is None:
+                histogram = numpy.zeros((len(INTERVALS), len(BIN_EDGES) + 1), dtype=numpy.int64)
+                self.histograms[topic] = histogram
+                self.counts[topic] = 0
+            for interval, latency in enumerate(latencies):
+                if latency is not None:
+                    histogram[interval, numpy.searchsorted(BIN_EDGES, latency)] += 1
+            self.counts[topic] += 1
+            self.traces.append((topic, frame, times))
+
+    def percentile(self, topic: str, interval: str, q: float) -> float:
+        """Approximate percentile in seconds (upper bin edge), nan without samples"""
+        with self.lock:
+            counts = self.histograms[topic][INTERVALS.index(interval)].copy()
+        total = counts.sum()
+        if not total:
+            return math.nan
+        index = int(numpy.searchsorted(numpy.cumsum(counts), q / 100.0 * total))
+        return float(BIN_EDGES[min(index, len(BIN_EDGES) - 1)])
+
+    def summary(self, q=(50, 99)) -> Dict[str, Dict[str, List[float]]]:
+        """Percentiles q of every interval of every topic, in seconds"""
+        with self.lock:
+            topics = list(self.histograms)
+        return {
+            topic: {
+                interval: [self.percentile(topic, interval, p) for p in q]
+                for interval in INTERVALS
+            }
+            for topic in topics
+        }
+
+    def chrome_trace(self) -> Dict:
+        """Recent traces in the Chrome trace event format, one row per topic"""
+        with self.lock:
+            traces = list(self.traces)
+
+        rows = {}
+        events = []
+        for topic, frame, times in traces:
+            tid = rows.setdefault(topic, len(rows) + 1)
+            for interval, start, end in zip(INTERVALS, times[:-1], times[1:]):
+                if start is None:
+                    continue
+                events.append({
+                    "name": interval,
+                    "cat": topic,
+                    "ph": "X",
+                    "ts": start / 1e3,
+                    "dur": (end - start) / 1e3,
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"frame": frame}
+                })
+        events.extend({
+            "name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": topic}
+        } for topic, tid in rows.items())
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path: str):
+        """Write the recent traces to a file loadable in chrome://tracing or Perfetto"""
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
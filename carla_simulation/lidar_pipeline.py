@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+"""
+Vectorized preprocessing of lidar point clouds
+
+PointCloud2 data is viewed as a NumPy structured array without copying it,
+passed through the configured stages and written back into a point cloud of
+the same point layout. Each stage reports its duration and its number of
+points in and out.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy
+
+# PointField datatypes
+_POINT_FIELD_TYPES = {
+    1: 'i1',
+    2: 'u1',
+    3: 'i2',
+    4: 'u2',
+    5: 'i4',
+    6: 'u4',
+    7: 'f4',
+    8: 'f8'
+}
+
+
+def pointcloud2_dtype(fields, point_step: int, is_bigendian: bool = False) -> numpy.dtype:
+    """
+    Structured dtype of the points of a PointCloud2
+
+    :param fields: the fields of the cloud (name, offset, datatype, count)
+    :type fields: list of sensor_msgs.msg.PointField
+    :param point_step: size of one point in bytes, including padding
+    :type point_step: int
+    :param is_bigendian: byte order of the data
+    :type is_bigendian: bool
+    :return: dtype with one member per field at its offset
+    :rtype: numpy.dtype
+    """
+    byte_order = '>' if is_bigendian else '<'
+    formats = []
+    for field in fields:
+        field_format = byte_order + _POINT_FIELD_TYPES[field.datatype]
+        formats.append((field_format, (field.count,)) if field.count > 1 else field_format)
+    return numpy.dtype({
+        'names': [field.name for field in fields],
+        'formats': formats,
+        'offsets': [field.offset for field in fields],
+        'itemsize': point_step
+    })
+
+
+def pointcloud2_to_array(cloud) -> numpy.ndarray:
+    """
+    View the data of a PointCloud2 as a structured array, without copying it
+
+    The view is read-only if the message data is immutable.
+
+    :param cloud: the point cloud
+    :type cloud: sensor_msgs.msg.PointCloud2
+    :return: one element per point
+    :rtype: numpy.ndarray
+    """
+    dtype = pointcloud2_dtype(cloud.fields, cloud.point_step, cloud.is_bigendian)
+    if not cloud.point_step:
+        return numpy.zeros(0, dtype=dtype)
+    return numpy.frombuffer(cloud.data, dtype=dtype, count=len(cloud.data) // cloud.point_step)
+
+
+def array_to_pointcloud2_into(cloud, points: numpy.ndarray, source):
+    """
+    Write points into an existing PointCloud2
+
+    Header, fields and byte order are taken over from the source cloud the
+    points were viewed from.
+
+    :param cloud: the point cloud to fill
+    :type cloud: sensor_msgs.msg.PointCloud2
+    :param points: the points, with the dtype of the source cloud
+    :type points: numpy.ndarray
+    :param source: the point cloud the points came from
+    :type source: sensor_msgs.msg.PointCloud2
+    :return: cloud
+    :rtype: sensor_msgs.msg.PointCloud2
+    """
+    cloud.header = source.header
+    cloud.height = 1
+    cloud.width = len(points)
+    cloud.fields = source.fields
+    cloud.is_bigendian = source.is_bigendian
+    cloud.point_step = points.dtype.itemsize
+    cloud.row_step = cloud.point_step * len(points)
+    cloud.data = points.tobytes()
+    cloud.is_dense = source.is_dense
+    return cloud
+
+
+def crop(points: numpy.ndarray,
+         min_range: float = 0.0,
+         max_range: float = math.inf,
+         x=(-math.inf, math.inf),
+         y=(-math.inf, math.inf),
+         z=(-math.inf, math.inf)) -> numpy.ndarray:
+    """Keep the points within a range interval and an axis-aligned box"""
+    squared_range = points['x'] ** 2 + points['y'] ** 2 + points['z'] ** 2
+    mask = (squared_range >= min_range ** 2) & (squared_range <= max_range ** 2)
+    for axis, (low, high) in (('x', x), ('y', y), ('z', z)):
+        if low > -math.inf:
+            mask &= points[axis] >= low
+        if high < math.inf:
+            mask &= points[axis] <= high
+    return points[mask]
+
+
+def voxel_downsample(points: numpy.ndarray, size: float = 0.1) -> numpy.ndarray:
+    """Keep the first point of every occupied voxel of the given edge length"""
+    if not len(points):
+        return points
+
+    cells = [numpy.floor(points[axis] / size).astype(numpy.int64) for axis in ('x', 'y', 'z')]
+    key = numpy.zeros(len(points), dtype=numpy.int64)
+    for cell in cells:
+        cell -= cell.min()
+        key = key * (int(cell.max()) + 1) + cell
+    _, first = numpy.unique(key, return_index=True)
+    first.sort()
+    return points[first]
+
+
+def remove_ground(points: numpy.ndarray, height: float = -2.0,
+                  tolerance: float = 0.2) -> numpy.ndarray:
+    """Drop the points up to tolerance above the ground plane at z = height"""
+    return points[points['z'] > height + tolerance]
+
+
+def deskew(points: numpy.ndarray,
+           linear_velocity,
+           angular_velocity,
+           period: float = 0.05,
+           start_azimuth: float = 180.0) -> numpy.ndarray:
+    """
+    Compensate the motion of the sensor during one sweep
+
+    The capture time of every point is estimated from its azimuth, assuming
+    one counter-clockwise revolution per period that starts at start_azimuth
+    (degrees) and ends at the cloud stamp. Every point is moved to where it
+    would have been measured at the stamp, to first order in the constant
+    ego twist. Writeable points are modified in place.
+
+    :param linear_velocity: velocity of the sensor in its own frame [m/s]
+    :param angular_velocity: angular velocity of the sensor in its own frame [rad/s]
+    """
+    if not len(points):
+        return points
+    if not points.flags.writeable:
+        points = points.copy()
+
+    x, y, z = (points[axis].astype(numpy.float64) for axis in ('x', 'y', 'z'))
+    azimuth = numpy.arctan2(y, x) - math.radians(start_azimuth)
+    # Seconds between the capture of every point and the stamp, <= 0
+    dt = (numpy.mod(azimuth, 2 * math.pi) / (2 * math.pi) - 1.0) * period
+
+    vx, vy, vz = linear_velocity
+    wx, wy, wz = angular_velocity
+    points['x'] = x + (wy * z - wz * y + vx) * dt
+    points['y'] = y + (wz * x - wx * z + vy) * dt
+    points['z'] = z + (wx * y - wy * x + vz) * dt
+    return points
+
+
+STAGES = {
+    "crop": crop,
+    "voxel": voxel_downsample,
+    "ground": remove_ground,
+    "deskew": deskew
+}
+
+
+class LidarPipeline(object):
+    """
+    Apply configured preprocessing stages to point clouds
+
+    Every stage is a dict with the stage name under "stage" and the keyword
+    arguments of its function, e.g. {"stage": "voxel", "size": 0.2}. The
+    deskew stage additionally gets the ego twist passed to process().
+    The points passed to process() are never modified, so they may be a
+    view of a received message.
+
+    :param stages: the stages, in processing order
+    :type stages: list of dict
+    """
+
+    def __init__(self, stages: List[Dict]):
+        self.stages = []
+        for index, stage in enumerate(stages):
+            parameters = dict(stage)
+            name = parameters.pop("stage")
+            if name not in STAGES:
+                raise ValueError("Unknown lidar pipeline stage {}".format(name))
+            self.stages.append(("{}:{}".format(index, name), STAGES[name], parameters))
+
+        self.calls = 0
+        self.seconds = OrderedDict((label, 0.0) for label, _, _ in self.stages)
+        self.points_in = OrderedDict((label, 0) for label, _, _ in self.stages)
+        self.points_out = OrderedDict((label, 0) for label, _, _ in self.stages)
+
+    def process(self,
+                points: numpy.ndarray,
+                linear_velocity=(0.0, 0.0, 0.0),
+                angular_velocity=(0.0, 0.0, 0.0)) -> numpy.ndarray:
+        self.calls += 1
+        source = points
+        for label, stage, parameters in self.stages:
+            start = time.perf_counter()
+            points_in = len(points)
+            if stage is deskew:
+                # Deskewing works in place, but not on the caller's points
+                if numpy.may_share_memory(points, source):
+                    points = points.copy()
+                points = stage(points, linear_velocity, angular_velocity, **parameters)
+            else:
+                points = stage(points, **parameters)
+            self.seconds[label] += time.perf_counter() - start
+            self.points_in[label] += points_in
+            self.points_out[label] += len(points)
+        return points
+
+    def stats(self) -> Dict[str, Dict]:
+        """Total seconds and points in and out of every stage"""
+        return OrderedDict(
+            (label, {
+                "calls": self.calls,
+                "seconds": self.seconds[label],
+                "points_in": self.points_in[label],
+                "points_out": self.points_out[label]
+            })
+            for label, _, _ in self.stages
+        )
@@ -12,23 +12,98 @@ import time
 
 from typing import List, Dict
 
+from async_client import AsyncCarlaClient
+from blueprint_index import BlueprintIndex
+from frame_pacer import FramePacer
+from frame_profiler import FrameProfiler
+from hud_renderer import HUDRenderer
+from state_cache import VehicleStateCache
+
+# Timed phases of one iteration of the game loop
+LOOP_PHASES = ("tick", "clock", "hud", "render", "events", "rpc", "flip")
+
+# Seconds to wait for spawned actors to show up in the simulation
+ACTOR_READY_TIMEOUT = 10.0
+
+# Seconds to wait for the first tick of a freshly loaded map
+MAP_READY_TIMEOUT = 60.0
+
+def load_map(carla_client: carla.Client,
+             map_name: str,
+             timeout: float = MAP_READY_TIMEOUT) -> carla.World:
+    """
+    Return a world running map_name, loading it only if necessary
+
+    After a reload, waits for the first tick of the new world instead of a
+    fixed time.
+    """
+    carla_world = carla_client.get_world()
+    current_map = carla_world.get_map().name.split('/')[-1]
+    if current_map == map_name:
+        logging.info("Map {} already loaded".format(map_name))
+        return carla_world
+
+    logging.info("Loading map {} (current: {})".format(map_name, current_map))
+    carla_world = carla_client.load_world(map_name)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            carla_world.wait_for_tick(1.0)
+            return carla_world
+        except RuntimeError:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Map {} not ready after {} s".format(map_name, timeout))
+
+def wait_for_actors(carla_world: carla.World,
+                    actor_ids: List[int],
+                    timeout: float = ACTOR_READY_TIMEOUT) -> int:
+    """
+    Advance the simulation until all actors are part of the world snapshot
+
+    Ticks the world in synchronous mode and waits for the next tick
+    otherwise. Returns the number of frames waited.
+    """
+    synchronous = carla_world.get_settings().synchronous_mode
+    deadline = time.monotonic() + timeout
+    frames = 0
+    while True:
+        snapshot = carla_world.get_snapshot()
+        if all(snapshot.find(actor_id) is not None for actor_id in actor_ids):
+            return frames
+
+        if time.monotonic() > deadline:
+            raise RuntimeError(
+                "Actors {} not ready after {} s".format(list(actor_ids), timeout))
+
+        if synchronous:
+            carla_world.tick()
+        else:
+            carla_world.wait_for_tick(timeout)
+        frames += 1
+
 class HUD(object):
     def __init__(self, width=420, height=420):
         self.dim = (width, height)
         self.set_font()
+        self.renderer = HUDRenderer(self.font_mono, width=width)
 
     def set_font(self):
         font_name = 'courier' if os.name == 'nt' else 'mono'
         fonts = [x for x in pygame.font.get_fonts() if font_name in x]
         default_font = 'ubuntumono'
-        mono = default_font if default_font in fonts else fonts[0]
-        mono = pygame.font.match_font(mono)
+        if fonts:
+            mono = default_font if default_font in fonts else fonts[0]
+            mono = pygame.font.match_font(mono)
+        else:
+            # No system fonts, e.g. headless, use the font bundled with pygame
+            mono = None
         self.font_mono = pygame.font.Font(mono, 12 if os.name == 'nt' else 14)
  
     def tick(self, 
              location: carla.Transform, 
              velocity: carla.Vector3D, 
-             control: carla.VehicleControl):
+             control: carla.VehicleControl,
+             frame_stats: List[str] = None):
         self.info_text = [
             'Speed:   % 15.0f km/h' % (3.6 * math.sqrt(velocity.x**2 + velocity.y**2 + velocity.z**2)),
             'Location:% 20s' % ('(% 5.1f, % 5.1f)' % (location.location.x, location.location.y)),
@@ -41,75 +116,158 @@ class HUD(object):
             ('Manual:', control.manual_gear_shift),
             'Gear:        %s' % {-1: 'R', 0: 'N'}.get(control.gear, control.gear)
         ]
+        if frame_stats:
+            self.info_text.extend(frame_stats)
         
-    def render(self, display):
-        info_surface = pygame.Surface(self.dim)
-        info_surface.set_alpha(0)
-        display.blit(info_surface, (0, 0))
-        
-        v_offset = 4
+    def render(self, display) -> List[pygame.Rect]:
+        """Draw the lines that changed, returns the dirty rectangles"""
+        lines = []
         for item in self.info_text:
             if isinstance(item, tuple):
                 # 处理带范围的参数
-                text = f"{item[0]}: {item[1]:.2f}"
-                text_surface = self.font_mono.render(text, True, (255, 255, 255))
+                lines.append(f"{item[0]}: {item[1]:.2f}")
             else:
-                text_surface = self.font_mono.render(item, True, (255, 255, 255))
-            
-            display.blit(text_surface, (4, v_offset))
-            v_offset += 14
+                lines.append(item)
+
+        return self.renderer.render(display, lines)
 
 class SimEnvironment(object):   
+    """
+    Ego vehicle(s) and their sensors
+
+    A config either describes one vehicle, or a fleet under "vehicles", each
+    with its own id, sensor rig and optional "spawn_point" (index into the
+    spawn points of the map, by default its position in the fleet). The
+    first vehicle is available as self.vehicle and is the one driven by the
+    keyboard.
+    """
+
     def __init__(self, 
                  carla_world: carla.World, 
-                 configs: Dict):
+                 configs: Dict,
+                 carla_client: carla.Client = None):
         self.world = carla_world
         self.configs = configs
+        self.vehicle_configs = configs.get("vehicles", [configs])
+        # Used to spawn and destroy actors in batches, if given
+        self.client = carla_client
         self.vehicle = None
+        self.vehicles = []
+        self.sensors = []
+        # Sensors of every vehicle, in the order of self.vehicles
+        self.vehicle_sensors = []
+        # Duration and per-sensor errors of the last spawn
+        self.spawn_report = {}
+        # Vehicle states of the last tick, updated by the control loop
+        self.state_cache = VehicleStateCache()
+
+        self.blueprints = BlueprintIndex.for_world(carla_world)
+        errors = []
+        for vehicle_config in self.vehicle_configs:
+            errors.extend(self.blueprints.validate(vehicle_config))
+        vehicle_ids = [vehicle_config.get("id") for vehicle_config in self.vehicle_configs]
+        if len(set(vehicle_ids)) != len(vehicle_ids):
+            errors.append("Vehicle ids are not unique: {}".format(vehicle_ids))
+        if errors:
+            raise ValueError("Invalid vehicle configuration:\n" + "\n".join(errors))
+        # Called with this environment after every restart
+        self.restart_callbacks = []
         self.restart()
+
+    @property
+    def fleet(self) -> bool:
+        return "vehicles" in self.configs
     
     def restart(self):
         logging.debug("New game begins!")
-        self.vehicle = self.setup_vehicle(
-            self.world, 
-            self.configs
-        )
-        time.sleep(2)
-        logging.info("Vehicle set")
-
-        self.vehicle.set_autopilot(False)
-        time.sleep(2)
-        logging.info("Autopilot mode set")
+        start_time = time.perf_counter()
+        batch = self.client is not None and self.configs.get("batch_spawn", True)
+        errors = {}
+        if batch:
+            self.vehicles = self.setup_vehicles_batch(
+                self.client,
+                self.world,
+                self.vehicle_configs
+            )
+            logging.info("Vehicles set")
+
+            self.vehicle_sensors = self.setup_sensors_batch(
+                self.client,
+                self.world,
+                self.vehicles,
+                self.vehicle_configs,
+                errors
+            )
+        else:
+            self.vehicles = []
+            self.vehicle_sensors = []
+            for index, vehicle_config in enumerate(self.vehicle_configs):
+                vehicle = self.setup_vehicle(
+                    self.world, 
+                    vehicle_config,
+                    index
+                )
+                vehicle.set_autopilot(vehicle_config.get("autopilot", False))
+                self.vehicles.append(vehicle)
+
+                self.vehicle_sensors.append(self.setup_sensors(
+                    self.world, 
+                    vehicle, 
+                    vehicle_config.get("sensors", [])
+                ))
+            logging.info("Vehicles and autopilot mode set")
+        self.vehicle = self.vehicles[0]
+        self.sensors = [sensor for sensors in self.vehicle_sensors for sensor in sensors]
+        spawn_time = time.perf_counter() - start_time
+        logging.info("Sensors set")
 
-        self.sensors = self.setup_sensors(
+        frames = wait_for_actors(
             self.world, 
-            self.vehicle, 
-            self.configs.get("sensors", [])
+            [actor.id for actor in self.vehicles + self.sensors]
         )
-        time.sleep(2)
-        logging.info("Sensors set")
+        self.spawn_report = {
+            "mode": "batch" if batch else "sequential",
+            "vehicles": len(self.vehicles),
+            "sensors": len(self.sensors),
+            "spawn_seconds": spawn_time,
+            "ready_frames": frames,
+            "errors": errors
+        }
+        logging.info("Spawned {} vehicles and {} sensors in {:.3f} s ({})".format(
+            len(self.vehicles), len(self.sensors), spawn_time, self.spawn_report["mode"]))
+        logging.info("Restarted in {:.2f} s ({} frames)".format(
+            time.perf_counter() - start_time, frames))
+
+        for callback in self.restart_callbacks:
+            callback(self)
 
     def destroy(self):
         logging.debug("Destroy!")
-        for sensor in self.sensors:
-            sensor.destroy()
-            time.sleep(2)
-        
-        if self.vehicle:
-            self.vehicle.destroy()
-            time.sleep(2)
+        # Sensors first, so that none outlives the vehicle it is attached to
+        actors = self.sensors + self.vehicles
+        if self.client is not None and actors:
+            responses = self.client.apply_batch_sync(
+                [carla.command.DestroyActor(actor) for actor in actors]
+            )
+            for response in responses:
+                if response.error:
+                    logging.error("Failed to destroy actor: {}".format(response.error))
+        else:
+            for actor in actors:
+                actor.destroy()
+        self.sensors = []
+        self.vehicle_sensors = []
+        self.vehicles = []
+        self.vehicle = None
     
-    def setup_vehicle(self,
-                      carla_world: carla.World,
-                      vehicle_config: Dict) -> carla.Vehicle:
+    def vehicle_blueprint(self,
+                          carla_world: carla.World,
+                          vehicle_config: Dict) -> carla.ActorBlueprint:
         logging.debug(
             "Spawning vehicle: {}".format(vehicle_config.get("type"))
         )
-        
-        blueprint_lib = carla_world.get_blueprint_library()
-        carla_map = carla_world.get_map()
 
-        blueprint = blueprint_lib.filter(vehicle_config.get("type"))[0]
+        blueprint = self.blueprints.find(vehicle_config.get("type"))
         
         blueprint.set_attribute(
             "role_name", 
@@ -121,9 +279,50 @@ class SimEnvironment(object):
             vehicle_config.get("id")
         ) 
 
+        return blueprint
+
+    def sensor_blueprint(self, sensor: Dict) -> carla.ActorBlueprint:
+        logging.debug("Spawning sensor: {}".format(sensor))
+
+        blueprint = self.blueprints.find(sensor.get("type"))
+        blueprint.set_attribute("ros_name", sensor.get("id")) 
+        blueprint.set_attribute("role_name", sensor.get("id")) 
+        for key, value in sensor.get("attributes", {}).items():
+            blueprint.set_attribute(str(key), str(value))
+
+        return blueprint
+
+    def sensor_spawn_point(self, sensor: Dict) -> carla.Transform:
+        location = carla.Location(
+            x=sensor["spawn_point"]["x"], 
+            y=-sensor["spawn_point"]["y"], 
+            z=sensor["spawn_point"]["z"]
+        )
+
+        rotation = carla.Rotation(
+            roll=sensor["spawn_point"]["roll"], 
+            pitch=-sensor["spawn_point"]["pitch"], 
+            yaw=-sensor["spawn_point"]["yaw"]
+        )
+
+        return carla.Transform(location, rotation)
+
+    def vehicle_spawn_point(self,
+                            spawn_points: List[carla.Transform],
+                            vehicle_config: Dict,
+                            index: int) -> carla.Transform:
+        return spawn_points[vehicle_config.get("spawn_point", index) % len(spawn_points)]
+
+    def setup_vehicle(self,
+                      carla_world: carla.World,
+                      vehicle_config: Dict,
+                      index: int = 0) -> carla.Vehicle:
+        blueprint = self.vehicle_blueprint(carla_world, vehicle_config)
+
         return carla_world.spawn_actor(
             blueprint,
-            carla_map.get_spawn_points()[0],
+            self.vehicle_spawn_point(
+                carla_world.get_map().get_spawn_points(), vehicle_config, index),
             attach_to=None
         )        
 
@@ -131,35 +330,11 @@ class SimEnvironment(object):
                       carla_world: carla.World,
                       carla_vehicle: carla.Vehicle,
                       sensors_config: List[Dict]) -> List[carla.Sensor]:    
-        blueprint_lib = carla_world.get_blueprint_library()
-
         sensors = []
         for sensor in sensors_config:
-            logging.debug("Spawning sensor: {}".format(sensor))
-
-            blueprint = blueprint_lib.filter(sensor.get("type"))[0]
-            blueprint.set_attribute("ros_name", sensor.get("id")) 
-            blueprint.set_attribute("role_name", sensor.get("id")) 
-            for key, value in sensor.get("attributes", {}).items():
-                blueprint.set_attribute(str(key), str(value))
-
-            location = carla.Location(
-                x=sensor["spawn_point"]["x"], 
-                y=-sensor["spawn_point"]["y"], 
-                z=sensor["spawn_point"]["z"]
-            )
-
-            rotation = carla.Rotation(
-                roll=sensor["spawn_point"]["roll"], 
-                pitch=-sensor["spawn_point"]["pitch"], 
-                yaw=-sensor["spawn_point"]["yaw"]
-            )
-
-            spawn_point = carla.Transform(location, rotation)
-
             sensor = carla_world.spawn_actor(
-                blueprint,
-                spawn_point,
+                self.sensor_blueprint(sensor),
+                self.sensor_spawn_point(sensor),
                 attach_to=carla_vehicle
             )
             
@@ -168,6 +343,90 @@ class SimEnvironment(object):
 
         return sensors
 
+    def setup_vehicles_batch(self,
+                             carla_client: carla.Client,
+                             carla_world: carla.World,
+                             vehicle_configs: List[Dict]) -> List[carla.Vehicle]:
+        """
+        Spawn all vehicles and set their autopilot in one batch
+
+        If any vehicle fails to spawn, the others are destroyed again and a
+        RuntimeError is raised.
+        """
+        SpawnActor = carla.command.SpawnActor
+        SetAutopilot = carla.command.SetAutopilot
+        FutureActor = carla.command.FutureActor
+
+        spawn_points = carla_world.get_map().get_spawn_points()
+        responses = carla_client.apply_batch_sync([
+            SpawnActor(
+                self.vehicle_blueprint(carla_world, vehicle_config),
+                self.vehicle_spawn_point(spawn_points, vehicle_config, index)
+            ).then(SetAutopilot(FutureActor, vehicle_config.get("autopilot", False)))
+            for index, vehicle_config in enumerate(vehicle_configs)
+        ])
+
+        failures = [
+            "{}: {}".format(vehicle_config.get("id"), response.error)
+            for vehicle_config, response in zip(vehicle_configs, responses) if response.error
+        ]
+        if failures:
+            carla_client.apply_batch_sync([
+                carla.command.DestroyActor(response.actor_id)
+                for response in responses if not response.error
+            ])
+            raise RuntimeError("Failed to spawn vehicles:\n" + "\n".join(failures))
+
+        return list(carla_world.get_actors([response.actor_id for response in responses]))
+
+    def setup_sensors_batch(self,
+                            carla_client: carla.Client,
+                            carla_world: carla.World,
+                            carla_vehicles: List[carla.Vehicle],
+                            vehicle_configs: List[Dict],
+                            errors: Dict = None) -> List[List[carla.Sensor]]:
+        """
+        Spawn the sensors of all vehicles in one batch
+
+        Returns the sensors of every vehicle. Sensors that fail to spawn are
+        logged, skipped and reported in errors by sensor id (prefixed with the
+        vehicle id in a fleet).
+        """
+        SpawnActor = carla.command.SpawnActor
+
+        commands = []
+        owners = []
+        vehicles = zip(carla_vehicles, vehicle_configs)
+        for vehicle_index, (vehicle, vehicle_config) in enumerate(vehicles):
+            for sensor in vehicle_config.get("sensors", []):
+                commands.append(SpawnActor(
+                    self.sensor_blueprint(sensor),
+                    self.sensor_spawn_point(sensor),
+                    vehicle.id
+                ))
+                owners.append((vehicle_index, vehicle_config.get("id"), sensor.get("id")))
+        responses = carla_client.apply_batch_sync(commands) if commands else []
+
+        actor_ids = []
+        actor_owners = []
+        for (vehicle_index, vehicle_id, sensor_id), response in zip(owners, responses):
+            if self.fleet:
+                sensor_id = "{}/{}".format(vehicle_id, sensor_id)
+            if response.error:
+                logging.error("Failed to spawn sensor {}: {}".format(sensor_id, response.error))
+                if errors is not None:
+                    errors[sensor_id] = response.error
+            else:
+                actor_ids.append(response.actor_id)
+                actor_owners.append(vehicle_index)
+
+        vehicle_sensors = [[] for _ in carla_vehicles]
+        for vehicle_index, sensor in zip(actor_owners, carla_world.get_actors(actor_ids)):
+            sensor.enable_for_ros()
+            vehicle_sensors[vehicle_index].append(sensor)
+
+        return vehicle_sensors
+
 class KeyboardControl(object):
     def __init__(self, 
                  sim_env: SimEnvironment):
@@ -179,7 +438,15 @@ class KeyboardControl(object):
         
     def parse_events(self, 
                      sim_env: SimEnvironment, 
-                     clock: pygame.time.Clock) -> bool:
+                     clock: FramePacer,
+                     rpc: AsyncCarlaClient = None) -> bool:
+        """
+        Handle the pygame events and apply the vehicle control
+
+        With rpc, the control calls are submitted to it instead of blocking.
+        Returns True when the window was closed.
+        """
+        call = rpc.submit if rpc is not None else (lambda function, *args: function(*args))
         current_lights = self.lights        
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -209,10 +476,11 @@ class KeyboardControl(object):
         else: # Remove the Reverse flag
             current_lights &= ~carla.VehicleLightState.Reverse
         if current_lights != self.lights: # Change the light state only if necessary
-            sim_env.vehicle.set_light_state(carla.VehicleLightState(current_lights))        
+            self.lights = carla.VehicleLightState(current_lights)
+            call(sim_env.vehicle.set_light_state, self.lights)
 
         # Apply control
-        sim_env.vehicle.apply_control(self.control)
+        call(sim_env.vehicle.apply_control, self.control)
     
     def parse_vehicle_cmd(self, keys, milliseconds):
         if keys[pygame.K_UP] or keys[pygame.K_w]:
@@ -247,15 +515,34 @@ class KeyboardControl(object):
         self.control.steer = round(self.steer_cache, 1)
         self.control.hand_brake = keys[pygame.K_SPACE]
 
-def game_loop(args):
+def game_loop(args, carla_client=None, on_start=None, profiler=None):
+    """
+    Run the manual control loop
+
+    carla_client allows sharing an existing client connection. on_start is
+    called with the SimEnvironment once the ego vehicle is spawned. profiler
+    records the duration of every loop phase, by default one is created from
+    the --profile arguments.
+
+    After every tick, the world snapshot is stored in sim_env.state_cache,
+    from which the HUD (and the publishers of sim_node) read the vehicle
+    state. With --rpc-workers, the simulator calls run on worker threads:
+    the HUD of the last frame is rendered while the world ticks, and the
+    snapshot read and the controls that follow the tick are in flight
+    together.
+    """
+    start_time = time.perf_counter()
+    if profiler is None:
+        profiler = FrameProfiler(LOOP_PHASES, enabled=args.profile or bool(args.profile_csv))
+
     pygame.init()
     pygame.font.init()
     
     display_width = 300
     display_height = 300
+    # Single buffered, so that only the dirty HUD regions need updating
     display = pygame.display.set_mode(
-        (display_width, display_height), 
-        pygame.HWSURFACE | pygame.DOUBLEBUF
+        (display_width, display_height)
     )
     
     pygame.display.set_caption('Carla Manual Control')
@@ -263,15 +550,16 @@ def game_loop(args):
     carla_world = None
     original_settings = None
     sim_env = None
+    clock = None
+    rpc = None
     
     try:
-        carla_client = carla.Client(args.host, args.port)
-        carla_client.set_timeout(2000.0)
+        if carla_client is None:
+            carla_client = carla.Client(args.host, args.port)
+            carla_client.set_timeout(2000.0)
 
-        carla_world = carla_client.get_world()
-        carla_world = carla_client.load_world('Mine_01')
-        time.sleep(10)
-        logging.info("Offroad map loaded")
+        carla_world = load_map(carla_client, args.map)
+        logging.info("Map ready after {:.2f} s".format(time.perf_counter() - start_time))
         
         original_settings = carla_world.get_settings()
         settings = carla_world.get_settings()
@@ -284,38 +572,96 @@ def game_loop(args):
         with open(args.file) as f:
             config = json.load(f)
         
-        sim_env = SimEnvironment(carla_world, config)
+        sim_env = SimEnvironment(carla_world, config, carla_client)
         key_controller = KeyboardControl(sim_env)
         hud = HUD()
 
+        if on_start is not None:
+            on_start(sim_env)
+
+        logging.info("Started in {:.2f} s".format(time.perf_counter() - start_time))
+
         _ = carla_world.tick()
+        sim_env.state_cache.update(carla_world.get_snapshot())
+        state = sim_env.state_cache.get(sim_env.vehicle.id)
         logging.debug("Running...")
         
-        clock = pygame.time.Clock()
+        display.fill((0, 0, 0))
+        pygame.display.flip()
+
+        clock = FramePacer(args.fps)
+        logging.info("Pacing at {}".format(
+            "{} Hz".format(args.fps) if args.fps else "world.tick()"))
+        if args.rpc_workers:
+            rpc = AsyncCarlaClient(args.rpc_workers)
+            logging.info("Calling the simulator from {} worker threads".format(args.rpc_workers))
+        frames = 0
         while True:
-            _ = carla_world.tick()
-
-            clock.tick_busy_loop(60)
+            with profiler.phase("tick"):
+                if rpc is None:
+                    _ = carla_world.tick()
+                    sim_env.state_cache.update(carla_world.get_snapshot())
+                else:
+                    # Completed after rendering the HUD of the last frame
+                    rpc.submit(carla_world.tick)
+
+            with profiler.phase("clock"):
+                clock.tick()
             
             # 更新 HUD 信息
-            location = sim_env.vehicle.get_transform()
-            velocity = sim_env.vehicle.get_velocity()
-            hud.tick(location, velocity, key_controller.control)
+            with profiler.phase("hud"):
+                if rpc is None:
+                    # Keep the last state while a restarted vehicle is not in the snapshot yet
+                    state = sim_env.state_cache.get(sim_env.vehicle.id) or state
+                frame_stats = None
+                if profiler.enabled:
+                    frame_stats = [clock.summary_line()] + profiler.summary_lines()
+                hud.tick(state.transform, state.velocity, key_controller.control, frame_stats)
             
             # 渲染 hud 信息
-            display.fill((0, 0, 0))
-            hud.render(display)
+            with profiler.phase("render"):
+                dirty_rects = hud.render(display)
             
-            if key_controller.parse_events(sim_env, clock):
-                return
+            if rpc is not None:
+                with profiler.phase("tick"):
+                    rpc.flush()
 
-            pygame.display.flip()
+            with profiler.phase("events"):
+                if key_controller.parse_events(sim_env, clock, rpc):
+                    return
+
+            if rpc is not None:
+                # Read the snapshot of this tick for the HUD of the next frame
+                with profiler.phase("rpc"):
+                    rpc.submit(carla_world.get_snapshot)
+                    sim_env.state_cache.update(rpc.flush()[-1])
+                    state = sim_env.state_cache.get(sim_env.vehicle.id) or state
+
+            with profiler.phase("flip"):
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+
+            profiler.end_frame()
+
+            frames += 1
+            if frames == args.frames:
+                return
 
     except KeyboardInterrupt:
         logging.debug("Stopped by user!")
         
     finally:
         pygame.quit()
+
+        if rpc is not None:
+            rpc.close()
+
+        if clock is not None:
+            logging.info(clock.summary_line())
+
+        if args.profile_csv and profiler.frames:
+            profiler.dump_csv(args.profile_csv)
+            logging.info("Frame timings written to {}".format(args.profile_csv))
         
         if sim_env is not None:
             sim_env.destroy()
@@ -326,7 +672,7 @@ def game_loop(args):
 
         sys.exit()
 
-if __name__ == '__main__':
+def make_argparser() -> argparse.ArgumentParser:
     argparser = argparse.ArgumentParser(description='CARLA ROS2 native')
     argparser.add_argument(
         '--host', 
@@ -349,7 +695,53 @@ if __name__ == '__main__':
         default='/root/ws/colcon_ws/src/carla_simulation/config/vehicle_config.json', 
         help='Configurations of ego vehicle and its sensors'
     )
-    
+
+    argparser.add_argument(
+        '--map',
+        default='Mine_01',
+        help='Map to drive on, only loaded if the simulator runs another map (default: Mine_01)'
+    )
+
+    argparser.add_argument(
+        '--fps',
+        default=60.0,
+        type=float,
+        help='Target frame rate of the control loop, 0 to run in lockstep with world.tick() '
+             '(default: 60)'
+    )
+
+    argparser.add_argument(
+        '--frames',
+        default=0,
+        type=int,
+        help='Stop after this many frames, 0 to run until the window is closed (default: 0)'
+    )
+
+    argparser.add_argument(
+        '--rpc-workers',
+        default=0,
+        type=int,
+        help='Threads calling the simulator concurrently, 0 for blocking calls in the loop '
+             '(default: 0). The HUD then shows the frame before the current tick'
+    )
+
+    argparser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Show p50/p95/p99 durations of every loop phase on the HUD'
+    )
+
+    argparser.add_argument(
+        '--profile-csv',
+        metavar='PATH',
+        default=None,
+        help='Write the durations of the last loop iterations to a CSV file on exit'
+    )
+
+    return argparser
+
+if __name__ == '__main__':
+    argparser = make_argparser()
     logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.DEBUG)
     args = argparser.parse_args()
     
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""
+Synthetic sensor streams shaped like the CARLA sensors of a vehicle config
+
+Frame sizes and rates follow the sensor attributes and the fixed simulator
+step, as CARLA would produce them in synchronous mode: the lidar emits
+points_per_second * delta points per tick, spread over its channels and
+vertical field of view. Every stream draws from its own generator derived
+from one seed and is stamped with the simulation time of its frames, so a
+run is replayable.
+"""
+
+import math
+from typing import Dict, List
+
+import numpy
+
+# Lidar point layout of the CARLA ROS bridge: x, y, z, intensity
+LIDAR_DTYPE = numpy.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'), ('intensity', '<f4')])
+
+# Fixed simulator step of manual_control
+DELTA_SECONDS = 0.05
+
+GRAVITY = 9.81
+
+
+def _attribute(sensor: Dict, key: str, default: float) -> float:
+    return float(sensor.get("attributes", {}).get(key, default))
+
+
+def stream_rate(sensor: Dict, delta_seconds: float = DELTA_SECONDS) -> float:
+    """Messages per second of a sensor, one per tick unless sensor_tick is longer"""
+    return 1.0 / max(_attribute(sensor, "sensor_tick", 0.0), delta_seconds)
+
+
+class _Stream(object):
+    """Frame counter and simulation time of a stream"""
+
+    def __init__(self, sensor: Dict, delta_seconds: float, rng: numpy.random.Generator):
+        self.rate = stream_rate(sensor, delta_seconds)
+        self.period_ns = int(round(1e9 / self.rate))
+        self.rng = rng
+        self.frame = 0
+
+    @property
+    def stamp_ns(self) -> int:
+        """Simulation time of the last frame in nanoseconds, counted like CARLA from 0"""
+        return self.frame * self.period_ns
+
+    def _advance(self):
+        self.frame += 1
+
+
+class LidarStream(_Stream):
+    """
+    Point clouds of a rotating lidar over a ground plane with walls
+
+    Every frame covers rotation_frequency / rate of a revolution, continuing
+    at the azimuth the previous frame ended.
+
+    :param sensor: the lidar config, with its attributes and spawn point
+    :param delta_seconds: fixed simulator step
+    :param rng: random generator of this stream
+    """
+
+    def __init__(self, sensor: Dict, delta_seconds: float, rng: numpy.random.Generator):
+        super().__init__(sensor, delta_seconds, rng)
+        self.channels = int(_attribute(sensor, "channels", 32))
+        self.range = _attribute(sensor, "range", 10.0)
+        self.attenuation = _attribute(sensor, "atmosphere_attenuation_rate", 0.004)
+        self.height = sensor.get("spawn_point", {}).get("z", 2.0)
+        self.points_per_frame = int(_attribute(sensor, "points_per_second", 56000) / self.rate)
+        self.revolutions_per_frame = min(
+            _attribute(sensor, "rotation_frequency", 10.0) / self.rate, 1.0)
+
+        self.elevations = numpy.radians(numpy.linspace(
+            _attribute(sensor, "upper_fov", 10.0),
+            _attribute(sensor, "lower_fov", -30.0),
+            self.channels))
+        # Distance of the walls around the vehicle, per degree of azimuth
+        self.walls = rng.uniform(0.2, 1.0, 360) * self.range
+        self.azimuth = 0.0
+
+    def next_frame(self) -> numpy.ndarray:
+        self._advance()
+        per_channel = max(self.points_per_frame // self.channels, 1)
+        sweep = 2 * math.pi * self.revolutions_per_frame
+        azimuths = self.azimuth + numpy.arange(per_channel) * (sweep / per_channel)
+        self.azimuth = (self.azimuth + sweep) % (2 * math.pi)
+
+        azimuth = numpy.tile(azimuths, self.channels)
+        elevation = numpy.repeat(self.elevations, per_channel)
+        sin_elevation = numpy.sin(elevation)
+
+        # Closest of the ground and the wall in the direction of every ray
+        wall = self.walls[(numpy.degrees(azimuth) % 360).astype(numpy.int64)]
+        distance = wall / numpy.cos(elevation)
+        to_ground = numpy.where(sin_elevation < 0,
+                                self.height / numpy.maximum(-sin_elevation, 1e-6),
+                                numpy.inf)
+        distance = numpy.minimum(distance, to_ground)
+        distance += self.rng.normal(0.0, 0.02, len(distance))
+        hit = distance < self.range
+
+        points = numpy.empty(int(hit.sum()), dtype=LIDAR_DTYPE)
+        distance, azimuth, elevation = distance[hit], azimuth[hit], elevation[hit]
+        horizontal = distance * numpy.cos(elevation)
+        points['x'] = horizontal * numpy.cos(azimuth)
+        points['y'] = horizontal * numpy.sin(azimuth)
+        points['z'] = distance * numpy.sin(elevation)
+        points['intensity'] = numpy.exp(-self.attenuation * distance)
+        return points
+
+
+class ImuStream(_Stream):
+    """Gravity and a slowly drifting bias plus the configured noise"""
+
+    def __init__(self, sensor: Dict, delta_seconds: float, rng: numpy.random.Generator):
+        super().__init__(sensor, delta_seconds, rng)
+        self.accel_stddev = numpy.array([_attribute(sensor, "noise_accel_stddev_" + axis, 0.01)
+                                         for axis in "xyz"])
+        self.gyro_stddev = numpy.array([_attribute(sensor, "noise_gyro_stddev_" + axis, 0.001)
+                                        for axis in "xyz"])
+        self.gyro_bias = numpy.array([_attribute(sensor, "noise_gyro_bias_" + axis, 0.0)
+                                      for axis in "xyz"])
+
+    def next_frame(self) -> Dict[str, numpy.ndarray]:
+        self._advance()
+        self.gyro_bias += self.rng.normal(0.0, 1e-5, 3)
+        accel_noise = self.rng.normal(0.0, 1.0, 3) * self.accel_stddev
+        gyro_noise = self.rng.normal(0.0, 1.0, 3) * self.gyro_stddev
+        return {
+            "linear_acceleration": numpy.array([0.0, 0.0, GRAVITY]) + accel_noise,
+            "angular_velocity": self.gyro_bias + gyro_noise
+        }
+
+
+class GnssStream(_Stream):
+    """A random walk around a geographic origin"""
+
+    def __init__(self, sensor: Dict, delta_seconds: float, rng: numpy.random.Generator,
+                 origin=(0.0, 0.0, 0.0)):
+        super().__init__(sensor, delta_seconds, rng)
+        self.position = numpy.array(origin, dtype=numpy.float64)
+        self.stddev = numpy.array([_attribute(sensor, "noise_lat_stddev", 0.0),
+                                   _attribute(sensor, "noise_lon_stddev", 0.0),
+                                   _attribute(sensor, "noise_alt_stddev", 0.0)])
+
+    def next_frame(self) -> numpy.ndarray:
+        """Latitude, longitude (degrees) and altitude (m)"""
+        self._advance()
+        self.position[:2] += self.rng.normal(0.0, 1e-7, 2)
+        return self.position + self.rng.normal(0.0, 1.0, 3) * self.stddev
+
+
+STREAMS = {
+    "sensor.lidar.ray_cast": LidarStream,
+    "sensor.other.imu": ImuStream,
+    "sensor.other.gnss": GnssStream
+}
+
+
+def create_streams(vehicle_config: Dict,
+                   seed: int = 0,
+                   delta_seconds: float = DELTA_SECONDS) -> List:
+    """
+    One stream per supported sensor of a vehicle config
+
+    Returns (sensor id, stream) pairs in config order. The streams draw from
+    independent generators spawned from the seed.
+    """
+    sensors = [sensor for sensor in vehicle_config.get("sensors", [])
+               if sensor.get("type") in STREAMS]
+    generators = numpy.random.SeedSequence(seed).spawn(len(sensors))
+    return [
+        (sensor.get("id"),
+         STREAMS[sensor.get("type")](sensor, delta_seconds, numpy.random.default_rng(generator)))
+        for sensor, generator in zip(sensors, generators)
+    ]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import Counter
+from typing import Dict
+
+import rclpy
+import rclpy.node
+import rclpy.qos
+import rclpy.utilities
+
+import sensor_msgs.msg
+
+from carla_simulation import topic_config
+from carla_simulation.sensor_generator import (
+    create_streams, DELTA_SECONDS, GnssStream, ImuStream, LidarStream)
+
+# Subscribed topic of the vehicle info publisher fed by every stream type
+STREAM_TOPICS = {
+    LidarStream: "lidar_sub_topic",
+    ImuStream: "imu_sub_topic",
+    GnssStream: "gnss_sub_topic"
+}
+
+LIDAR_FIELDS = [
+    sensor_msgs.msg.PointField(name=name, offset=4 * index,
+                               datatype=sensor_msgs.msg.PointField.FLOAT32, count=1)
+    for index, name in enumerate(('x', 'y', 'z', 'intensity'))
+]
+
+
+class SensorGenerator(rclpy.node.Node):
+    """
+    Publish synthetic sensor streams in place of CARLA
+
+    Publishes on the subscribed topics of a vehicle info publisher config,
+    at the rates of the vehicle config multiplied by rate_scale. The first
+    sensor of every supported type is published. Header stamps are the
+    simulation time of the stream frames, not the wall clock.
+    """
+
+    def __init__(self,
+                 vehicle_config: Dict,
+                 publisher_config: Dict,
+                 seed: int = 0,
+                 rate_scale: float = 1.0,
+                 delta_seconds: float = DELTA_SECONDS):
+        super().__init__('sensor_generator')
+        vehicle_id = vehicle_config.get("id", "ego")
+        publisher_config = topic_config.vehicle_config(publisher_config, vehicle_id)
+
+        self.sent = Counter()
+        self.sent_bytes = Counter()
+        self.start_time = time.monotonic()
+        self.streams = []
+        seen = set()
+        for sensor_id, stream in create_streams(vehicle_config, seed, delta_seconds):
+            if type(stream) in seen:
+                continue
+            seen.add(type(stream))
+
+            topic = publisher_config.get(STREAM_TOPICS[type(stream)])
+            msg_type, fill = {
+                LidarStream: (sensor_msgs.msg.PointCloud2, self.lidar_message),
+                ImuStream: (sensor_msgs.msg.Imu, self.imu_message),
+                GnssStream: (sensor_msgs.msg.NavSatFix, self.gnss_message)
+            }[type(stream)]
+            publisher = self.create_publisher(
+                msg_type, topic, qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value)
+            frame_id = "{}/{}".format(vehicle_id, sensor_id)
+
+            def publish(stream=stream, publisher=publisher, fill=fill, frame_id=frame_id,
+                        topic=topic):
+                msg = fill(stream.next_frame())
+                # Simulation time of the frame, so that seeded runs are reproducible
+                msg.header.stamp.sec, msg.header.stamp.nanosec = divmod(stream.stamp_ns, 10 ** 9)
+                msg.header.frame_id = frame_id
+                publisher.publish(msg)
+                self.sent[topic] += 1
+                if isinstance(msg, sensor_msgs.msg.PointCloud2):
+                    self.sent_bytes[topic] += len(msg.data)
+
+            self.streams.append(stream)
+            self.create_timer(1.0 / (stream.rate * rate_scale), publish)
+            logging.info("Generating {} at {:.1f} Hz on {}".format(
+                sensor_id, stream.rate * rate_scale, topic))
+
+    def lidar_message(self, points) -> sensor_msgs.msg.PointCloud2:
+        msg = sensor_msgs.msg.PointCloud2()
+        msg.height = 1
+        msg.width = len(points)
+        msg.fields = LIDAR_FIELDS
+        msg.is_bigendian = False
+        msg.point_step = points.dtype.itemsize
+        msg.row_step = msg.point_step * len(points)
+        msg.data = points.tobytes()
+        msg.is_dense = True
+        return msg
+
+    def imu_message(self, frame) -> sensor_msgs.msg.Imu:
+        msg = sensor_msgs.msg.Imu()
+        msg.orientation.w = 1.0
+        msg.linear_acceleration.x, msg.linear_acceleration.y, msg.linear_acceleration.z = \
+            frame["linear_acceleration"].tolist()
+        msg.angular_velocity.x, msg.angular_velocity.y, msg.angular_velocity.z = \
+            frame["angular_velocity"].tolist()
+        return msg
+
+    def gnss_message(self, frame) -> sensor_msgs.msg.NavSatFix:
+        msg = sensor_msgs.msg.NavSatFix()
+        msg.latitude, msg.longitude, msg.altitude = frame.tolist()
+        return msg
+
+    def get_stats(self) -> Dict:
+        """Messages/s and MB/s (point clouds only) per topic since start"""
+        elapsed = time.monotonic() - self.start_time
+        return {
+            topic: {
+                "rate": count / elapsed,
+                "mb_per_second": self.sent_bytes[topic] / elapsed / 1e6
+            }
+            for topic, count in self.sent.items()
+        }
+
+
+def main(argv=None):
+    """
+    Publish the synthetic sensor streams until interrupted
+
+    :param argv: command line including the program name, sys.argv if None.
+        ROS arguments after --ros-args are passed on to rclpy
+    """
+    argparser = argparse.ArgumentParser(description='Synthetic CARLA sensor streams')
+    argparser.add_argument(
+        '-f',
+        '--file',
+        default='/root/ws/colcon_ws/src/carla_simulation/config/vehicle_config.json',
+        help='Configurations of ego vehicle and its sensors'
+    )
+    argparser.add_argument(
+        '-p',
+        '--publisher-file',
+        default='/root/ws/colcon_ws/src/carla_simulation/config/publisher_config.json',
+        help='Configurations of the vehicle info publisher, for the topic names'
+    )
+    argparser.add_argument(
+        '--seed',
+        default=0,
+        type=int,
+        help='Seed of the generated data (default: 0)'
+    )
+    argparser.add_argument(
+        '--rate-scale',
+        default=1.0,
+        type=float,
+        help='Factor applied to the configured sensor rates (default: 1)'
+    )
+    argparser.add_argument(
+        '--duration',
+        default=0.0,
+        type=float,
+        help='Seconds to run, 0 to run until interrupted (default: 0)'
+    )
+
+    logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+    argv = sys.argv if argv is None else argv
+    args = argparser.parse_args(rclpy.utilities.remove_ros_args(argv)[1:])
+
+    with open(args.file) as f:
+        vehicle_config = json.load(f)
+    with open(args.publisher_file) as f:
+        publisher_config = json.load(f)
+
+    rclpy.init(args=argv)
+    node = SensorGenerator(vehicle_config, publisher_config, args.seed, args.rate_scale)
+    try:
+        deadline = time.monotonic() + args.duration
+        while rclpy.ok() and (not args.duration or time.monotonic() < deadline):
+            rclpy.spin_once(node, timeout_sec=0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for topic, stats in sorted(node.get_stats().items()):
+            logging.info("{}: {:.1f} msgs/s, {:.2f} MB/s".format(
+                topic, stats["rate"], stats["mb_per_second"]))
+        node.destroy_node()
+        rclpy.try_shutdown()
+
+
+if __name__ == '__main__':
+    main()
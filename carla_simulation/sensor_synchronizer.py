@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""
+Approximate-time synchronization of sensor messages
+
+Pairs the messages of several topics whose keys (header stamps by default)
+lie within a configurable slop, so that data from different simulator frames
+is never combined.
+"""
+
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable
+
+
+def header_stamp_key(msg) -> float:
+    """Header stamp of a ROS message in seconds"""
+    return msg.header.stamp.sec + msg.header.stamp.nanosec * 1e-9
+
+
+class ApproximateTimeSynchronizer(object):
+    """
+    Emit one bundle of messages per reference message
+
+    Every topic keeps a bounded ring buffer of its most recent messages.
+    When the oldest buffered reference message (e.g. a lidar sweep) has a
+    partner within ``slop`` on every other topic, ``callback`` is called
+    with a dict topic -> message and all buffered messages up to the bundle
+    are released. Messages of each topic are expected in increasing key
+    order, as published by CARLA.
+
+    :param topics: names of the synchronized topics
+    :param callback: called with a dict topic -> message per bundle
+    :param reference: topic driving the bundles, defaults to the first topic
+    :param slop: maximum key difference of a bundle member to the reference
+    :param queue_size: ring buffer length per topic
+    :param key: function mapping a message to its key, e.g. header stamp
+        seconds or an integer CARLA frame number (with slop 0)
+    """
+
+    def __init__(self,
+                 topics: Iterable[str],
+                 callback: Callable[[Dict], None],
+                 reference: str = None,
+                 slop: float = 0.01,
+                 queue_size: int = 8,
+                 key: Callable = header_stamp_key):
+        topics = list(topics)
+        if queue_size < 1:
+            raise ValueError("queue_size must be positive, got {}".format(queue_size))
+        if reference is None:
+            reference = topics[0]
+        if reference not in topics:
+            raise ValueError("Reference topic {} is not synchronized".format(reference))
+
+        self.callback = callback
+        self.reference = reference
+        self.slop = slop
+        self.key = key
+        self.queues = {topic: deque(maxlen=queue_size) for topic in topics}
+        self.others = [topic for topic in topics if topic != reference]
+
+        self.bundles = 0
+        self.dropped = Counter()
+
+    def add(self, topic: str, msg):
+        queue = self.queues[topic]
+        if len(queue) == queue.maxlen:
+            self.dropped[topic] += 1
+        queue.append((self.key(msg), msg))
+        self._emit_bundles()
+
+    def _emit_bundles(self):
+        reference_queue = self.queues[self.reference]
+        while reference_queue:
+            reference_key, reference_msg = reference_queue[0]
+            bundle = {self.reference: reference_msg}
+            matches = {}
+
+            for topic in self.others:
+                match = self._find_match(topic, reference_key)
+                if match is None:
+                    # Wait for more messages of this topic
+                    return
+                if match < 0:
+                    # No partner can arrive anymore, give up on this reference
+                    break
+                matches[topic] = match
+            else:
+                reference_queue.popleft()
+                for topic, index in matches.items():
+                    queue = self.queues[topic]
+                    for _ in range(index):
+                        queue.popleft()
+                        self.dropped[topic] += 1
+                    bundle[topic] = queue.popleft()[1]
+                self.bundles += 1
+                self.callback(bundle)
+                continue
+
+            reference_queue.popleft()
+            self.dropped[self.reference] += 1
+
+    def _find_match(self, topic: str, reference_key: float):
+        """
+        Index of the buffered message closest to reference_key within the
+        slop, -1 if no message can match anymore, None if a match may still
+        arrive
+        """
+        queue = self.queues[topic]
+        while queue and queue[0][0] < reference_key - self.slop:
+            queue.popleft()
+            self.dropped[topic] += 1
+
+        best = None
+        for index, (key, _) in enumerate(queue):
+            if key > reference_key + self.slop:
+                return -1 if best is None else best
+            if best is None or abs(key - reference_key) < abs(queue[best][0] - reference_key):
+                best = index
+            else:
+                return best
+
+        # None: a partner may still arrive
+        return best
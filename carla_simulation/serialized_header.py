@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+"""
+Access to the std_msgs/Header of serialized (CDR) ROS messages
+
+Every message starting with a header, such as sensor_msgs/PointCloud2, is
+laid out as a 4 byte encapsulation header, the stamp (int32 sec, uint32
+nanosec) and the frame id (uint32 length including the terminating null,
+characters, padding to 4 bytes). Reading the stamp and rewriting the frame
+id on the buffer lets large messages be relayed without deserializing them.
+"""
+
+import struct
+from typing import Tuple
+
+# Offsets into the serialized message
+_ENDIANNESS = 1
+_STAMP = 4
+_FRAME_ID = 12
+
+# CDR alignment is relative to the data after the encapsulation header
+_ALIGNMENT = 4
+
+
+def _byte_order(buffer) -> str:
+    return '<' if buffer[_ENDIANNESS] == 1 else '>'
+
+
+def _frame_id_end(buffer, byte_order: str) -> Tuple[int, int]:
+    """End of the frame id characters and end of its padding"""
+    length, = struct.unpack_from(byte_order + 'I', buffer, _FRAME_ID)
+    end = _FRAME_ID + 4 + length
+    padded = _STAMP + -(-(end - _STAMP) // _ALIGNMENT) * _ALIGNMENT
+    return end, padded
+
+
+def read_stamp(buffer) -> Tuple[int, int]:
+    """Header stamp (sec, nanosec) of a serialized message"""
+    return struct.unpack_from(_byte_order(buffer) + 'iI', buffer, _STAMP)
+
+
+def read_frame_id(buffer) -> str:
+    byte_order = _byte_order(buffer)
+    end, _ = _frame_id_end(buffer, byte_order)
+    return bytes(buffer[_FRAME_ID + 4:end - 1]).decode()
+
+
+def rewrite_frame_id(buffer: bytearray, frame_id: str) -> bytearray:
+    """
+    Replace the header frame id of a serialized message
+
+    A bytearray is modified in place and returned if the padded length of
+    the frame id does not change (e.g. "lidar" -> "odom"). Otherwise, and for
+    immutable bytes as delivered by raw subscriptions, the message is copied
+    once into a new buffer. A different padded length shifts the rest of the
+    message by a multiple of 4 bytes. That keeps messages like PointCloud2,
+    whose fields align to at most 4 bytes, valid, but not messages holding
+    float64 such as Imu.
+
+    :param buffer: serialized message
+    :type buffer: bytes or bytearray
+    :param frame_id: new frame id
+    :type frame_id: str
+    :return: the buffer with the new frame id
+    :rtype: bytes or bytearray
+    """
+    byte_order = _byte_order(buffer)
+    old_end, old_padded = _frame_id_end(buffer, byte_order)
+
+    encoded = frame_id.encode() + b'\0'
+    if buffer[_FRAME_ID + 4:old_end] == encoded:
+        return buffer
+
+    end = _FRAME_ID + 4 + len(encoded)
+    new_padded = _STAMP + -(-(end - _STAMP) // _ALIGNMENT) * _ALIGNMENT
+    field = struct.pack(byte_order + 'I', len(encoded)) + encoded + bytes(new_padded - end)
+
+    if new_padded == old_padded and isinstance(buffer, bytearray):
+        buffer[_FRAME_ID:new_padded] = field
+        return buffer
+    view = memoryview(buffer)
+    return type(buffer)().join((view[:_FRAME_ID], field, view[old_padded:]))
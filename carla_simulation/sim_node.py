@@ -1,5 +1,140 @@
-def main():
-    pass
+#!/usr/bin/env python
+
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+
+import carla
+import diagnostic_msgs.msg
+import rclpy
+import rclpy.utilities
+
+from carla_simulation import manual_control, topic_config, vehicle_info_publisher
+from carla_simulation.frame_profiler import FrameProfiler
+
+
+def frame_diagnostics(profiler: FrameProfiler) -> diagnostic_msgs.msg.DiagnosticArray:
+    """Percentiles of the manual control loop phases as a diagnostics message"""
+    status = diagnostic_msgs.msg.DiagnosticStatus(
+        level=diagnostic_msgs.msg.DiagnosticStatus.OK,
+        name="manual_control: frame timing",
+        message="{} frames".format(profiler.frames)
+    )
+    for name, values in profiler.percentiles().items():
+        for q, value in zip((50, 95, 99), values):
+            status.values.append(diagnostic_msgs.msg.KeyValue(
+                key="{} p{} [ms]".format(name, q),
+                value="{:.3f}".format(value * 1e3)
+            ))
+    return diagnostic_msgs.msg.DiagnosticArray(status=[status])
+
+
+def main(argv=None):
+    """
+    Run manual control and the vehicle info publisher in one process
+
+    Both share one carla.Client connection and one world handle. The pygame
+    loop runs on the main thread, the ROS executor on a background thread.
+    In fleet mode every vehicle gets its own publisher, namespaced by the
+    vehicle id, and all of them are served by the same executor. The
+    publishers read the vehicle state from the snapshot the control loop
+    stores after every tick.
+
+    :param argv: command line including the program name, sys.argv if None.
+        ROS arguments after --ros-args are passed on to rclpy
+    """
+    start_time = time.perf_counter()
+
+    argparser = manual_control.make_argparser()
+    argparser.add_argument(
+        '-p',
+        '--publisher-file',
+        default='/root/ws/colcon_ws/src/carla_simulation/config/publisher_config.json',
+        help='Configurations of the vehicle info publisher'
+    )
+
+    logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+    argv = sys.argv if argv is None else argv
+    args = argparser.parse_args(rclpy.utilities.remove_ros_args(argv)[1:])
+
+    with open(args.publisher_file) as f:
+        publisher_config = json.load(f)
+    if not vehicle_info_publisher.check_config(publisher_config):
+        sys.exit(1)
+
+    carla_client = carla.Client(args.host, args.port)
+    carla_client.set_timeout(2000.0)
+
+    rclpy.init(args=argv)
+    executor = vehicle_info_publisher.create_executor(publisher_config)
+    profiler = FrameProfiler(manual_control.LOOP_PHASES,
+                             enabled=args.profile or bool(args.profile_csv))
+    publishers = []
+    state = {}
+
+    def on_restart(sim_env):
+        for publisher, vehicle in zip(publishers, sim_env.vehicles):
+            publisher.vehicle = vehicle
+
+    def on_start(sim_env):
+        for vehicle, vehicle_config in zip(sim_env.vehicles, sim_env.vehicle_configs):
+            vehicle_id = vehicle_config.get("id")
+            publishers.append(vehicle_info_publisher.VehicleInfoPublisher(
+                vehicle,
+                topic_config.vehicle_config(publisher_config, vehicle_id, sim_env.fleet),
+                namespace=vehicle_id if sim_env.fleet else '',
+                state_cache=sim_env.state_cache
+            ))
+        # The diagnostics are published by the first vehicle's node
+        diagnostics_node = publishers[0]
+        sim_env.restart_callbacks.append(on_restart)
+
+        # Tick times of the frames, for the latency traces of the publishers
+        state["world"] = sim_env.world
+        state["tick_callbacks"] = [
+            sim_env.world.on_tick(lambda snapshot, tracer=traced.tracer: tracer.tick(
+                snapshot.frame, snapshot.timestamp.elapsed_seconds))
+            for traced in publishers if traced.tracer is not None
+        ]
+
+        if profiler.enabled:
+            diagnostics_pub = diagnostics_node.create_publisher(
+                diagnostic_msgs.msg.DiagnosticArray, "/diagnostics", 10)
+
+            def publish_diagnostics():
+                msg = frame_diagnostics(profiler)
+                msg.header.stamp = diagnostics_node.get_clock().now().to_msg()
+                diagnostics_pub.publish(msg)
+
+            diagnostics_node.create_timer(1.0, publish_diagnostics)
+
+        for publisher in publishers:
+            executor.add_node(publisher)
+        state["spinner"] = threading.Thread(target=executor.spin, daemon=True)
+        state["spinner"].start()
+
+        logging.info("Started {} publishers in {:.2f} s, max RSS {} kB".format(
+            len(publishers),
+            time.perf_counter() - start_time,
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+    try:
+        manual_control.game_loop(args, carla_client=carla_client, on_start=on_start,
+                                 profiler=profiler)
+    finally:
+        for callback_id in state.get("tick_callbacks", []):
+            state["world"].remove_on_tick(callback_id)
+        executor.shutdown()
+        for publisher in publishers:
+            publisher.cleanup()
+            publisher.destroy_node()
+        if "spinner" in state:
+            state["spinner"].join(timeout=1.0)
+        rclpy.try_shutdown()
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+"""
+Per-tick vehicle state read from one world snapshot
+
+Reading the transform, velocity and angular velocity of a vehicle with
+separate calls costs one lookup each, and the values may belong to
+different frames if the world ticks in between. The cache holds the
+snapshot of the last tick instead: all readers, the HUD and the vehicle
+info publishers, get the state of the same frame and every actor is only
+looked up once per frame.
+"""
+
+from collections import namedtuple
+from typing import Optional
+
+import carla
+
+# State of one actor in one frame
+VehicleState = namedtuple(
+    'VehicleState', ['frame', 'elapsed_seconds', 'transform', 'velocity', 'angular_velocity'])
+
+
+class VehicleStateCache(object):
+    """
+    State of the actors in the last world snapshot
+
+    update() is called once per tick, e.g. with world.get_snapshot() after
+    world.tick() or from World.on_tick(). get() extracts the state of an
+    actor on first use and keeps it until the next update. The snapshot and
+    its states are swapped as one reference, so readers on other threads
+    never mix two frames without taking a lock.
+    """
+
+    def __init__(self):
+        self.current = (None, {})
+        self.updates = 0
+        self.lookups = 0
+
+    @property
+    def frame(self) -> Optional[int]:
+        snapshot, _ = self.current
+        return snapshot.frame if snapshot is not None else None
+
+    def update(self, snapshot: carla.WorldSnapshot):
+        self.current = (snapshot, {})
+        self.updates += 1
+
+    def get(self, actor_id: int) -> Optional[VehicleState]:
+        """State of an actor in the last snapshot, None if it is not part of it"""
+        snapshot, states = self.current
+        state = states.get(actor_id)
+        if state is None and snapshot is not None:
+            actor = snapshot.find(actor_id)
+            if actor is None:
+                return None
+            state = VehicleState(
+                snapshot.frame,
+                snapshot.timestamp.elapsed_seconds,
+                actor.get_transform(),
+                actor.get_velocity(),
+                actor.get_angular_velocity()
+            )
+            states[actor_id] = state
+            self.lookups += 1
+        return state
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+
+"""
+Per-vehicle publisher configuration
+
+Kept free of the CARLA and ROS imports of the publisher, so that tools that
+only need the topic names, like the synthetic sensor generator, run without
+a simulator installation.
+"""
+
+import os
+from typing import Dict
+
+
+def vehicle_config(config: Dict, vehicle_id: str, namespaced: bool = False) -> Dict:
+    """
+    Publisher configuration of one vehicle
+
+    "{vehicle}" in topic names is replaced by the id of the vehicle. With
+    namespaced, published topics are made relative, so that they resolve
+    inside the namespace of the vehicle's publisher node, and the trace
+    file and bag of every vehicle are suffixed with its id.
+    """
+    config = dict(config)
+    for key, value in config.items():
+        if key.endswith("_topic"):
+            value = value.format(vehicle=vehicle_id)
+            if namespaced and key.endswith("_pub_topic"):
+                value = value.lstrip("/")
+            config[key] = value
+
+    if namespaced:
+        trace_file = (config.get("tracing") or {}).get("trace_file")
+        if trace_file:
+            root, extension = os.path.splitext(trace_file)
+            config["tracing"] = dict(config["tracing"],
+                                     trace_file="{}_{}{}".format(root, vehicle_id, extension))
+        uri = (config.get("record") or {}).get("uri")
+        if uri:
+            config["record"] = dict(config["record"],
+                                    uri="{}_{}".format(uri.rstrip("/"), vehicle_id))
+    return config
@@ -1,25 +1,61 @@
 #!/usr/bin/env python
 
 import logging
+import math
+import threading
+import time
+from collections import Counter
+from functools import partial
 from typing import Dict
 
 import rclpy
+import rclpy.callback_groups
+import rclpy.executors
+import rclpy.node
 import rclpy.qos
+import rclpy.serialization
 
 import carla
 import carla_data_to_ros
+from bag_recorder import BagRecorder, message_type_name, Rosbag2Writer, STORAGE_IDS
+from latency_tracer import INTERVALS, LatencyTracer
+import lidar_pipeline
+import serialized_header
+from sensor_synchronizer import ApproximateTimeSynchronizer
+from state_cache import VehicleStateCache
 
+import diagnostic_msgs.msg
 import std_msgs.msg
 import nav_msgs.msg
 import sensor_driver_msgs.msg
 import geometry_msgs.msg
 import sensor_msgs.msg
 
+# Publish on a wall-clock timer, whenever a new lidar frame arrives, or
+# whenever lidar, imu and gnss of the same frame have arrived
+PUBLISH_MODES = ("timer", "lidar", "synchronized")
+
+# Spin all callbacks on one thread, or sensor ingest and publishing on
+# separate callback groups of a thread pool
+EXECUTOR_MODES = ("single_threaded", "multi_threaded")
+
+# Published messages that are refilled in place, and so are recorded serialized
+IN_PLACE_TOPICS = ("gps", "odom", "velocity", "position")
+
+# Carla inputs every published topic is derived from
+TOPIC_INPUTS = {
+    "lidar":    ("lidar",),
+    "gps":      ("gnss", "lidar"),
+    "odom":     ("gnss", "lidar"),
+    "velocity": ("imu", "lidar"),
+    "imu":      ("imu",),
+    "position": ("lidar",)
+}
+
 def check_config(config: Dict)->bool:
     """Check whether the given configuration file is valid"""
 
     required_topics = [
-        "loop_rate",
         "gnss_sub_topic",
         "imu_sub_topic",
         "lidar_sub_topic",
@@ -31,7 +67,42 @@ def check_config(config: Dict)->bool:
         "position_pub_topic"
     ]   
 
+    publish_mode = config.get("publish_mode", "timer")
+    if publish_mode == "timer":
+        required_topics.append("loop_rate")
+
     flag = True
+    if publish_mode not in PUBLISH_MODES:
+        logging.error("Unknown publish mode {}".format(publish_mode))
+        flag = False
+
+    if config.get("lidar_passthrough") and publish_mode == "synchronized":
+        logging.error("Lidar passthrough is not supported in synchronized publish mode")
+        flag = False
+
+    if config.get("lidar_passthrough") and config.get("lidar_pipeline"):
+        logging.error("Lidar passthrough forwards clouds unprocessed, remove lidar_pipeline")
+        flag = False
+
+    record_config = config.get("record")
+    if record_config is not None:
+        if not record_config.get("uri"):
+            logging.error("Missing configuration of record uri")
+            flag = False
+        if record_config.get("storage_id", "mcap") not in STORAGE_IDS:
+            logging.error("Unknown storage {}".format(record_config.get("storage_id")))
+            flag = False
+
+    for stage in config.get("lidar_pipeline", []):
+        if stage.get("stage") not in lidar_pipeline.STAGES:
+            logging.error("Unknown lidar pipeline stage {}".format(stage.get("stage")))
+            flag = False
+
+    executor_mode = config.get("executor", "single_threaded")
+    if executor_mode not in EXECUTOR_MODES:
+        logging.error("Unknown executor {}".format(executor_mode))
+        flag = False
+
     for topic in required_topics:
         if not config.get(topic):
             logging.error("Missing configuration of {}".format(topic))
@@ -39,55 +110,146 @@ def check_config(config: Dict)->bool:
             
     return flag
 
-class VehicleInfoPublisher(rclpy.Node):
-    # Data received from carla
-    header           = std_msgs.msg.Header()
-    carla_lidar_data = sensor_msgs.msg.PointCloud2()
-    carla_gnss_data  = sensor_msgs.msg.NavSatFix()
-    carla_imu_data   = sensor_msgs.msg.Imu()
-
-    # Data to be published
-    lidar_data    = sensor_msgs.msg.PointCloud2()
-    imu_data      = sensor_msgs.msg.Imu()
-    position_data = geometry_msgs.msg.Vector3Stamped()
-    gps_data      = sensor_driver_msgs.msg.GpswithHeading()
-    odom_data     = sensor_driver_msgs.msg.OdometrywithGps()
-    velocity_data = sensor_driver_msgs.msg.InsVelocity() 
-
-    # Pseudo sensor data
-    pseudo_odom     = nav_msgs.msg.Odometry()
-    pseudo_position = geometry_msgs.msg.Vector3()
-    pseudo_velocity = geometry_msgs.msg.Twist()
-    pseudo_heading  = None
-    
+def create_executor(config: Dict) -> rclpy.executors.Executor:
+    """Create the executor matching the configured executor mode"""
+    if config.get("executor", "single_threaded") == "multi_threaded":
+        return rclpy.executors.MultiThreadedExecutor(
+            num_threads=config.get("executor_threads")
+        )
+    return rclpy.executors.SingleThreadedExecutor()
+
+class VehicleInfoPublisher(rclpy.node.Node):
     def __init__(self, 
                  vehicle: carla.Vehicle, 
-                 config: Dict):
-        super().__init__('vehicle_info_publisher')
+                 config: Dict,
+                 namespace: str = '',
+                 state_cache: VehicleStateCache = None):
+        super().__init__('vehicle_info_publisher', namespace=namespace)
         
         self.vehicle = vehicle
         self.config = config
 
+        #* Vehicle state of the last tick, shared with the control loop.
+        #* Without it the state is read from the vehicle on every publish
+        self.state_cache = state_cache
+        # Vehicle id and frame of the last converted state
+        self.vehicle_state_frame = None
+
+        #* Messages are owned by this instance and refilled on every tick,
+        #* so the steady-state publish path allocates no new messages
+        # Data received from carla
+        self.header           = std_msgs.msg.Header()
+        self.carla_lidar_data = sensor_msgs.msg.PointCloud2()
+        self.carla_gnss_data  = sensor_msgs.msg.NavSatFix()
+        self.carla_imu_data   = sensor_msgs.msg.Imu()
+
+        # Data to be published
+        self.lidar_data    = sensor_msgs.msg.PointCloud2()
+        self.imu_data      = sensor_msgs.msg.Imu()
+        self.position_data = geometry_msgs.msg.Vector3Stamped()
+        self.gps_data      = sensor_driver_msgs.msg.GpswithHeading()
+        self.odom_data     = sensor_driver_msgs.msg.OdometrywithGps()
+        self.velocity_data = sensor_driver_msgs.msg.InsVelocity()
+
+        # Pseudo sensor data
+        self.pseudo_odom     = nav_msgs.msg.Odometry()
+        self.pseudo_position = geometry_msgs.msg.Vector3()
+        self.pseudo_velocity = geometry_msgs.msg.Twist()
+        self.pseudo_heading  = None
+
+        #* Input bookkeeping: topics are only republished when one of their
+        #* inputs changed (in lidar publish mode)
+        self.publish_mode = config.get("publish_mode", "timer")
+        self.skip_unchanged = self.publish_mode != "timer"
+        self.input_versions = Counter()
+        self.input_stamps = {}
+        self.published_versions = {}
+        self.publish_counts = Counter()
+        self.skipped_publishes = Counter()
+        self.duplicate_inputs = Counter()
+
+        #* With a multi-threaded executor every sensor subscription and the
+        #* publish timer get their own callback group, so a slow lidar
+        #* callback does not hold back imu ingest or publishing. Sensor
+        #* callbacks only swap message references under input_lock, the
+        #* publish path takes a consistent view under the same lock and
+        #* serializes outside of it
+        self.input_lock = threading.Lock()
+        sensor_groups = {}
+        self.publish_callback_group = None
+        if config.get("executor", "single_threaded") == "multi_threaded":
+            MutuallyExclusiveCallbackGroup = rclpy.callback_groups.MutuallyExclusiveCallbackGroup
+            sensor_groups = {
+                "gnss": MutuallyExclusiveCallbackGroup(),
+                "imu": MutuallyExclusiveCallbackGroup(),
+                "lidar": MutuallyExclusiveCallbackGroup()
+            }
+            self.publish_callback_group = MutuallyExclusiveCallbackGroup()
+
+        #* Opt-in cache of rotation matrices, e.g. for rigidly mounted sensors.
+        #* The cache is global, so the publishers of a fleet share the first one
+        cache_config = config.get("rotation_matrix_cache")
+        if cache_config and carla_data_to_ros.get_rotation_matrix_cache() is None:
+            carla_data_to_ros.enable_rotation_matrix_cache(
+                maxsize=cache_config.get("maxsize", 128),
+                quantization=cache_config.get("quantization", 1e-3)
+            )
+
+        #* In lidar passthrough mode the point cloud is relayed serialized,
+        #* only its header is read and rewritten
+        self.lidar_passthrough = config.get("lidar_passthrough", False)
+
+        #* Optional preprocessing of the lidar cloud, published as a new
+        #* cloud instead of the received one
+        self.lidar_pipeline = None
+        self.processed_lidar_data = sensor_msgs.msg.PointCloud2()
+        self.processed_lidar_version = 0
+        if config.get("lidar_pipeline"):
+            self.lidar_pipeline = lidar_pipeline.LidarPipeline(config.get("lidar_pipeline"))
+
+        #* In synchronized publish mode, sensor messages are bundled per
+        #* simulator frame before they are taken over
+        gnss_callback = self.update_carla_gnss_data
+        imu_callback = self.update_carla_imu_data
+        lidar_callback = self.update_carla_lidar_data
+        if self.lidar_passthrough:
+            lidar_callback = self.update_carla_lidar_raw
+        if self.publish_mode == "synchronized":
+            self.synchronizer = ApproximateTimeSynchronizer(
+                ["lidar", "imu", "gnss"],
+                self.update_carla_sensor_bundle,
+                slop=config.get("sync_slop", 0.01),
+                queue_size=config.get("sync_queue_size", 8)
+            )
+            self.sync_lock = threading.Lock()
+            gnss_callback = partial(self.add_synchronized, "gnss")
+            imu_callback = partial(self.add_synchronized, "imu")
+            lidar_callback = partial(self.add_synchronized, "lidar")
+
         #* Subscribe lidar / gnss / imu info
         self.gnss_sub = self.create_subscription(
             sensor_msgs.msg.NavSatFix,
             config.get("gnss_sub_topic"),
-            self.update_carla_gnss_data,
-            qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value
+            gnss_callback,
+            qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value,
+            callback_group=sensor_groups.get("gnss")
         )
         
         self.imu_sub = self.create_subscription(
             sensor_msgs.msg.Imu,
             config.get("imu_sub_topic"),
-            self.update_carla_imu_data,
-            qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value
+            imu_callback,
+            qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value,
+            callback_group=sensor_groups.get("imu")
         )
         
         self.lidar_sub = self.create_subscription(
             sensor_msgs.msg.PointCloud2,
             config.get("lidar_sub_topic"),
-            self.update_carla_lidar_data,
-            qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value
+            lidar_callback,
+            qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value,
+            callback_group=sensor_groups.get("lidar"),
+            raw=self.lidar_passthrough
         )
         
         #* Publish lidar / gps / odom / velocity / imu / ego_state info
@@ -127,83 +289,326 @@ class VehicleInfoPublisher(rclpy.Node):
             qos_profile=rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value
         )
         
-        #* Timer
-        self.timer = self.create_timer(
-            config.get("loop_rate"),
-            self.publish_vehicle_data
-        )
+        #* Optional recording of the published topics to a rosbag2
+        self.recorder = None
+        record_config = config.get("record")
+        if record_config:
+            self.recorder = BagRecorder(
+                Rosbag2Writer(
+                    record_config.get("uri"),
+                    storage_id=record_config.get("storage_id", "mcap"),
+                    compression=record_config.get("compression", "zstd"),
+                    max_bagfile_size=record_config.get("max_bagfile_size", 0)
+                ),
+                {
+                    publisher.topic_name: message_type_name(publisher.msg_type)
+                    for publisher in self.published_topics().values()
+                },
+                queue_size=record_config.get("queue_size", 256)
+            )
+
+        #* Optional latency tracing from the CARLA frame to the published
+        #* message, summarized on a diagnostics topic
+        self.tracer = None
+        self.input_traces = {}
+        tracing_config = config.get("tracing")
+        if tracing_config:
+            self.tracer = LatencyTracer(capacity=tracing_config.get("capacity", 2048))
+            if tracing_config.get("summary_topic"):
+                self.latency_pub = self.create_publisher(
+                    diagnostic_msgs.msg.DiagnosticArray,
+                    tracing_config.get("summary_topic"),
+                    10
+                )
+                self.latency_timer = self.create_timer(
+                    tracing_config.get("summary_period", 1.0),
+                    self.publish_latency_summary,
+                    callback_group=self.publish_callback_group
+                )
+
+        #* Timer, only in timer publish mode. In lidar publish mode the
+        #* lidar callback triggers publishing
+        if self.publish_mode == "timer":
+            self.timer = self.create_timer(
+                config.get("loop_rate"),
+                self.publish_vehicle_data,
+                callback_group=self.publish_callback_group
+            )
     
     def cleanup(self):
         if hasattr(self, 'timer'):
             self.timer.cancel()
+        if hasattr(self, 'latency_timer'):
+            self.latency_timer.cancel()
         
-        publishers = [
-            self.lidar_pub,
-            self.gps_pub,
-            self.odom_pub,
-            self.velocity_pub,
-            self.imu_pub,
-            self.position_pub
-        ]
-        
-        for pub in publishers:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+        trace_file = (self.config.get("tracing") or {}).get("trace_file")
+        if self.tracer is not None and trace_file:
+            self.tracer.dump_chrome_trace(trace_file)
+            logging.info("Latency trace written to {}".format(trace_file))
+
+        for pub in self.published_topics().values():
             pub.destroy()
+
+    def published_topics(self) -> Dict:
+        """Publisher of every published topic"""
+        return {
+            "lidar": self.lidar_pub,
+            "gps": self.gps_pub,
+            "odom": self.odom_pub,
+            "velocity": self.velocity_pub,
+            "imu": self.imu_pub,
+            "position": self.position_pub
+        }
     
     def publish_vehicle_data(self):
         self.update_vehicle_state_info()
-        self.get_lidar_data()
-        self.get_gps_data()
-        self.get_odom_data()
-        self.get_velocity_data()
-        self.get_imu_data()
-        self.get_position_data()
-
-        self.lidar_pub.publish(self.lidar_data)
-        self.gps_pub.publish(self.gps_data)
-        self.odom_pub.publish(self.odom_data)
-        self.velocity_pub.publish(self.velocity_data)
-        self.imu_pub.publish(self.imu_data)
-        self.position_pub.publish(self.position_data)
+        if self.lidar_pipeline is not None:
+            self.process_lidar_data()
+
+        with self.input_lock:
+            self.get_lidar_data()
+            self.get_gps_data()
+            self.get_odom_data()
+            self.get_velocity_data()
+            self.get_imu_data()
+            self.get_position_data()
+
+            outgoing = [
+                (topic, publisher, msg) for topic, publisher, msg in (
+                    ("lidar", self.lidar_pub, self.lidar_data),
+                    ("gps", self.gps_pub, self.gps_data),
+                    ("odom", self.odom_pub, self.odom_data),
+                    ("velocity", self.velocity_pub, self.velocity_data),
+                    ("imu", self.imu_pub, self.imu_data),
+                    ("position", self.position_pub, self.position_data)
+                ) if self.should_publish(topic)
+            ]
+            if self.tracer is not None:
+                transform_ns = time.perf_counter_ns()
+                # Traced from the first input every topic is derived from
+                traces = [self.input_traces.get(TOPIC_INPUTS[topic][0])
+                          for topic, _, _ in outgoing]
+
+        for _, publisher, msg in outgoing:
+            publisher.publish(msg)
         logging.debug("Data published")
+
+        if self.tracer is not None:
+            publish_ns = time.perf_counter_ns()
+            for (topic, _, _), trace in zip(outgoing, traces):
+                if trace is not None:
+                    frame, tick_ns, ingest_ns = trace
+                    self.tracer.record(topic, frame, tick_ns, ingest_ns, transform_ns, publish_ns)
+
+        if self.recorder is not None:
+            self.record(outgoing)
+
+    def record(self, outgoing):
+        """Hand published messages to the recorder"""
+        timestamp = self.get_clock().now().nanoseconds
+        for topic, publisher, msg in outgoing:
+            if topic in IN_PLACE_TOPICS:
+                msg = rclpy.serialization.serialize_message(msg)
+            self.recorder.record(publisher.topic_name, msg, timestamp)
+
+    def should_publish(self, topic: str) -> bool:
+        versions = tuple(self.input_versions[name] for name in TOPIC_INPUTS[topic])
+        if self.skip_unchanged and self.published_versions.get(topic) == versions:
+            self.skipped_publishes[topic] += 1
+            return False
+
+        self.published_versions[topic] = versions
+        self.publish_counts[topic] += 1
+        return True
+
+    def get_publish_stats(self) -> Dict:
+        """Number of publishes, skipped publishes and duplicate inputs per topic"""
+        stats = {
+            "published": dict(self.publish_counts),
+            "skipped": dict(self.skipped_publishes),
+            "duplicates": dict(self.duplicate_inputs)
+        }
+        if self.lidar_pipeline is not None:
+            stats["lidar_pipeline"] = self.lidar_pipeline.stats()
+        if self.recorder is not None:
+            stats["recorder"] = self.recorder.stats()
+        return stats
+
+    def publish_latency_summary(self):
+        """p50/p99 latency of every traced topic as a diagnostics message"""
+        msg = diagnostic_msgs.msg.DiagnosticArray()
+        msg.header.stamp = self.get_clock().now().to_msg()
+        for topic, intervals in sorted(self.tracer.summary().items()):
+            status = diagnostic_msgs.msg.DiagnosticStatus(
+                level=diagnostic_msgs.msg.DiagnosticStatus.OK,
+                name="vehicle_info_publisher: {} latency".format(topic),
+                message="{} messages".format(self.tracer.counts[topic])
+            )
+            for interval in INTERVALS:
+                for q, value in zip((50, 99), intervals[interval]):
+                    status.values.append(diagnostic_msgs.msg.KeyValue(
+                        key="{} p{} [ms]".format(interval, q),
+                        value="{:.3f}".format(value * 1e3)
+                    ))
+            msg.status.append(status)
+        self.latency_pub.publish(msg)
+
+    def mark_input(self, name: str, header: std_msgs.msg.Header) -> bool:
+        """Record the arrival of an input, returns False if it repeats the previous stamp"""
+        stamp = (header.stamp.sec, header.stamp.nanosec)
+        if self.input_versions[name] and self.input_stamps.get(name) == stamp:
+            self.duplicate_inputs[name] += 1
+            return False
+
+        self.input_stamps[name] = stamp
+        self.input_versions[name] += 1
+        if self.tracer is not None:
+            frame, tick_ns = self.tracer.lookup(header.stamp)
+            self.input_traces[name] = (frame, tick_ns, time.perf_counter_ns())
+        return True
     
-    """ Read vehicle state info using carla interface """
+    """ Read vehicle state info from the state cache, or using carla interface """
     def update_vehicle_state_info(self):
-        ego_velocity = self.vehicle.get_velocity()
-        ego_angular_velocity = self.vehicle.get_angular_velocity()
-        ego_transform = self.vehicle.get_transform()
+        self.pseudo_odom.header = self.header
+        state = None
+        if self.state_cache is not None:
+            state = self.state_cache.get(self.vehicle.id)
+        if state is not None:
+            # Converted once per frame, the vehicle changes on restarts
+            if (self.vehicle.id, state.frame) == self.vehicle_state_frame:
+                return
+            self.vehicle_state_frame = (self.vehicle.id, state.frame)
+            ego_velocity = state.velocity
+            ego_angular_velocity = state.angular_velocity
+            ego_transform = state.transform
+        else:
+            self.vehicle_state_frame = None
+            ego_velocity = self.vehicle.get_velocity()
+            ego_angular_velocity = self.vehicle.get_angular_velocity()
+            ego_transform = self.vehicle.get_transform()
         ego_location = ego_transform.location
         ego_rotation = ego_transform.rotation
 
-        self.pseudo_heading = ego_rotation        
-        self.pseudo_position = carla_data_to_ros.carla_location_to_ros_vector3(ego_location)
-        self.pseudo_velocity = carla_data_to_ros.carla_velocity_to_ros_twist(
+        self.pseudo_heading = ego_rotation
+        carla_data_to_ros.carla_location_to_ros_vector3_into(
+            self.pseudo_position,
+            ego_location
+        )
+        carla_data_to_ros.carla_velocity_to_ros_twist_into(
+            self.pseudo_velocity,
             ego_velocity,
             ego_angular_velocity
         )
 
-        self.pseudo_odom.header = self.header
-        self.pseudo_odom.pose.pose = self.pseudo_position
+        carla_data_to_ros.carla_transform_to_ros_pose_into(
+            self.pseudo_odom.pose.pose,
+            ego_transform
+        )
         self.pseudo_odom.twist.twist = self.pseudo_velocity
 
+    def process_lidar_data(self):
+        """Run the lidar pipeline on the latest cloud, outside of the input lock"""
+        with self.input_lock:
+            version = self.input_versions["lidar"]
+            carla_lidar_data = self.carla_lidar_data
+        if version == self.processed_lidar_version:
+            return
+        if not carla_lidar_data.point_step or not carla_lidar_data.fields:
+            # Nothing to process before the first cloud with a point layout
+            return
+
+        # Twist of the vehicle in its own frame, the sensor is assumed to be
+        # mounted without rotation
+        yaw = math.radians(-self.pseudo_heading.yaw)
+        linear = self.pseudo_velocity.linear
+        angular = self.pseudo_velocity.angular
+        linear_velocity = (
+            math.cos(yaw) * linear.x + math.sin(yaw) * linear.y,
+            -math.sin(yaw) * linear.x + math.cos(yaw) * linear.y,
+            linear.z
+        )
+
+        points = self.lidar_pipeline.process(
+            lidar_pipeline.pointcloud2_to_array(carla_lidar_data),
+            linear_velocity,
+            (angular.x, angular.y, angular.z)
+        )
+        processed = lidar_pipeline.array_to_pointcloud2_into(
+            sensor_msgs.msg.PointCloud2(), points, carla_lidar_data)
+        with self.input_lock:
+            self.processed_lidar_data = processed
+            self.processed_lidar_version = version
+
     """ Callback functions """
+    def add_synchronized(self, topic: str, msg):
+        with self.sync_lock:
+            self.synchronizer.add(topic, msg)
+
     def update_carla_lidar_data(self, carla_lidar_data: sensor_msgs.msg.PointCloud2):
-        self.header = carla_lidar_data.header
-        self.header.frame_id = "odom"
+        carla_lidar_data.header.frame_id = "odom"
+        with self.input_lock:
+            if not self.mark_input("lidar", carla_lidar_data.header):
+                logging.debug("Dropped duplicate lidar data")
+                return
 
-        self.carla_lidar_data = carla_lidar_data
+            self.header = carla_lidar_data.header
+            self.carla_lidar_data = carla_lidar_data
         logging.debug("Received lidar data")
+
+        if self.publish_mode == "lidar":
+            self.publish_vehicle_data()
             
+    def update_carla_lidar_raw(self, carla_lidar_data: bytes):
+        """update_carla_lidar_data on the serialized message, without deserializing the points"""
+        header = std_msgs.msg.Header(frame_id="odom")
+        header.stamp.sec, header.stamp.nanosec = serialized_header.read_stamp(carla_lidar_data)
+        carla_lidar_data = serialized_header.rewrite_frame_id(carla_lidar_data, header.frame_id)
+        with self.input_lock:
+            if not self.mark_input("lidar", header):
+                logging.debug("Dropped duplicate lidar data")
+                return
+
+            self.header = header
+            self.carla_lidar_data = carla_lidar_data
+        logging.debug("Received serialized lidar data")
+
+        if self.publish_mode == "lidar":
+            self.publish_vehicle_data()
+
+    def update_carla_sensor_bundle(self, bundle: Dict):
+        self.update_carla_gnss_data(bundle["gnss"])
+        self.update_carla_imu_data(bundle["imu"])
+        self.update_carla_lidar_data(bundle["lidar"])
+        self.publish_vehicle_data()
+
     def update_carla_gnss_data(self, carla_gnss_data: sensor_msgs.msg.NavSatFix):
-        self.carla_gnss_data = carla_gnss_data
+        with self.input_lock:
+            if not self.mark_input("gnss", carla_gnss_data.header):
+                logging.debug("Dropped duplicate gnss data")
+                return
+
+            self.carla_gnss_data = carla_gnss_data
         logging.debug("Received gnss data")
 
     def update_carla_imu_data(self, carla_imu_data: sensor_msgs.msg.Imu):
-        self.carla_imu_data = carla_imu_data
+        with self.input_lock:
+            if not self.mark_input("imu", carla_imu_data.header):
+                logging.debug("Dropped duplicate imu data")
+                return
+
+            self.carla_imu_data = carla_imu_data
         logging.debug("Received imu data") 
    
     """ Prepare data to be published """
     def get_lidar_data(self)->sensor_msgs.msg.PointCloud2:
+        # Serialized in lidar passthrough mode, publish() takes both
         self.lidar_data = self.carla_lidar_data
+        if self.lidar_pipeline is not None:
+            self.lidar_data = self.processed_lidar_data
         return self.lidar_data
     
     def get_gps_data(self):
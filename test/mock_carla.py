@@ -0,0 +1,756 @@
+"""
+In-process stand-in for the CARLA Python API
+
+Implements the subset of the carla module used by this package, backed by a
+simulated server without rendering: worlds and maps, the blueprint library,
+actors with kinematic bicycle-model vehicles, attached sensors, world
+snapshots and batched commands. Simulation time only advances with ticks, so
+runs are deterministic. Every call that is a remote procedure call in CARLA
+sleeps for the configurable rpc_latency of the server and is counted.
+
+conftest.py registers this module as carla when the real API is missing.
+Tests can also create their own Server and pass it to Client(server=...),
+inject spawn failures with Server.spawn_failures and inspect the batches a
+Client applied in Client.batches.
+"""
+
+import enum
+import fnmatch
+import itertools
+import math
+import threading
+import time
+import types
+
+# Vehicle model
+WHEELBASE = 2.9
+MAX_STEER_ANGLE = math.radians(35.0)
+MAX_ACCELERATION = 4.0
+MAX_DECELERATION = 8.0
+HAND_BRAKE_DECELERATION = 10.0
+DRAG = 0.05
+AUTOPILOT_SPEED = 30.0 / 3.6
+
+_SENSOR_ATTRIBUTES = {
+    "sensor.camera.rgb": ("image_size_x", "image_size_y", "fov", "sensor_tick"),
+    "sensor.lidar.ray_cast": ("range", "channels", "points_per_second", "rotation_frequency",
+                              "upper_fov", "lower_fov", "atmosphere_attenuation_rate",
+                              "dropoff_general_rate", "dropoff_intensity_limit",
+                              "dropoff_zero_intensity", "sensor_tick"),
+    "sensor.other.gnss": ("noise_alt_stddev", "noise_lat_stddev", "noise_lon_stddev",
+                          "noise_alt_bias", "noise_lat_bias", "noise_lon_bias", "sensor_tick"),
+    "sensor.other.imu": ("noise_accel_stddev_x", "noise_accel_stddev_y", "noise_accel_stddev_z",
+                         "noise_gyro_stddev_x", "noise_gyro_stddev_y", "noise_gyro_stddev_z",
+                         "noise_gyro_bias_x", "noise_gyro_bias_y", "noise_gyro_bias_z",
+                         "sensor_tick"),
+}
+_VEHICLES = ("vehicle.lincoln.mkz", "vehicle.tesla.model3", "vehicle.audi.a2")
+_COMMON_ATTRIBUTES = ("role_name", "ros_name")
+
+
+class Vector3D(object):
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, factor):
+        return type(self)(self.x * factor, self.y * factor, self.z * factor)
+
+    def __eq__(self, other):
+        return (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def __repr__(self):
+        return '{}(x={}, y={}, z={})'.format(type(self).__name__, self.x, self.y, self.z)
+
+    def length(self):
+        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+
+
+class Location(Vector3D):
+    __slots__ = ()
+
+    def distance(self, other):
+        return (self - other).length()
+
+
+class Rotation(object):
+    __slots__ = ('pitch', 'yaw', 'roll')
+
+    def __init__(self, pitch=0.0, yaw=0.0, roll=0.0):
+        self.pitch = pitch
+        self.yaw = yaw
+        self.roll = roll
+
+    def __eq__(self, other):
+        return (self.pitch, self.yaw, self.roll) == (other.pitch, other.yaw, other.roll)
+
+    def __repr__(self):
+        return 'Rotation(pitch={}, yaw={}, roll={})'.format(self.pitch, self.yaw, self.roll)
+
+    def get_forward_vector(self):
+        pitch, yaw = math.radians(self.pitch), math.radians(self.yaw)
+        return Vector3D(math.cos(pitch) * math.cos(yaw), math.cos(pitch) * math.sin(yaw),
+                        math.sin(pitch))
+
+
+class Transform(object):
+    __slots__ = ('location', 'rotation')
+
+    def __init__(self, location=None, rotation=None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def __repr__(self):
+        return 'Transform({}, {})'.format(self.location, self.rotation)
+
+    def transform(self, point):
+        """Location of a point relative to this transform, yaw only"""
+        yaw = math.radians(self.rotation.yaw)
+        return Location(
+            self.location.x + math.cos(yaw) * point.x - math.sin(yaw) * point.y,
+            self.location.y + math.sin(yaw) * point.x + math.cos(yaw) * point.y,
+            self.location.z + point.z
+        )
+
+    def get_forward_vector(self):
+        return self.rotation.get_forward_vector()
+
+
+class VehicleControl(object):
+    def __init__(self, throttle=0.0, steer=0.0, brake=0.0, hand_brake=False, reverse=False,
+                 manual_gear_shift=False, gear=0):
+        self.throttle = throttle
+        self.steer = steer
+        self.brake = brake
+        self.hand_brake = hand_brake
+        self.reverse = reverse
+        self.manual_gear_shift = manual_gear_shift
+        self.gear = gear
+
+
+class VehicleLightState(enum.IntFlag):
+    NONE = 0
+    Position = 0x1
+    LowBeam = 0x2
+    HighBeam = 0x4
+    Brake = 0x8
+    RightBlinker = 0x10
+    LeftBlinker = 0x20
+    Reverse = 0x40
+    Fog = 0x80
+    Interior = 0x100
+    Special1 = 0x200
+    Special2 = 0x400
+    All = 0xFFFFFFFF
+
+
+class WorldSettings(object):
+    def __init__(self, synchronous_mode=False, fixed_delta_seconds=None, no_rendering_mode=False):
+        self.synchronous_mode = synchronous_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+        self.no_rendering_mode = no_rendering_mode
+
+    def copy(self):
+        return WorldSettings(self.synchronous_mode, self.fixed_delta_seconds,
+                             self.no_rendering_mode)
+
+
+class ActorAttribute(object):
+    def __init__(self, attribute_id, value=''):
+        self.id = attribute_id
+        self.value = value
+
+    def as_str(self):
+        return str(self.value)
+
+
+class ActorBlueprint(object):
+    def __init__(self, blueprint_id, attributes):
+        self.id = blueprint_id
+        self.tags = blueprint_id.split('.')
+        self._attributes = {name: ActorAttribute(name) for name in attributes}
+
+    def __iter__(self):
+        return iter(list(self._attributes.values()))
+
+    def __len__(self):
+        return len(self._attributes)
+
+    def has_attribute(self, attribute_id):
+        return attribute_id in self._attributes
+
+    def get_attribute(self, attribute_id):
+        return self._attributes[attribute_id]
+
+    def set_attribute(self, attribute_id, value):
+        if attribute_id not in self._attributes:
+            raise IndexError("blueprint {} has no attribute {}".format(self.id, attribute_id))
+        self._attributes[attribute_id].value = str(value)
+
+    def copy(self):
+        blueprint = ActorBlueprint(self.id, ())
+        blueprint._attributes = {name: ActorAttribute(name, attribute.value)
+                                 for name, attribute in self._attributes.items()}
+        return blueprint
+
+
+class BlueprintLibrary(object):
+    def __init__(self, blueprints):
+        self._blueprints = list(blueprints)
+
+    def __iter__(self):
+        return iter(self._blueprints)
+
+    def __len__(self):
+        return len(self._blueprints)
+
+    def __getitem__(self, index):
+        return self._blueprints[index]
+
+    def filter(self, pattern):
+        return BlueprintLibrary(blueprint for blueprint in self._blueprints
+                                if fnmatch.fnmatchcase(blueprint.id, pattern))
+
+    def find(self, blueprint_id):
+        for blueprint in self._blueprints:
+            if blueprint.id == blueprint_id:
+                return blueprint.copy()
+        raise IndexError("blueprint '{}' not found".format(blueprint_id))
+
+
+class ActorList(list):
+    def filter(self, pattern):
+        return ActorList(actor for actor in self if fnmatch.fnmatchcase(actor.type_id, pattern))
+
+    def find(self, actor_id):
+        for actor in self:
+            if actor.id == actor_id:
+                return actor
+        return None
+
+
+class Actor(object):
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        self._world = world
+        self.id = actor_id
+        self.type_id = blueprint.id
+        self.attributes = {attribute.id: attribute.value for attribute in blueprint}
+        self.parent = parent
+        self.is_alive = True
+        # Relative to the parent, if any
+        self._transform = transform
+        self._velocity = Vector3D()
+        self._angular_velocity = Vector3D()
+
+    def get_world(self):
+        return self._world
+
+    def get_transform(self):
+        self._world._rpc()
+        return self._current_transform()
+
+    def get_location(self):
+        return self.get_transform().location
+
+    def set_transform(self, transform):
+        self._world._rpc()
+        self._transform = transform
+
+    def get_velocity(self):
+        self._world._rpc()
+        return Vector3D(self._velocity.x, self._velocity.y, self._velocity.z)
+
+    def get_angular_velocity(self):
+        self._world._rpc()
+        angular_velocity = self._angular_velocity
+        return Vector3D(angular_velocity.x, angular_velocity.y, angular_velocity.z)
+
+    def destroy(self):
+        self._world._rpc()
+        return self._world._destroy(self.id)
+
+    def _current_transform(self):
+        if self.parent is None:
+            return Transform(Location(self._transform.location.x, self._transform.location.y,
+                                      self._transform.location.z),
+                             Rotation(self._transform.rotation.pitch, self._transform.rotation.yaw,
+                                      self._transform.rotation.roll))
+        parent = self.parent._current_transform()
+        return Transform(parent.transform(self._transform.location), Rotation(
+            parent.rotation.pitch + self._transform.rotation.pitch,
+            parent.rotation.yaw + self._transform.rotation.yaw,
+            parent.rotation.roll + self._transform.rotation.roll))
+
+    def _step(self, delta_seconds):
+        pass
+
+
+class Vehicle(Actor):
+    """Kinematic bicycle model driven by the applied control"""
+
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        super().__init__(world, actor_id, blueprint, transform, parent)
+        self._control = VehicleControl()
+        self._light_state = VehicleLightState.NONE
+        self._speed = 0.0
+        self.autopilot = False
+
+    def apply_control(self, control):
+        self._world._rpc()
+        self._control = VehicleControl(control.throttle, control.steer, control.brake,
+                                       control.hand_brake, control.reverse,
+                                       control.manual_gear_shift, control.gear)
+
+    def get_control(self):
+        self._world._rpc()
+        return self._control
+
+    def set_autopilot(self, enabled=True, tm_port=8000):
+        self._world._rpc()
+        self.autopilot = enabled
+
+    def set_light_state(self, light_state):
+        self._world._rpc()
+        self._light_state = VehicleLightState(light_state)
+
+    def get_light_state(self):
+        self._world._rpc()
+        return self._light_state
+
+    def _step(self, delta_seconds):
+        control = self._control
+        if self.autopilot:
+            control = VehicleControl(throttle=1.0 if self._speed < AUTOPILOT_SPEED else 0.0)
+
+        direction = -1.0 if control.reverse else 1.0
+        acceleration = direction * control.throttle * MAX_ACCELERATION - DRAG * self._speed
+        deceleration = control.brake * MAX_DECELERATION
+        if control.hand_brake:
+            deceleration += HAND_BRAKE_DECELERATION
+
+        speed = self._speed + acceleration * delta_seconds
+        braked = deceleration * delta_seconds
+        speed = max(speed - braked, 0.0) if speed > 0 else min(speed + braked, 0.0)
+
+        yaw_rate = speed / WHEELBASE * math.tan(control.steer * MAX_STEER_ANGLE)
+        rotation = self._transform.rotation
+        yaw = math.radians(rotation.yaw + 0.5 * math.degrees(yaw_rate) * delta_seconds)
+        self._transform.location.x += speed * math.cos(yaw) * delta_seconds
+        self._transform.location.y += speed * math.sin(yaw) * delta_seconds
+        heading = rotation.yaw + math.degrees(yaw_rate) * delta_seconds
+        rotation.yaw = (heading + 180.0) % 360.0 - 180.0
+
+        self._speed = speed
+        forward = rotation.get_forward_vector()
+        self._velocity = Vector3D(forward.x * speed, forward.y * speed, 0.0)
+        self._angular_velocity = Vector3D(0.0, 0.0, math.degrees(yaw_rate))
+
+
+class SensorData(object):
+    def __init__(self, frame, timestamp, transform):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.transform = transform
+
+
+class Sensor(Actor):
+    """Sensor producing one SensorData per tick while listening"""
+
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        super().__init__(world, actor_id, blueprint, transform, parent)
+        self._callback = None
+        self.ros_enabled = False
+
+    def listen(self, callback):
+        self._world._rpc()
+        self._callback = callback
+
+    def stop(self):
+        self._world._rpc()
+        self._callback = None
+
+    def is_listening(self):
+        return self._callback is not None
+
+    def enable_for_ros(self):
+        self._world._rpc()
+        self.ros_enabled = True
+
+    def disable_for_ros(self):
+        self._world._rpc()
+        self.ros_enabled = False
+
+    def _measure(self, frame, timestamp):
+        if self._callback is not None:
+            self._callback(SensorData(frame, timestamp, self._current_transform()))
+
+
+class Timestamp(object):
+    def __init__(self, frame, elapsed_seconds, delta_seconds):
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = elapsed_seconds
+
+
+class ActorSnapshot(object):
+    def __init__(self, actor):
+        self.id = actor.id
+        self._transform = actor._current_transform()
+        self._velocity = actor._velocity
+        self._angular_velocity = actor._angular_velocity
+
+    def get_transform(self):
+        return self._transform
+
+    def get_velocity(self):
+        return self._velocity
+
+    def get_angular_velocity(self):
+        return self._angular_velocity
+
+
+class WorldSnapshot(object):
+    def __init__(self, world_id, timestamp, actors):
+        self.id = world_id
+        self.frame = timestamp.frame
+        self.timestamp = timestamp
+        self._actors = {actor.id: ActorSnapshot(actor) for actor in actors}
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def __len__(self):
+        return len(self._actors)
+
+    def find(self, actor_id):
+        return self._actors.get(actor_id)
+
+    def has_actor(self, actor_id):
+        return actor_id in self._actors
+
+
+class Map(object):
+    def __init__(self, name, spawn_points=64, spacing=10.0):
+        self.name = 'Carla/Maps/' + name
+        self._spawn_points = [
+            Transform(Location(x=spacing * index, y=0.0, z=0.5), Rotation())
+            for index in range(spawn_points)
+        ]
+
+    def get_spawn_points(self):
+        return [Transform(Location(point.location.x, point.location.y, point.location.z),
+                          Rotation())
+                for point in self._spawn_points]
+
+
+class World(object):
+    _ids = itertools.count(1)
+
+    def __init__(self, server, map_name):
+        self._server = server
+        self.id = next(self._ids)
+        self._map = Map(map_name)
+        self._settings = WorldSettings()
+        self._blueprints = BlueprintLibrary(
+            [ActorBlueprint(name, _COMMON_ATTRIBUTES) for name in _VEHICLES]
+            + [ActorBlueprint(name, _COMMON_ATTRIBUTES + attributes)
+               for name, attributes in _SENSOR_ATTRIBUTES.items()]
+        )
+        # Actors spawned since the last tick are part of the next snapshot
+        self._actors = {}
+        self._next_id = 1
+        self._frame = 0
+        self._elapsed_seconds = 0.0
+        self._snapshot = WorldSnapshot(self.id, Timestamp(0, 0.0, 0.0), [])
+        self._tick_callbacks = {}
+        self._callback_ids = itertools.count(1)
+
+    def _rpc(self):
+        self._server._rpc()
+
+    def get_settings(self):
+        self._rpc()
+        return self._settings.copy()
+
+    def apply_settings(self, settings):
+        self._rpc()
+        self._settings = settings.copy()
+        return self._frame
+
+    def get_map(self):
+        self._rpc()
+        return self._map
+
+    def get_blueprint_library(self):
+        self._rpc()
+        return self._blueprints
+
+    def get_snapshot(self):
+        self._rpc()
+        return self._snapshot
+
+    def on_tick(self, callback):
+        callback_id = next(self._callback_ids)
+        self._tick_callbacks[callback_id] = callback
+        return callback_id
+
+    def remove_on_tick(self, callback_id):
+        self._tick_callbacks.pop(callback_id, None)
+
+    def get_actor(self, actor_id):
+        self._rpc()
+        return self._actors.get(actor_id)
+
+    def get_actors(self, actor_ids=None):
+        self._rpc()
+        if actor_ids is None:
+            return ActorList(self._actors.values())
+        return ActorList(self._actors[actor_id] for actor_id in actor_ids
+                         if actor_id in self._actors)
+
+    def spawn_actor(self, blueprint, transform, attach_to=None):
+        self._rpc()
+        actor, error = self._spawn(blueprint, transform, attach_to)
+        if error:
+            raise RuntimeError(error)
+        return actor
+
+    def try_spawn_actor(self, blueprint, transform, attach_to=None):
+        self._rpc()
+        actor, _ = self._spawn(blueprint, transform, attach_to)
+        return actor
+
+    def tick(self, seconds=10.0):
+        self._rpc()
+        if not self._settings.synchronous_mode:
+            raise RuntimeError("tick() requires synchronous mode")
+        return self._step()
+
+    def wait_for_tick(self, seconds=10.0):
+        self._rpc()
+        if self._settings.synchronous_mode:
+            raise RuntimeError("time-out of {} s while waiting for the simulator".format(seconds))
+        # Without a client ticking, the server runs on its own
+        self._step()
+        return self._snapshot
+
+    def _spawn(self, blueprint, transform, parent=None):
+        failures = self._server.spawn_failures
+        for index, (pattern, error) in enumerate(failures):
+            if fnmatch.fnmatchcase(blueprint.id, pattern):
+                del failures[index]
+                return None, error
+        if isinstance(parent, int):
+            if parent not in self._actors:
+                return None, "parent actor {} not found".format(parent)
+            parent = self._actors[parent]
+        if blueprint.id.startswith('vehicle.'):
+            actor_class = Vehicle
+            if any(actor.parent is None and isinstance(actor, Vehicle)
+                   and actor._transform.location.distance(transform.location) < 2.0
+                   for actor in self._actors.values()):
+                return None, "Spawn failed because of collision at spawn position"
+        elif blueprint.id.startswith('sensor.'):
+            actor_class = Sensor
+        else:
+            actor_class = Actor
+
+        location, rotation = transform.location, transform.rotation
+        transform = Transform(Location(location.x, location.y, location.z),
+                              Rotation(rotation.pitch, rotation.yaw, rotation.roll))
+        actor = actor_class(self, self._next_id, blueprint, transform, parent)
+        self._next_id += 1
+        self._actors[actor.id] = actor
+        return actor, ''
+
+    def _destroy(self, actor_id):
+        actor = self._actors.pop(actor_id, None)
+        if actor is None:
+            return False
+        actor.is_alive = False
+        return True
+
+    def _step(self):
+        delta_seconds = self._settings.fixed_delta_seconds or 0.05
+        self._frame += 1
+        self._elapsed_seconds += delta_seconds
+
+        actors = list(self._actors.values())
+        for actor in actors:
+            actor._step(delta_seconds)
+        timestamp = Timestamp(self._frame, self._elapsed_seconds, delta_seconds)
+        for actor in actors:
+            if isinstance(actor, Sensor):
+                actor._measure(self._frame, timestamp)
+
+        self._snapshot = WorldSnapshot(self.id, timestamp, actors)
+        for callback in list(self._tick_callbacks.values()):
+            callback(self._snapshot)
+        return self._frame
+
+
+class Server(object):
+    """
+    The simulated CARLA server
+
+    :param rpc_latency: seconds every remote procedure call takes
+    :param map_name: map loaded at startup
+    :param maps: names of the available maps
+
+    spawn_failures holds (blueprint pattern, error) pairs: the next spawn
+    of a matching blueprint fails with the error and the pair is removed.
+    """
+
+    def __init__(self, rpc_latency=0.0, map_name='Town10HD_Opt', maps=('Town10HD_Opt', 'Mine_01')):
+        self.rpc_latency = rpc_latency
+        self.rpcs = 0
+        self._rpcs_lock = threading.Lock()
+        self.spawn_failures = []
+        self.maps = list(maps)
+        self.world = World(self, map_name)
+
+    def _rpc(self):
+        # Clients may call from several threads, like the real one
+        with self._rpcs_lock:
+            self.rpcs += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+
+# Server of clients created without one
+server = Server()
+
+
+class Client(object):
+    def __init__(self, host='localhost', port=2000, worker_threads=0, server=None):
+        self.host = host
+        self.port = port
+        self._server = server if server is not None else globals()['server']
+        self.timeout = 5.0
+        # Commands of every applied batch
+        self.batches = []
+
+    def set_timeout(self, seconds):
+        self.timeout = seconds
+
+    def get_server_version(self):
+        self._server._rpc()
+        return 'mock'
+
+    def get_client_version(self):
+        return 'mock'
+
+    def get_world(self):
+        self._server._rpc()
+        return self._server.world
+
+    def get_available_maps(self):
+        self._server._rpc()
+        return ['/Game/Carla/Maps/' + name for name in self._server.maps]
+
+    def load_world(self, map_name, reset_settings=True):
+        self._server._rpc()
+        if map_name.split('/')[-1] not in self._server.maps:
+            raise RuntimeError("map '{}' not found".format(map_name))
+        settings = self._server.world._settings
+        self._server.world = World(self._server, map_name.split('/')[-1])
+        if not reset_settings:
+            self._server.world._settings = settings
+        return self._server.world
+
+    def apply_batch(self, commands):
+        self.apply_batch_sync(commands)
+
+    def apply_batch_sync(self, commands, do_tick=False):
+        """All commands in one RPC, returns one command.Response per command"""
+        self._server._rpc()
+        self.batches.append(list(commands))
+        world = self._server.world
+        responses = [self._apply(world, command) for command in commands]
+        if do_tick and world._settings.synchronous_mode:
+            world._step()
+        return responses
+
+    def _apply(self, world, command, future_actor_id=None):
+        actor_id = getattr(command, 'actor_id', None)
+        if actor_id == FutureActor:
+            actor_id = future_actor_id
+
+        if isinstance(command, SpawnActor):
+            actor, error = world._spawn(command.blueprint, command.transform, command.parent_id)
+            if error:
+                return Response(0, error)
+            for then in command.do_after:
+                response = self._apply(world, then, actor.id)
+                if response.error:
+                    return Response(actor.id, response.error)
+            return Response(actor.id)
+
+        actor = world._actors.get(actor_id)
+        if actor is None:
+            return Response(actor_id or 0, "actor {} not found".format(actor_id))
+        if isinstance(command, DestroyActor):
+            world._destroy(actor_id)
+        elif isinstance(command, SetAutopilot):
+            actor.autopilot = command.enabled
+        elif isinstance(command, ApplyVehicleControl):
+            actor._control = command.control
+        return Response(actor_id)
+
+
+# carla.command
+FutureActor = 0
+
+
+class Response(object):
+    def __init__(self, actor_id, error=''):
+        self.actor_id = actor_id
+        self.error = error
+
+    def has_error(self):
+        return bool(self.error)
+
+
+class DestroyActor(object):
+    def __init__(self, actor):
+        self.actor_id = getattr(actor, 'id', actor)
+
+
+class SetAutopilot(object):
+    def __init__(self, actor, enabled, tm_port=8000):
+        self.actor_id = getattr(actor, 'id', actor)
+        self.enabled = enabled
+
+
+class ApplyVehicleControl(object):
+    def __init__(self, actor, control):
+        self.actor_id = getattr(actor, 'id', actor)
+        self.control = control
+
+
+class SpawnActor(object):
+    def __init__(self, blueprint, transform, parent=None):
+        self.blueprint = blueprint
+        self.transform = transform
+        self.parent_id = getattr(parent, 'id', parent)
+        self.do_after = []
+
+    def then(self, command):
+        self.do_after.append(command)
+        return self
+
+
+command = types.ModuleType('carla.command')
+for _command in (Response, DestroyActor, SetAutopilot, ApplyVehicleControl, SpawnActor):
+    setattr(command, _command.__name__, _command)
+command.FutureActor = FutureActor
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from async_client import AsyncCarlaClient
+
+mock_carla = pytest.importorskip('mock_carla')
+
+
+def spawn_vehicle(server):
+    world = server.world
+    blueprint = world.get_blueprint_library().find('vehicle.tesla.model3')
+    return world.spawn_actor(blueprint, world.get_map().get_spawn_points()[0])
+
+
+def test_independent_calls_overlap():
+    server = mock_carla.Server(rpc_latency=0.02)
+    vehicle = spawn_vehicle(server)
+
+    with AsyncCarlaClient(workers=4) as rpc:
+        start = time.perf_counter()
+        rpc.submit(vehicle.apply_control, mock_carla.VehicleControl(throttle=1.0))
+        rpc.submit(vehicle.get_transform)
+        rpc.submit(vehicle.get_velocity)
+        results = rpc.flush()
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.05
+    assert results[1].location.x == 0.0
+    assert vehicle._control.throttle == 1.0
+    assert rpc.pending == []
+    assert rpc.calls == 3
+
+
+def test_flush_waits_for_all_calls_and_raises_the_first_error():
+    server = mock_carla.Server()
+    done = []
+
+    def fail():
+        raise RuntimeError("time-out")
+
+    def slow():
+        time.sleep(0.01)
+        done.append(True)
+
+    rpc = AsyncCarlaClient(workers=2)
+    try:
+        rpc.submit(fail)
+        rpc.submit(slow)
+        with pytest.raises(RuntimeError, match="time-out"):
+            rpc.flush()
+        assert done == [True]
+
+        # The world stays usable after a failed call
+        rpc.submit(server.world.get_snapshot)
+        assert rpc.flush()[0].frame == 0
+    finally:
+        rpc.close()
+
+
+def test_call_is_awaitable():
+    server = mock_carla.Server(rpc_latency=0.02)
+    vehicle = spawn_vehicle(server)
+
+    async def read_state(rpc):
+        return await asyncio.gather(rpc.call(vehicle.get_transform),
+                                    rpc.call(vehicle.get_velocity))
+
+    with AsyncCarlaClient() as rpc:
+        start = time.perf_counter()
+        transform, velocity = asyncio.run(read_state(rpc))
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.035
+    assert transform.location.x == 0.0
+    assert velocity.x == 0.0
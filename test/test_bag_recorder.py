@@ -0,0 +1,59 @@
+import threading
+
+from bag_recorder import BagRecorder, message_type_name
+
+
+class FakeWriter(object):
+    def __init__(self, block=None):
+        self.topics = {}
+        self.messages = []
+        self.closed = False
+        self.block = block
+
+    def create_topic(self, name, type_name):
+        self.topics[name] = type_name
+
+    def write(self, name, data, timestamp):
+        if self.block is not None:
+            self.block.wait()
+        self.messages.append((name, data, timestamp))
+
+    def close(self):
+        self.closed = True
+
+
+def test_writes_queued_messages_on_close():
+    writer = FakeWriter()
+    recorder = BagRecorder(writer, {"/sensor/lidar": "sensor_msgs/msg/PointCloud2"})
+    for index in range(10):
+        assert recorder.record("/sensor/lidar", bytes(100), index)
+    recorder.close()
+
+    assert writer.topics == {"/sensor/lidar": "sensor_msgs/msg/PointCloud2"}
+    assert [timestamp for _, _, timestamp in writer.messages] == list(range(10))
+    assert writer.closed
+
+    stats = recorder.stats()
+    assert stats["bytes"] == 1000
+    assert stats["written"] == {"/sensor/lidar": 10}
+    assert stats["dropped"] == {}
+
+
+def test_full_queue_drops_instead_of_blocking():
+    block = threading.Event()
+    writer = FakeWriter(block)
+    recorder = BagRecorder(writer, {"/sensor/imu": "sensor_msgs/msg/Imu"}, queue_size=4)
+
+    results = [recorder.record("/sensor/imu", bytes(10), index) for index in range(20)]
+    assert recorder.stats()["queue_depth"] <= 4
+    block.set()
+    recorder.close()
+
+    assert results.count(False) == recorder.stats()["dropped"]["/sensor/imu"]
+    assert len(writer.messages) == results.count(True)
+    assert results.count(False) >= 15
+
+
+def test_message_type_name():
+    Imu = type('Imu', (object,), {'__module__': 'sensor_msgs.msg._imu'})
+    assert message_type_name(Imu) == 'sensor_msgs/msg/Imu'
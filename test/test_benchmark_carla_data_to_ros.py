@@ -0,0 +1,251 @@
+"""
+Micro-benchmarks of every public function in carla_data_to_ros
+
+Each function is timed with timeit (ns/call) and traced with tracemalloc
+(memory blocks still held by the result, peak bytes during one call).
+Results are compared against the baselines stored in
+benchmark_baseline.json next to this file; a function fails when it is
+slower or allocates more than baseline * CARLA_BENCH_THRESHOLD (default 1.5).
+Timings depend on the machine, so no baselines are committed: without a
+recorded baseline a function is only measured and reported, which still
+checks that it runs on its benchmark arguments.
+
+Record or refresh the baselines on the target machine with
+
+    CARLA_BENCH_UPDATE=1 python3 -m pytest -m benchmark \
+        test/test_benchmark_carla_data_to_ros.py
+
+or print a report with
+
+    python3 test/test_benchmark_carla_data_to_ros.py [--update]
+"""
+
+import inspect
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+if __name__ == '__main__':
+    import conftest  # noqa: F401
+
+import carla  # noqa: E402
+import carla_data_to_ros  # noqa: E402
+from geometry_msgs.msg import (  # noqa: E402
+    Accel, Point, Pose, Quaternion, Transform, Twist, Vector3)
+
+BASELINE_FILE = os.environ.get(
+    'CARLA_BENCH_BASELINE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json'))
+THRESHOLD = float(os.environ.get('CARLA_BENCH_THRESHOLD', '1.5'))
+UPDATE_BASELINE = os.environ.get('CARLA_BENCH_UPDATE', '0') == '1'
+BATCH_SIZE = 256
+
+# Configuration functions, not conversions
+NOT_BENCHMARKED = {
+    'enable_rotation_matrix_cache',
+    'disable_rotation_matrix_cache',
+    'get_rotation_matrix_cache',
+}
+
+
+class _Actor(object):
+    """Stand-in for carla.Actor / carla.ActorSnapshot."""
+
+    def __init__(self, actor_id, transform):
+        self.id = actor_id
+        self._transform = transform
+
+    def get_transform(self):
+        return self._transform
+
+
+class _Snapshot(list):
+    """Stand-in for carla.WorldSnapshot."""
+
+    def find(self, actor_id):
+        return self[actor_id] if 0 <= actor_id < len(self) else None
+
+
+def _arguments():
+    location = carla.Location(x=1.5, y=-2.25, z=0.75)
+    rotation = carla.Rotation(pitch=3.0, yaw=-95.0, roll=1.5)
+    vector = carla.Vector3D(x=10.0, y=0.5, z=-0.1)
+    transform = carla.Transform(location, rotation)
+    pose = Pose(position=Point(x=1.0, y=2.0, z=3.0),
+                orientation=Quaternion(x=0.0, y=0.0, z=0.38268343, w=0.92387953))
+
+    rng = numpy.random.default_rng(0)
+    locations = rng.uniform(-500.0, 500.0, (BATCH_SIZE, 3))
+    rotations = rng.uniform(-180.0, 180.0, (BATCH_SIZE, 3))
+    transforms = [carla.Transform(carla.Location(*xyz),
+                                  carla.Rotation(roll=rpy[0], pitch=rpy[1], yaw=rpy[2]))
+                  for xyz, rpy in zip(locations.tolist(), rotations.tolist())]
+    actors = _Snapshot(_Actor(index, t) for index, t in enumerate(transforms))
+
+    return {
+        'carla_location_to_numpy_vector': (location,),
+        'carla_location_to_ros_vector3': (location,),
+        'carla_location_to_ros_point': (location,),
+        'carla_rotation_to_RPY': (rotation,),
+        'carla_rotation_to_ros_quaternion': (rotation,),
+        'carla_rotation_to_numpy_rotation_matrix': (rotation,),
+        'carla_rotation_to_directional_numpy_vector': (rotation,),
+        'carla_vector_to_ros_vector_rotated': (vector, rotation),
+        'carla_velocity_to_ros_twist': (vector, vector, rotation),
+        'carla_velocity_to_numpy_vector': (vector,),
+        'carla_acceleration_to_ros_accel': (vector,),
+        'carla_transform_to_ros_transform': (transform,),
+        'carla_transform_to_ros_pose': (transform,),
+        'carla_location_to_pose': (location,),
+        'ros_point_to_carla_location': (pose.position,),
+        'RPY_to_carla_rotation': (0.1, -0.2, 0.3),
+        'ros_quaternion_to_carla_rotation': (pose.orientation,),
+        'ros_pose_to_carla_transform': (pose,),
+        'transform_matrix_to_ros_pose': (carla_data_to_ros.ros_pose_to_transform_matrix(pose),),
+        'ros_pose_to_transform_matrix': (pose,),
+        'carla_location_to_ros_vector3_into': (Vector3(), location),
+        'carla_location_to_ros_point_into': (Point(), location),
+        'carla_rotation_to_ros_quaternion_into': (Quaternion(), rotation),
+        'carla_vector_to_ros_vector_rotated_into': (Vector3(), vector, rotation),
+        'carla_velocity_to_ros_twist_into': (Twist(), vector, vector, rotation),
+        'carla_acceleration_to_ros_accel_into': (Accel(), vector),
+        'carla_transform_to_ros_transform_into': (Transform(), transform),
+        'carla_transform_to_ros_pose_into': (Pose(), transform),
+        'carla_rotations_to_numpy_RPY': (rotations,),
+        'carla_locations_to_numpy_vectors': (locations,),
+        'numpy_RPY_to_numpy_quaternions': (numpy.radians(rotations),),
+        'numpy_RPY_to_numpy_rotation_matrices': (numpy.radians(rotations),),
+        'carla_rotations_to_numpy_quaternions': (rotations,),
+        'carla_rotations_to_numpy_rotation_matrices': (rotations,),
+        'carla_transforms_to_numpy_poses': (locations, rotations),
+        'carla_transform_list_to_numpy_arrays': (transforms,),
+        'carla_actors_to_numpy_poses': (actors,),
+        'carla_snapshot_to_numpy_poses': (actors,),
+    }
+
+
+ARGUMENTS = _arguments()
+
+
+def public_functions():
+    return sorted(
+        name for name, member in inspect.getmembers(carla_data_to_ros, inspect.isfunction)
+        if member.__module__ == carla_data_to_ros.__name__ and not name.startswith('_')
+        and name not in NOT_BENCHMARKED)
+
+
+def measure(name):
+    """Return ns/call, memory blocks held by one result and peak bytes of one call."""
+    function = getattr(carla_data_to_ros, name)
+    args = ARGUMENTS[name]
+
+    function(*args)
+    timer = timeit.Timer(lambda: function(*args))
+    number = max(timer.autorange()[0] // 4, 1)
+    ns_per_call = min(timer.repeat(repeat=3, number=number)) / number * 1e9
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = function(*args)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'lineno'))
+    del result
+
+    return {'ns_per_call': ns_per_call, 'blocks_per_call': blocks,
+            'peak_bytes_per_call': peak_bytes}
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+
+def store_baseline(baseline):
+    with open(BASELINE_FILE, 'w') as f:
+        json.dump(baseline, f, indent=4, sort_keys=True)
+        f.write('\n')
+
+
+def check_regression(name, result, baseline):
+    reference = baseline.get(name)
+    if reference is None:
+        return []
+
+    errors = []
+    for key in ('ns_per_call', 'blocks_per_call'):
+        limit = reference[key] * THRESHOLD
+        if result[key] > max(limit, 1):
+            errors.append('{}: {} {:.1f} exceeds {:.1f} (baseline {:.1f} x {})'.format(
+                name, key, result[key], limit, reference[key], THRESHOLD))
+    return errors
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    baseline = load_baseline()
+    if not baseline and not UPDATE_BASELINE:
+        print('No baselines in {}, only reporting (record with CARLA_BENCH_UPDATE=1)'.format(
+            BASELINE_FILE))
+    yield baseline
+    if UPDATE_BASELINE:
+        store_baseline(baseline)
+
+
+def test_every_public_function_is_benchmarked():
+    missing = [name for name in public_functions() if name not in ARGUMENTS]
+    assert not missing, 'No benchmark arguments for {}'.format(', '.join(missing))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('name', public_functions())
+def test_benchmark(name, baseline):
+    if name not in ARGUMENTS:
+        pytest.skip('no benchmark arguments')
+    result = measure(name)
+    print('{:<45} {:>10.0f} ns/call {:>5d} blocks/call {:>8d} peak bytes/call'.format(
+        name, result['ns_per_call'], result['blocks_per_call'], result['peak_bytes_per_call']))
+
+    if UPDATE_BASELINE:
+        baseline[name] = result
+        return
+    errors = check_regression(name, result, baseline)
+    assert not errors, '\n'.join(errors)
+
+
+def main(argv):
+    baseline = load_baseline()
+    if not baseline and '--update' not in argv:
+        print('No baselines in {}, regression gate inactive (record with --update)'.format(
+            BASELINE_FILE))
+    errors = []
+    for name in public_functions():
+        result = measure(name)
+        print('{:<45} {:>10.0f} ns/call {:>5d} blocks/call {:>8d} peak bytes/call'.format(
+            name, result['ns_per_call'], result['blocks_per_call'], result['peak_bytes_per_call']))
+        if '--update' in argv:
+            baseline[name] = result
+        else:
+            errors.extend(check_regression(name, result, baseline))
+
+    if '--update' in argv:
+        store_baseline(baseline)
+    for error in errors:
+        print(error)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,45 @@
+import pytest
+
+mock_carla = pytest.importorskip('mock_carla')
+
+from blueprint_index import BlueprintIndex  # noqa: E402
+
+
+def test_library_is_fetched_once_per_world():
+    server = mock_carla.Server()
+    index = BlueprintIndex.for_world(server.world)
+
+    rpcs = server.rpcs
+    assert BlueprintIndex.for_world(server.world) is index
+    assert server.rpcs == rpcs
+    assert BlueprintIndex.for_world(mock_carla.Server().world) is not index
+
+
+def test_patterns_are_resolved_once(monkeypatch):
+    library = mock_carla.Server().world.get_blueprint_library()
+    filters = []
+    filter_library = library.filter
+
+    def counting_filter(pattern):
+        filters.append(pattern)
+        return filter_library(pattern)
+
+    monkeypatch.setattr(library, 'filter', counting_filter)
+    index = BlueprintIndex(library)
+
+    assert index.resolve('sensor.lidar.ray_cast') == 'sensor.lidar.ray_cast'
+    assert filters == []
+    for _ in range(3):
+        assert index.resolve('vehicle.*') == 'vehicle.lincoln.mkz'
+    assert filters == ['vehicle.*']
+
+    with pytest.raises(KeyError):
+        index.resolve('walker.*')
+
+
+def test_find_returns_fresh_blueprints():
+    index = BlueprintIndex(mock_carla.Server().world.get_blueprint_library())
+    first = index.find('sensor.other.imu')
+    first.set_attribute('role_name', 'imu')
+
+    assert index.find('sensor.other.imu').get_attribute('role_name').value == ''
@@ -0,0 +1,164 @@
+import random
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+pytest.importorskip('carla')
+pytest.importorskip('geometry_msgs')
+transforms3d_euler = pytest.importorskip('transforms3d.euler')
+
+import carla  # noqa: E402
+import carla_data_to_ros  # noqa: E402
+
+
+def random_rotations(count=500, seed=0):
+    rng = random.Random(seed)
+    return [carla.Rotation(roll=rng.uniform(-360.0, 360.0),
+                           pitch=rng.uniform(-360.0, 360.0),
+                           yaw=rng.uniform(-360.0, 360.0))
+            for _ in range(count)]
+
+
+def test_quaternion_matches_transforms3d():
+    for rotation in random_rotations():
+        roll, pitch, yaw = carla_data_to_ros.carla_rotation_to_RPY(rotation)
+        expected = transforms3d_euler.euler2quat(roll, pitch, yaw)
+        quat = carla_data_to_ros.carla_rotation_to_ros_quaternion(rotation)
+        assert numpy.allclose([quat.w, quat.x, quat.y, quat.z], expected, rtol=0.0, atol=1e-12)
+
+
+def test_rotation_matrix_matches_transforms3d():
+    for rotation in random_rotations():
+        roll, pitch, yaw = carla_data_to_ros.carla_rotation_to_RPY(rotation)
+        expected = transforms3d_euler.euler2mat(roll, pitch, yaw)
+        matrix = carla_data_to_ros.carla_rotation_to_numpy_rotation_matrix(rotation)
+        assert numpy.allclose(matrix, expected, rtol=0.0, atol=1e-12)
+
+
+def test_batch_conversion_matches_single():
+    rotations = random_rotations(count=64, seed=1)
+    carla_rotations = numpy.array([[r.roll, r.pitch, r.yaw] for r in rotations])
+    carla_locations = numpy.arange(64 * 3, dtype=float).reshape(64, 3)
+
+    quaternions = carla_data_to_ros.carla_rotations_to_numpy_quaternions(carla_rotations)
+    matrices = carla_data_to_ros.carla_rotations_to_numpy_rotation_matrices(carla_rotations)
+    poses = carla_data_to_ros.carla_transforms_to_numpy_poses(carla_locations, carla_rotations)
+
+    assert poses.shape == (64, 7)
+    for index, rotation in enumerate(rotations):
+        quat = carla_data_to_ros.carla_rotation_to_ros_quaternion(rotation)
+        expected = [quat.w, quat.x, quat.y, quat.z]
+        assert numpy.allclose(quaternions[index], expected, rtol=0.0, atol=1e-12)
+        assert numpy.allclose(poses[index, 3:], expected, rtol=0.0, atol=1e-12)
+        assert numpy.allclose(
+            matrices[index],
+            carla_data_to_ros.carla_rotation_to_numpy_rotation_matrix(rotation),
+            rtol=0.0, atol=1e-12)
+        assert poses[index, 1] == -carla_locations[index, 1]
+
+
+def pose_row(pose):
+    return [pose.position.x, pose.position.y, pose.position.z,
+            pose.orientation.w, pose.orientation.x, pose.orientation.y, pose.orientation.z]
+
+
+def spawned_world(count=16, seed=2):
+    mock_carla = pytest.importorskip('mock_carla')
+    world = mock_carla.Server().world
+    blueprint = world.get_blueprint_library().find('vehicle.tesla.model3')
+    for index, rotation in enumerate(random_rotations(count=count, seed=seed)):
+        location = carla.Location(x=10.0 * index, y=-3.5 + index, z=0.5)
+        world.spawn_actor(blueprint, carla.Transform(location, rotation))
+    return world
+
+
+def test_actors_to_poses_matches_single():
+    actors = spawned_world().get_actors()
+    ids, poses = carla_data_to_ros.carla_actors_to_numpy_poses(actors)
+
+    assert ids.tolist() == [actor.id for actor in actors]
+    for actor, row in zip(actors, poses):
+        expected = pose_row(carla_data_to_ros.carla_transform_to_ros_pose(actor.get_transform()))
+        assert numpy.allclose(row, expected, rtol=0.0, atol=1e-12)
+
+
+def test_snapshot_to_poses_matches_single():
+    world = spawned_world()
+    world.wait_for_tick()
+    snapshot = world.get_snapshot()
+
+    ids, poses = carla_data_to_ros.carla_snapshot_to_numpy_poses(snapshot)
+    assert sorted(ids.tolist()) == sorted(actor.id for actor in world.get_actors())
+    for actor_id, row in zip(ids.tolist(), poses):
+        expected = pose_row(carla_data_to_ros.carla_transform_to_ros_pose(
+            snapshot.find(actor_id).get_transform()))
+        assert numpy.allclose(row, expected, rtol=0.0, atol=1e-12)
+
+    # Unknown ids are left out
+    ids, poses = carla_data_to_ros.carla_snapshot_to_numpy_poses(snapshot, [3, 1, 999])
+    assert ids.tolist() == [3, 1]
+    assert poses.shape == (2, 7)
+
+
+@pytest.fixture
+def rotation_matrix_cache():
+    cache = carla_data_to_ros.enable_rotation_matrix_cache(maxsize=2, quantization=0.01)
+    yield cache
+    carla_data_to_ros.disable_rotation_matrix_cache()
+
+
+def test_rotation_matrix_cache_hits_and_misses(rotation_matrix_cache):
+    vector = carla.Vector3D(x=1.0, y=2.0, z=3.0)
+    mount = carla.Rotation(pitch=-20.0, yaw=0.0, roll=0.0)
+    uncached = carla_data_to_ros.carla_rotation_to_numpy_rotation_matrix(mount)
+
+    for _ in range(3):
+        rotated = carla_data_to_ros.carla_vector_to_ros_vector_rotated(vector, mount)
+    direction = carla_data_to_ros.carla_rotation_to_directional_numpy_vector(
+        carla.Rotation(pitch=-20.001, yaw=0.0, roll=0.0))
+
+    assert rotation_matrix_cache.misses == 1
+    assert rotation_matrix_cache.hits == 3
+    expected = uncached.dot([vector.x, vector.y, vector.z])
+    assert numpy.allclose([rotated.x, -rotated.y, rotated.z], expected, rtol=0.0, atol=1e-12)
+    assert numpy.allclose(direction, uncached[:, 0], rtol=0.0, atol=1e-12)
+
+
+def test_rotation_matrix_cache_is_bounded(rotation_matrix_cache):
+    for yaw in (0.0, 90.0, 180.0, 0.0):
+        carla_data_to_ros.carla_rotation_to_directional_numpy_vector(carla.Rotation(yaw=yaw))
+
+    assert len(rotation_matrix_cache) == 2
+    assert rotation_matrix_cache.misses == 4
+
+    rotation_matrix_cache.invalidate()
+    assert len(rotation_matrix_cache) == 0
+    assert rotation_matrix_cache.hits == rotation_matrix_cache.misses == 0
+
+
+def test_into_variants_fill_the_given_message():
+    from geometry_msgs.msg import Pose, Twist
+
+    transform = carla.Transform(carla.Location(x=1.0, y=2.0, z=3.0),
+                                carla.Rotation(pitch=10.0, yaw=-30.0, roll=5.0))
+    velocity = carla.Vector3D(x=4.0, y=-5.0, z=0.5)
+    angular_velocity = carla.Vector3D(x=0.1, y=0.2, z=-0.3)
+
+    pose = Pose()
+    assert carla_data_to_ros.carla_transform_to_ros_pose_into(pose, transform) is pose
+    expected_pose = carla_data_to_ros.carla_transform_to_ros_pose(transform)
+    for field in ('x', 'y', 'z'):
+        assert getattr(pose.position, field) == getattr(expected_pose.position, field)
+    for field in ('x', 'y', 'z', 'w'):
+        assert getattr(pose.orientation, field) == getattr(expected_pose.orientation, field)
+
+    twist = Twist()
+    linear = twist.linear
+    carla_data_to_ros.carla_velocity_to_ros_twist_into(
+        twist, velocity, angular_velocity, transform.rotation)
+    expected_twist = carla_data_to_ros.carla_velocity_to_ros_twist(
+        velocity, angular_velocity, transform.rotation)
+    assert twist.linear is linear
+    for field in ('x', 'y', 'z'):
+        assert getattr(twist.linear, field) == getattr(expected_twist.linear, field)
+        assert getattr(twist.angular, field) == getattr(expected_twist.angular, field)
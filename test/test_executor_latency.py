@@ -0,0 +1,157 @@
+"""
+End-to-end latency of the lidar relay with single- and multi-threaded executors
+
+A driver node publishes lidar frames together with a burst of imu messages
+on the subscribed topics and measures the time until the republished lidar
+frame arrives. The fleet benchmark measures how many lidar frames per second
+one executor relays for 1, 8 and 32 namespaced publishers. Run with
+-m benchmark -s to see the report. A short run of the multi-threaded
+executor is part of the regular tests.
+"""
+
+import threading
+import time
+
+import pytest
+
+rclpy = pytest.importorskip('rclpy')
+pytest.importorskip('nav_msgs')
+pytest.importorskip('sensor_msgs')
+pytest.importorskip('sensor_driver_msgs')
+
+import rclpy.qos  # noqa: E402
+import sensor_msgs.msg  # noqa: E402
+from test_vehicle_info_publisher import CONFIG, FakeVehicle  # noqa: E402
+from topic_config import vehicle_config  # noqa: E402
+from vehicle_info_publisher import create_executor, VehicleInfoPublisher  # noqa: E402
+
+FRAMES = 200
+FRAME_PERIOD = 0.01
+IMU_PER_FRAME = 10
+FLEET_FRAMES = 50
+
+
+def measure_lidar_latency(config, frames=FRAMES):
+    qos = rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value
+    latencies = []
+
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), config)
+    driver = rclpy.create_node('latency_driver')
+    lidar_pub = driver.create_publisher(
+        sensor_msgs.msg.PointCloud2, config["lidar_sub_topic"], qos)
+    imu_pub = driver.create_publisher(sensor_msgs.msg.Imu, config["imu_sub_topic"], qos)
+    sent = {}
+
+    def on_lidar(msg):
+        key = (msg.header.stamp.sec, msg.header.stamp.nanosec)
+        if key in sent:
+            latencies.append(time.perf_counter() - sent.pop(key))
+
+    driver.create_subscription(
+        sensor_msgs.msg.PointCloud2, config["lidar_pub_topic"], on_lidar, qos)
+
+    executor = create_executor(config)
+    executor.add_node(node)
+    executor.add_node(driver)
+    spinner = threading.Thread(target=executor.spin, daemon=True)
+    spinner.start()
+    try:
+        for frame in range(frames):
+            for _ in range(IMU_PER_FRAME):
+                imu = sensor_msgs.msg.Imu()
+                imu.header.stamp = driver.get_clock().now().to_msg()
+                imu_pub.publish(imu)
+            lidar = sensor_msgs.msg.PointCloud2()
+            lidar.header.stamp = driver.get_clock().now().to_msg()
+            sent[(lidar.header.stamp.sec, lidar.header.stamp.nanosec)] = time.perf_counter()
+            lidar_pub.publish(lidar)
+            time.sleep(FRAME_PERIOD)
+        time.sleep(0.2)
+    finally:
+        executor.shutdown()
+        spinner.join(timeout=1.0)
+        node.cleanup()
+        node.destroy_node()
+        driver.destroy_node()
+        rclpy.shutdown()
+
+    return sorted(latencies)
+
+
+def test_multi_threaded_executor_relays_lidar():
+    config = dict(CONFIG, publish_mode="lidar", executor="multi_threaded")
+    assert measure_lidar_latency(config, frames=20)
+
+
+@pytest.mark.benchmark
+def test_executor_latency():
+    report = {}
+    for executor in ("single_threaded", "multi_threaded"):
+        latencies = measure_lidar_latency(dict(CONFIG, publish_mode="lidar", executor=executor))
+        assert latencies, 'No lidar frame was relayed with the {} executor'.format(executor)
+        report[executor] = latencies
+
+    for executor, latencies in report.items():
+        print('{:<16} {:>4d} frames  p50 {:7.3f} ms  p95 {:7.3f} ms'.format(
+            executor, len(latencies),
+            latencies[len(latencies) // 2] * 1e3,
+            latencies[int(len(latencies) * 0.95)] * 1e3))
+
+
+def measure_fleet_throughput(config, vehicle_count):
+    qos = rclpy.qos.QoSPresetProfiles.SENSOR_DATA.value
+    received = []
+
+    rclpy.init()
+    config = dict(config, lidar_sub_topic="/carla/{vehicle}/lidar")
+    nodes = []
+    driver = rclpy.create_node('throughput_driver')
+    lidar_pubs = []
+    for index in range(vehicle_count):
+        vehicle_id = "vehicle%d" % index
+        node_config = vehicle_config(config, vehicle_id, namespaced=True)
+        nodes.append(VehicleInfoPublisher(FakeVehicle(), node_config, namespace=vehicle_id))
+        lidar_pubs.append(driver.create_publisher(
+            sensor_msgs.msg.PointCloud2, node_config["lidar_sub_topic"], qos))
+        driver.create_subscription(
+            sensor_msgs.msg.PointCloud2,
+            "/{}/{}".format(vehicle_id, node_config["lidar_pub_topic"]),
+            lambda msg: received.append(time.perf_counter()), qos)
+
+    executor = create_executor(config)
+    for node in nodes + [driver]:
+        executor.add_node(node)
+    spinner = threading.Thread(target=executor.spin, daemon=True)
+    spinner.start()
+    try:
+        time.sleep(0.5)
+        start = time.perf_counter()
+        for frame in range(FLEET_FRAMES):
+            for lidar_pub in lidar_pubs:
+                lidar = sensor_msgs.msg.PointCloud2()
+                lidar.header.stamp = driver.get_clock().now().to_msg()
+                lidar_pub.publish(lidar)
+            time.sleep(FRAME_PERIOD)
+        time.sleep(0.5)
+    finally:
+        executor.shutdown()
+        spinner.join(timeout=1.0)
+        for node in nodes:
+            node.cleanup()
+            node.destroy_node()
+        driver.destroy_node()
+        rclpy.shutdown()
+
+    if not received:
+        return 0, 0.0
+    return len(received), len(received) / (received[-1] - start)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('vehicle_count', [1, 8, 32])
+def test_fleet_throughput(vehicle_count):
+    relayed, rate = measure_fleet_throughput(dict(CONFIG, publish_mode="lidar"), vehicle_count)
+    print('{:>3d} vehicles: {:>5d} of {:>5d} frames relayed, {:8.1f} frames/s'.format(
+        vehicle_count, relayed, FLEET_FRAMES * vehicle_count, rate))
+    assert relayed
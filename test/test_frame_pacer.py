@@ -0,0 +1,55 @@
+import pytest
+
+from frame_pacer import FramePacer
+
+
+class FakeTime(object):
+    def __init__(self, oversleep=0.0002):
+        self.now = 0.0
+        self.oversleep = oversleep
+        self.slept = 0.0
+
+    def timer(self):
+        # Spinning advances time slowly
+        self.now += 1e-6
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds + self.oversleep
+
+
+def test_sleeps_most_of_the_interval():
+    fake = FakeTime()
+    pacer = FramePacer(50.0, spin_threshold=0.0005, timer=fake.timer, sleep=fake.sleep)
+    for _ in range(51):
+        fake.now += 0.005  # frame work
+        pacer.tick()
+
+    stats = pacer.stats()
+    assert stats["rate"] == pytest.approx(50.0, rel=1e-3)
+    assert stats["jitter"] < 0.01
+    # 15 ms of every 20 ms frame are slept, only the threshold is spun
+    assert fake.slept == pytest.approx(50 * 0.0145, rel=0.01)
+
+
+def test_does_not_catch_up_after_a_long_frame():
+    fake = FakeTime(oversleep=0.0)
+    pacer = FramePacer(100.0, timer=fake.timer, sleep=fake.sleep)
+    pacer.tick()
+    fake.now += 0.5
+    pacer.tick()
+    pacer.tick()
+
+    assert pacer.get_time() == pytest.approx(10.0, rel=0.01)
+
+
+def test_lockstep_does_not_wait():
+    fake = FakeTime()
+    pacer = FramePacer(0, timer=fake.timer, sleep=fake.sleep)
+    for _ in range(10):
+        fake.now += 0.05
+        pacer.tick()
+
+    assert fake.slept == 0.0
+    assert pacer.stats()["rate"] == pytest.approx(20.0, rel=1e-3)
@@ -0,0 +1,51 @@
+import csv
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from frame_profiler import FrameProfiler  # noqa: E402
+
+
+def record(profiler, durations):
+    for row in durations:
+        profiler.current[:len(row)] = row
+        profiler.frame_start = 0.0
+        profiler.end_frame()
+
+
+def test_ring_buffer_keeps_the_latest_frames():
+    profiler = FrameProfiler(["tick", "render"], capacity=4)
+    record(profiler, [(float(i), 0.0) for i in range(6)])
+
+    assert profiler.frames == 6
+    assert profiler.recorded()[:, 0].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_percentiles_and_csv(tmp_path):
+    profiler = FrameProfiler(["tick"], capacity=100)
+    record(profiler, [(i / 1000.0,) for i in range(1, 101)])
+
+    p50, p95, p99 = profiler.percentiles()["tick"]
+    assert p50 == pytest.approx(0.0505)
+    assert p95 == pytest.approx(0.09505)
+    assert p99 == pytest.approx(0.09901)
+
+    path = tmp_path / 'frames.csv'
+    profiler.dump_csv(str(path))
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['frame', 'tick_ms', 'frame_ms']
+    assert rows[1][:2] == ['0', '1.000']
+    assert len(rows) == 101
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = FrameProfiler(["tick"], enabled=False)
+    with profiler.phase("tick"):
+        pass
+    profiler.end_frame()
+    profiler.end_frame()
+
+    assert profiler.frames == 0
+    assert profiler.percentiles() == {}
@@ -0,0 +1,123 @@
+"""
+Manual control against the in-process CARLA stand-in
+
+Runs SimEnvironment and the whole game loop headless (SDL dummy driver). The
+benchmarks report startup, restart and loop throughput with a simulated RPC
+latency. Run with -m benchmark -s to see the report.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+pytest.importorskip('pygame')
+mock_carla = pytest.importorskip('mock_carla')
+
+import manual_control  # noqa: E402
+
+if manual_control.carla is not mock_carla:
+    pytest.skip('the CARLA Python API is installed, mock_carla is not in use',
+                allow_module_level=True)
+
+VEHICLE_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'config', 'vehicle_config.json')
+
+
+def run_game_loop(server, frames, fps=0, on_start=None, rpc_workers=0):
+    args = manual_control.make_argparser().parse_args(
+        ['-f', VEHICLE_CONFIG, '--map', 'Mine_01', '--fps', str(fps), '--frames', str(frames),
+         '--rpc-workers', str(rpc_workers)])
+    with pytest.raises(SystemExit):
+        manual_control.game_loop(args, carla_client=mock_carla.Client(server=server),
+                                 on_start=on_start)
+
+
+def synchronous_world(server):
+    world = server.world
+    settings = world.get_settings()
+    settings.synchronous_mode = True
+    world.apply_settings(settings)
+    return world
+
+
+@pytest.mark.parametrize('rpc_workers', [0, 4])
+def test_game_loop_runs_headless_and_cleans_up(rpc_workers):
+    server = mock_carla.Server()
+    sensors = []
+    run_game_loop(server, 20, on_start=lambda sim_env: sensors.extend(sim_env.sensors),
+                  rpc_workers=rpc_workers)
+
+    assert server.world.get_map().name.endswith('Mine_01')
+    assert len(sensors) == 4
+    assert all(sensor.ros_enabled and not sensor.is_alive for sensor in sensors)
+    assert server.world.get_actors() == []
+    assert not server.world.get_settings().synchronous_mode
+    assert server.world.get_snapshot().frame >= 20
+
+
+def test_sim_environment_restart_respawns_at_the_spawn_point():
+    server = mock_carla.Server()
+    world = synchronous_world(server)
+    with open(VEHICLE_CONFIG) as f:
+        config = json.load(f)
+    sim_env = manual_control.SimEnvironment(world, config, mock_carla.Client(server=server))
+
+    sim_env.vehicle.apply_control(mock_carla.VehicleControl(throttle=1.0))
+    for _ in range(20):
+        world.tick()
+    assert sim_env.vehicle.get_transform().location.x > 1.0
+
+    sim_env.destroy()
+    sim_env.restart()
+    assert sim_env.vehicle.get_transform().location.x == 0.0
+    assert len(world.get_actors()) == 5
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('rpc_latency', [0.0, 0.001])
+def test_startup_restart_and_loop_throughput(rpc_latency):
+    with open(VEHICLE_CONFIG) as f:
+        config = json.load(f)
+
+    server = mock_carla.Server(rpc_latency=rpc_latency)
+    world = synchronous_world(server)
+    rpcs = server.rpcs
+    start = time.perf_counter()
+    sim_env = manual_control.SimEnvironment(world, config, mock_carla.Client(server=server))
+    startup = time.perf_counter() - start
+    startup_rpcs = server.rpcs - rpcs
+
+    rpcs = server.rpcs
+    start = time.perf_counter()
+    sim_env.destroy()
+    sim_env.restart()
+    restart = time.perf_counter() - start
+    restart_rpcs = server.rpcs - rpcs
+    sim_env.destroy()
+
+    frames = 200
+    server = mock_carla.Server(rpc_latency=rpc_latency)
+    start = time.perf_counter()
+    run_game_loop(server, frames)
+    loop = time.perf_counter() - start
+
+    print('\nRPC latency {:.1f} ms: startup {:.1f} ms ({} RPCs), restart {:.1f} ms ({} RPCs), '
+          'loop {:.0f} frames/s'.format(rpc_latency * 1e3, startup * 1e3, startup_rpcs,
+                                        restart * 1e3, restart_rpcs, frames / loop))
+
+
+@pytest.mark.benchmark
+def test_frame_time_with_concurrent_rpcs():
+    frames = 40
+    for rpc_workers in (0, 4):
+        server = mock_carla.Server(rpc_latency=0.005)
+        started = []
+        run_game_loop(server, frames, rpc_workers=rpc_workers,
+                      on_start=lambda sim_env: started.append((time.perf_counter(), server.rpcs)))
+        elapsed = time.perf_counter() - started[0][0]
+        rpcs = server.rpcs - started[0][1]
+        print('\nRPC latency 5.0 ms, {} RPC workers: {:.1f} ms per frame, '
+              '{:.1f} RPCs per frame'.format(rpc_workers, elapsed / frames * 1e3, rpcs / frames))
@@ -0,0 +1,85 @@
+"""
+HUD rendering with the SDL dummy video driver
+
+The benchmark prints the per-frame cost of the incremental renderer next to
+rendering every line from scratch, as the HUD used to. Run with
+-m benchmark -s to see it.
+"""
+
+import os
+import timeit
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+
+from hud_renderer import HUDRenderer  # noqa: E402
+
+
+def hud_lines(frame):
+    return [
+        'Speed:   % 15.0f km/h' % (frame % 40),
+        'Location:% 20s' % ('(% 5.1f, % 5.1f)' % (frame * 0.1, 2.0)),
+        'Height:  % 18.0f m' % 1.0,
+        'Throttle:: %.2f' % 0.5,
+        'Steer:: %.2f' % 0.0,
+        'Brake:: %.2f' % 0.0,
+        'Reverse:: %.2f' % 0.0,
+        'Hand brake:: %.2f' % 0.0,
+        'Manual:: %.2f' % 0.0,
+        'Gear:        1',
+    ]
+
+
+@pytest.fixture
+def display():
+    pygame.init()
+    pygame.font.init()
+    yield pygame.display.set_mode((300, 300))
+    pygame.quit()
+
+
+def test_only_changed_lines_are_dirty(display):
+    renderer = HUDRenderer(pygame.font.Font(None, 14))
+
+    assert len(renderer.render(display, hud_lines(0))) == 10
+    assert renderer.render(display, hud_lines(0)) == []
+
+    dirty = renderer.render(display, hud_lines(1))
+    assert [rect.y for rect in dirty] == [4, 18]
+
+    dirty = renderer.render(display, hud_lines(1)[:8])
+    assert [rect.y for rect in dirty] == [4 + 8 * 14, 4 + 9 * 14]
+
+
+def test_value_cache_is_bounded(display):
+    renderer = HUDRenderer(pygame.font.Font(None, 14), cache_size=8)
+    for frame in range(100):
+        renderer.render(display, hud_lines(frame))
+
+    assert len(renderer.values) == 8
+
+
+@pytest.mark.benchmark
+def test_render_cost_per_frame(display):
+    font = pygame.font.Font(None, 14)
+    renderer = HUDRenderer(font)
+    frames = iter(range(10 ** 9))
+
+    def full_render():
+        frame = next(frames)
+        display.fill((0, 0, 0))
+        for line in hud_lines(frame):
+            display.blit(font.render(line, True, (255, 255, 255)), (4, 4))
+        pygame.display.flip()
+
+    def incremental_render():
+        dirty = renderer.render(display, hud_lines(next(frames)))
+        if dirty:
+            pygame.display.update(dirty)
+
+    full = min(timeit.repeat(full_render, number=200, repeat=3)) / 200
+    incremental = min(timeit.repeat(incremental_render, number=200, repeat=3)) / 200
+    print('\nfull render {:8.1f} us/frame, incremental render {:8.1f} us/frame'.format(
+        full * 1e6, incremental * 1e6))
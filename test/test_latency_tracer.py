@@ -0,0 +1,77 @@
+import json
+import math
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from latency_tracer import LatencyTracer  # noqa: E402
+
+
+def stamp(seconds):
+    sec = int(seconds)
+    return SimpleNamespace(sec=sec, nanosec=int(round((seconds - sec) * 1e9)))
+
+
+def test_header_stamps_resolve_to_their_frame():
+    tracer = LatencyTracer(tick_capacity=4)
+    for frame in range(1, 7):
+        tracer.tick(frame, frame * 0.05, wall_ns=frame * 1000)
+
+    assert tracer.lookup(stamp(0.3)) == (6, 6000)
+    assert tracer.lookup(stamp(0.15)) == (3, 3000)
+    # Evicted and unknown frames
+    assert tracer.lookup(stamp(0.05)) == (None, None)
+    assert tracer.lookup(stamp(1.0)) == (None, None)
+
+
+def test_histograms_and_percentiles():
+    tracer = LatencyTracer()
+    for index in range(100):
+        # 1 ms from the tick to ingest, 10 ms to publish the slowest message
+        tracer.record('lidar', index, 0, 1000000, 1500000, 2000000 + 80000 * index)
+    tracer.record('imu', None, None, 0, 10000, 20000)
+
+    assert tracer.counts == {'lidar': 100, 'imu': 1}
+    assert tracer.percentile('lidar', 'tick-ingest', 50) == pytest.approx(1e-3, rel=0.3)
+    assert tracer.percentile('lidar', 'total', 99) == pytest.approx(1e-2, rel=0.3)
+    summary = tracer.summary()
+    assert summary['imu']['total'][0] == pytest.approx(2e-5, rel=0.3)
+    assert math.isnan(summary['imu']['tick-ingest'][0])
+
+
+def test_chrome_trace_export(tmp_path):
+    tracer = LatencyTracer(capacity=2)
+    for frame in range(3):
+        tracer.record('lidar', frame, 0, 1000, 3000, 6000)
+    tracer.record('imu', None, None, 0, 1000, 2000)
+
+    path = str(tmp_path / 'trace.json')
+    tracer.dump_chrome_trace(path)
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [(event["cat"], event["name"]) for event in spans] == [
+        ('lidar', 'tick-ingest'), ('lidar', 'ingest-transform'), ('lidar', 'transform-publish'),
+        ('imu', 'ingest-transform'), ('imu', 'transform-publish')]
+    assert spans[0]["args"] == {"frame": 2}
+    assert spans[2]["ts"] == 3.0 and spans[2]["dur"] == 3.0
+    assert {event["args"]["name"] for event in events if event["ph"] == "M"} == {'lidar', 'imu'}
+
+
+def test_ticks_from_world_on_tick():
+    mock_carla = pytest.importorskip('mock_carla')
+    world = mock_carla.Server().world
+    settings = world.get_settings()
+    settings.synchronous_mode = True
+    settings.fixed_delta_seconds = 0.05
+    world.apply_settings(settings)
+
+    tracer = LatencyTracer()
+    world.on_tick(lambda snapshot: tracer.tick(snapshot.frame, snapshot.timestamp.elapsed_seconds))
+    frames = [world.tick() for _ in range(30)]
+
+    assert tracer.lookup(stamp(world.get_snapshot().timestamp.elapsed_seconds))[0] == frames[-1]
+    assert tracer.lookup(stamp(0.5))[0] == 10
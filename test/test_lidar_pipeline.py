@@ -0,0 +1,120 @@
+import array
+from types import SimpleNamespace
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+import lidar_pipeline  # noqa: E402
+
+# x, y, z, intensity as published by the CARLA lidar
+FIELDS = [SimpleNamespace(name=name, offset=4 * index, datatype=7, count=1)
+          for index, name in enumerate(('x', 'y', 'z', 'intensity'))]
+
+
+def cloud(xyz):
+    points = numpy.zeros(len(xyz), dtype=[(field.name, '<f4') for field in FIELDS])
+    points['x'], points['y'], points['z'] = numpy.asarray(xyz, dtype=numpy.float32).T
+    points['intensity'] = numpy.arange(len(xyz))
+    return SimpleNamespace(header='header', height=1, width=len(xyz), fields=FIELDS,
+                           is_bigendian=False, point_step=16, row_step=16 * len(xyz),
+                           data=array.array('B', points.tobytes()), is_dense=True)
+
+
+def test_view_shares_the_message_data():
+    msg = cloud([(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)])
+    points = lidar_pipeline.pointcloud2_to_array(msg)
+
+    assert points['y'].tolist() == [2.0, 5.0]
+    points['y'][0] = 7.0
+    assert lidar_pipeline.pointcloud2_to_array(msg)['y'][0] == 7.0
+
+
+def test_round_trip_keeps_the_point_layout():
+    msg = cloud([(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)])
+    out = lidar_pipeline.array_to_pointcloud2_into(
+        SimpleNamespace(), lidar_pipeline.pointcloud2_to_array(msg)[1:], msg)
+
+    assert (out.width, out.point_step, out.row_step) == (1, 16, 16)
+    assert out.fields is FIELDS and out.header == 'header'
+    assert out.data == msg.data[16:].tobytes()
+
+
+def test_crop_and_ground_removal():
+    points = lidar_pipeline.pointcloud2_to_array(cloud([
+        (0.5, 0.0, 0.0), (10.0, 0.0, 0.0), (10.0, 0.0, -2.5), (150.0, 0.0, 0.0),
+        (-10.0, 0.0, 0.0)]))
+
+    cropped = lidar_pipeline.crop(points, min_range=1.0, max_range=100.0, x=[0.0, 200.0])
+    assert cropped['intensity'].tolist() == [1, 2]
+    assert lidar_pipeline.remove_ground(cropped, height=-2.4)['intensity'].tolist() == [1]
+
+
+def test_voxel_downsample_keeps_one_point_per_voxel():
+    points = lidar_pipeline.pointcloud2_to_array(cloud(
+        [(0.01, 0.01, 0.0), (0.05, 0.02, 0.0), (0.5, 0.0, 0.0), (-0.05, 0.0, 0.0)]))
+    assert lidar_pipeline.voxel_downsample(points, size=0.1)['intensity'].tolist() == [0, 2, 3]
+
+
+def test_deskew_moves_points_by_the_ego_motion():
+    # Captured a quarter, half and three quarters of a sweep before the stamp
+    points = lidar_pipeline.pointcloud2_to_array(
+        cloud([(0.0, -10.0, 0.0), (10.0, 0.0, 0.0), (0.0, 10.0, 0.0)]))
+    original = points.copy()
+    deskewed = lidar_pipeline.deskew(points, (10.0, 0.0, 0.0), (0.0, 0.0, 0.0),
+                                     period=0.1, start_azimuth=180.0)
+
+    numpy.testing.assert_allclose(deskewed['x'] - original['x'], [-0.75, -0.5, -0.25], atol=1e-5)
+    numpy.testing.assert_allclose(deskewed['y'], original['y'])
+
+
+def test_pipeline_counts_points_per_stage():
+    pipeline = lidar_pipeline.LidarPipeline([
+        {"stage": "crop", "max_range": 50.0},
+        {"stage": "voxel", "size": 1.0},
+        {"stage": "deskew", "period": 0.05}
+    ])
+    points = lidar_pipeline.pointcloud2_to_array(cloud(
+        [(1.0, 1.0, 0.0), (1.1, 1.1, 0.0), (60.0, 0.0, 0.0), (5.0, 5.0, 0.0)]))
+    pipeline.process(points)
+
+    stats = pipeline.stats()
+    assert list(stats) == ["0:crop", "1:voxel", "2:deskew"]
+    counts = [(stage["points_in"], stage["points_out"]) for stage in stats.values()]
+    assert counts == [(4, 3), (3, 2), (2, 2)]
+
+    with pytest.raises(ValueError):
+        lidar_pipeline.LidarPipeline([{"stage": "median"}])
+
+
+def test_pipeline_does_not_modify_the_received_cloud():
+    msg = cloud([(10.0, 0.0, 0.0), (0.0, 10.0, 0.0)])
+    data = msg.data.tobytes()
+    pipeline = lidar_pipeline.LidarPipeline([{"stage": "deskew", "period": 0.1}])
+
+    deskewed = pipeline.process(lidar_pipeline.pointcloud2_to_array(msg), (10.0, 0.0, 0.0))
+    assert msg.data.tobytes() == data
+    assert deskewed['x'][0] != 10.0
+
+
+@pytest.mark.benchmark
+def test_pipeline_stage_timings():
+    rng = numpy.random.default_rng(0)
+    xyz = rng.uniform(-100.0, 100.0, (30000, 3))
+    xyz[:, 2] = rng.uniform(-2.6, 8.0, len(xyz))
+    pipeline = lidar_pipeline.LidarPipeline([
+        {"stage": "deskew", "period": 0.05},
+        {"stage": "crop", "min_range": 1.0, "max_range": 80.0},
+        {"stage": "voxel", "size": 0.2},
+        {"stage": "ground", "height": -2.4}
+    ])
+    msg = cloud(xyz)
+    for _ in range(20):
+        pipeline.process(lidar_pipeline.pointcloud2_to_array(msg),
+                         (10.0, 0.0, 0.0), (0.0, 0.0, 0.5))
+
+    print()
+    for label, stage in pipeline.stats().items():
+        print('{:<10} {:7.3f} ms {:>6d} -> {:>6d} points'.format(
+            label, stage["seconds"] / stage["calls"] * 1e3,
+            stage["points_in"] // stage["calls"], stage["points_out"] // stage["calls"]))
@@ -0,0 +1,100 @@
+"""Behaviour of the in-process CARLA stand-in the headless tests rely on"""
+
+import time
+
+import pytest
+
+mock_carla = pytest.importorskip('mock_carla')
+
+
+def synchronous_world(server):
+    world = mock_carla.Client(server=server).get_world()
+    settings = world.get_settings()
+    settings.synchronous_mode = True
+    settings.fixed_delta_seconds = 0.05
+    world.apply_settings(settings)
+    return world
+
+
+def spawn_vehicle(world):
+    blueprint = world.get_blueprint_library().find('vehicle.lincoln.mkz')
+    return world.spawn_actor(blueprint, world.get_map().get_spawn_points()[0])
+
+
+def drive(control, frames=40):
+    world = synchronous_world(mock_carla.Server())
+    vehicle = spawn_vehicle(world)
+    vehicle.apply_control(control)
+    for _ in range(frames):
+        world.tick()
+    return vehicle
+
+
+def test_throttle_accelerates_forward_and_brake_stops():
+    vehicle = drive(mock_carla.VehicleControl(throttle=1.0))
+    assert vehicle.get_velocity().x > 5.0
+    assert vehicle.get_transform().location.x > 5.0
+    assert vehicle.get_transform().rotation.yaw == 0.0
+
+    vehicle.apply_control(mock_carla.VehicleControl(brake=1.0))
+    for _ in range(40):
+        vehicle.get_world().tick()
+    assert vehicle.get_velocity().length() == 0.0
+
+
+def test_positive_steer_turns_right():
+    vehicle = drive(mock_carla.VehicleControl(throttle=0.5, steer=0.3))
+    transform = vehicle.get_transform()
+    assert transform.rotation.yaw > 0.0
+    assert transform.location.y > 0.0
+    assert vehicle.get_angular_velocity().z > 0.0
+
+
+def test_runs_are_deterministic():
+    control = mock_carla.VehicleControl(throttle=0.7, steer=-0.2)
+    first, second = drive(control, 100).get_transform(), drive(control, 100).get_transform()
+    assert (first.location, first.rotation) == (second.location, second.rotation)
+
+
+def test_spawned_actors_appear_in_the_next_snapshot():
+    world = synchronous_world(mock_carla.Server())
+    vehicle = spawn_vehicle(world)
+    sensor = world.spawn_actor(world.get_blueprint_library().find('sensor.other.imu'),
+                               mock_carla.Transform(mock_carla.Location(x=2.0)), attach_to=vehicle)
+    assert world.get_snapshot().find(vehicle.id) is None
+
+    measurements = []
+    sensor.listen(measurements.append)
+    frame = world.tick()
+
+    assert world.get_snapshot().find(sensor.id) is not None
+    assert [data.frame for data in measurements] == [frame]
+    assert measurements[0].transform.location.x == pytest.approx(2.0)
+
+
+def test_batch_spawn_then_autopilot_and_collision():
+    server = mock_carla.Server()
+    client = mock_carla.Client(server=server)
+    world = synchronous_world(server)
+    blueprint = world.get_blueprint_library().find('vehicle.lincoln.mkz')
+    spawn_point = world.get_map().get_spawn_points()[0]
+    command = mock_carla.command
+
+    responses = client.apply_batch_sync([
+        command.SpawnActor(blueprint, spawn_point).then(
+            command.SetAutopilot(command.FutureActor, True)),
+        command.SpawnActor(blueprint, spawn_point),
+    ])
+    assert not responses[0].error
+    assert world.get_actor(responses[0].actor_id).autopilot
+    assert 'collision' in responses[1].error
+
+
+def test_rpc_latency_is_applied_per_call():
+    server = mock_carla.Server(rpc_latency=0.01)
+    world = mock_carla.Client(server=server).get_world()
+    start = time.perf_counter()
+    for _ in range(5):
+        world.get_snapshot()
+    assert time.perf_counter() - start >= 0.05
+    assert server.rpcs == 6
@@ -0,0 +1,122 @@
+"""
+Synthetic sensor streams and the load they put on the vehicle info publisher
+
+The benchmark (ROS only) feeds a VehicleInfoPublisher from the generator at
+1x, 4x and 10x the rates of config/vehicle_config.json and reports the
+achieved lidar relay rate and the CPU time of the publisher thread. Run with
+-m benchmark -s to see the report.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from sensor_generator import create_streams, GnssStream, ImuStream, LidarStream  # noqa: E402
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config')
+
+with open(os.path.join(CONFIG_DIR, 'vehicle_config.json')) as f:
+    VEHICLE_CONFIG = json.load(f)
+
+
+def test_streams_follow_the_sensor_attributes():
+    streams = dict(create_streams(VEHICLE_CONFIG))
+    lidar = streams["lidar"]
+
+    # 600000 points/s at one 20 Hz tick per frame, one revolution per frame
+    assert isinstance(lidar, LidarStream)
+    assert (lidar.rate, lidar.points_per_frame, lidar.revolutions_per_frame) == (20.0, 30000, 1.0)
+    points = lidar.next_frame()
+    assert 0.5 * 30000 < len(points) <= 30000
+    assert numpy.sqrt(points['x'] ** 2 + points['y'] ** 2 + points['z'] ** 2).max() < 100.0
+    assert points['z'].min() > -2.7
+
+    assert isinstance(streams["imu"], ImuStream) and isinstance(streams["gnss"], GnssStream)
+    assert "rgb" not in streams
+
+
+def test_streams_replay_from_a_seed():
+    def frames(seed):
+        return [stream.next_frame() for _, stream in create_streams(VEHICLE_CONFIG, seed)]
+
+    first, second, other = frames(1), frames(1), frames(2)
+    assert first[0].tobytes() == second[0].tobytes()
+    assert numpy.array_equal(first[2]["linear_acceleration"], second[2]["linear_acceleration"])
+    assert first[0].tobytes() != other[0].tobytes()
+
+
+def test_stamps_are_the_simulation_time_of_the_frames():
+    streams = dict(create_streams(VEHICLE_CONFIG))
+    imu = streams["imu"]
+    assert imu.stamp_ns == 0
+
+    for _ in range(3):
+        imu.next_frame()
+    assert imu.frame == 3
+    assert imu.stamp_ns == 3 * int(round(1e9 / imu.rate))
+    assert streams["lidar"].stamp_ns == 0
+
+
+def measure_publisher_load(rate_scale, duration=2.0):
+    import rclpy
+    import rclpy.executors
+    from carla_simulation.sensor_generator_node import SensorGenerator
+    from test_vehicle_info_publisher import FakeVehicle
+    from topic_config import vehicle_config
+    from vehicle_info_publisher import VehicleInfoPublisher
+
+    with open(os.path.join(CONFIG_DIR, 'publisher_config.json')) as f:
+        publisher_config = json.load(f)
+
+    rclpy.init()
+    generator = SensorGenerator(VEHICLE_CONFIG, publisher_config, rate_scale=rate_scale)
+    publisher = VehicleInfoPublisher(FakeVehicle(), vehicle_config(publisher_config, "ego"))
+    executors = [rclpy.executors.SingleThreadedExecutor() for _ in range(2)]
+    executors[0].add_node(generator)
+    executors[1].add_node(publisher)
+    cpu = {}
+
+    def spin(executor):
+        start = time.thread_time()
+        executor.spin()
+        cpu[executor] = time.thread_time() - start
+
+    threads = [threading.Thread(target=spin, args=(executor,)) for executor in executors]
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+    finally:
+        for executor in executors:
+            executor.shutdown()
+        for thread in threads:
+            thread.join(timeout=1.0)
+        stats = publisher.get_publish_stats()
+        sent = generator.get_stats()
+        publisher.cleanup()
+        publisher.destroy_node()
+        generator.destroy_node()
+        rclpy.shutdown()
+
+    return {
+        "sent_lidar_rate": sent.get("/carla/ego/lidar", {}).get("rate", 0.0),
+        "lidar_rate": stats["published"].get("lidar", 0) / duration,
+        "cpu": cpu.get(executors[1], 0.0) / duration
+    }
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('rate_scale', [1, 4, 10])
+def test_publisher_load(rate_scale):
+    pytest.importorskip('rclpy')
+    pytest.importorskip('sensor_driver_msgs')
+
+    load = measure_publisher_load(rate_scale)
+    print('\n{:>2d}x: lidar sent {:6.1f} Hz, relayed {:6.1f} Hz, publisher CPU {:5.1f} %'.format(
+        rate_scale, load["sent_lidar_rate"], load["lidar_rate"], load["cpu"] * 100))
+    assert load["lidar_rate"] > 0
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from sensor_synchronizer import ApproximateTimeSynchronizer
+
+
+def message(stamp):
+    sec = int(stamp)
+    return SimpleNamespace(header=SimpleNamespace(
+        stamp=SimpleNamespace(sec=sec, nanosec=int(round((stamp - sec) * 1e9)))))
+
+
+def test_bundles_messages_of_the_same_frame():
+    bundles = []
+    sync = ApproximateTimeSynchronizer(['lidar', 'imu', 'gnss'], bundles.append,
+                                       slop=0.01, queue_size=4)
+    lidar, imu, gnss = message(1.05), message(1.051), message(1.049)
+    sync.add('imu', message(1.0))
+    sync.add('imu', imu)
+    sync.add('lidar', lidar)
+    assert bundles == []
+    sync.add('gnss', gnss)
+
+    assert len(bundles) == 1
+    assert bundles[0] == {'lidar': lidar, 'imu': imu, 'gnss': gnss}
+    assert sync.dropped == {'imu': 1}
+
+
+def test_reference_without_partner_is_dropped():
+    bundles = []
+    sync = ApproximateTimeSynchronizer(['lidar', 'imu'], bundles.append, slop=0.01)
+    sync.add('lidar', message(1.0))
+    sync.add('lidar', message(1.05))
+    sync.add('imu', message(1.05))
+
+    assert [b['lidar'].header.stamp.nanosec for b in bundles] == [50000000]
+    assert sync.dropped == {'lidar': 1}
+
+
+def test_buffers_are_bounded():
+    sync = ApproximateTimeSynchronizer(['lidar', 'imu'], lambda bundle: None, queue_size=3)
+    for frame in range(10):
+        sync.add('lidar', message(frame * 0.05))
+
+    assert len(sync.queues['lidar']) == 3
+    assert sync.dropped['lidar'] == 7
+    assert sync.bundles == 0
+
+
+def test_frame_number_key():
+    bundles = []
+    sync = ApproximateTimeSynchronizer(['lidar', 'gnss'], bundles.append, slop=0,
+                                       key=lambda msg: msg.frame)
+    sync.add('gnss', SimpleNamespace(frame=41))
+    sync.add('gnss', SimpleNamespace(frame=42))
+    sync.add('lidar', SimpleNamespace(frame=42))
+
+    assert [(b['lidar'].frame, b['gnss'].frame) for b in bundles] == [(42, 42)]
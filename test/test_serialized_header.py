@@ -0,0 +1,97 @@
+"""
+Header access on serialized messages and the CPU cost of the lidar relay
+
+The benchmark relays a serialized point cloud of one 600k points/s lidar
+frame through the passthrough path and, with rclpy installed, through a full
+deserialize/serialize round trip. Run with -m benchmark -s to see CPU time
+per MB.
+"""
+
+import struct
+import time
+
+import pytest
+
+from serialized_header import read_frame_id, read_stamp, rewrite_frame_id
+
+# One 20 Hz frame of the lidar in config/vehicle_config.json, 16 byte points
+LIDAR_POINTS = 600000 // 20
+POINT_STEP = 16
+
+
+def serialized_cloud(frame_id, data=b'\x07' * 64, sec=12, nanosec=500, byte_order='<'):
+    """PointCloud2 without fields in CDR, as produced by rmw"""
+    def string(value):
+        encoded = value.encode() + b'\0'
+        padding = -len(encoded) % 4
+        return struct.pack(byte_order + 'I', len(encoded)) + encoded + bytes(padding)
+
+    return (bytes((0, 1 if byte_order == '<' else 0, 0, 0))
+            + struct.pack(byte_order + 'iI', sec, nanosec) + string(frame_id)
+            + struct.pack(byte_order + 'III', 1, len(data) // POINT_STEP, 0)
+            + b'\0' + bytes(3)
+            + struct.pack(byte_order + 'III', POINT_STEP, len(data), len(data)) + data
+            + b'\1')
+
+
+@pytest.mark.parametrize('byte_order', ['<', '>'])
+def test_read_header(byte_order):
+    buffer = serialized_cloud('ego/lidar', byte_order=byte_order)
+    assert read_stamp(buffer) == (12, 500)
+    assert read_frame_id(buffer) == 'ego/lidar'
+
+
+@pytest.mark.parametrize('old, new', [
+    ('lidar', 'odom'),
+    ('ego/lidar', 'odom'),
+    ('odom', 'vehicle0/lidar'),
+])
+def test_rewrite_frame_id_keeps_the_rest_of_the_message(old, new):
+    data = bytes(range(64))
+    buffer = rewrite_frame_id(serialized_cloud(old, data), new)
+    assert buffer == serialized_cloud(new, data)
+
+
+def test_rewrite_frame_id_in_place():
+    buffer = bytearray(serialized_cloud('lidar'))
+    assert rewrite_frame_id(buffer, 'odom') is buffer
+    assert read_frame_id(buffer) == 'odom'
+
+    unchanged = serialized_cloud('odom')
+    assert rewrite_frame_id(unchanged, 'odom') is unchanged
+
+
+def cpu_seconds_per_mb(relay, buffer, repeat=50):
+    start = time.process_time()
+    for _ in range(repeat):
+        relay(buffer)
+    return (time.process_time() - start) / (len(buffer) * repeat / 1e6)
+
+
+@pytest.mark.benchmark
+def test_lidar_relay_cpu_per_mb():
+    buffer = serialized_cloud('ego/lidar', bytes(LIDAR_POINTS * POINT_STEP))
+
+    def passthrough(buffer):
+        read_stamp(buffer)
+        return rewrite_frame_id(buffer, 'odom')
+
+    report = {"passthrough": cpu_seconds_per_mb(passthrough, buffer)}
+
+    try:
+        from rclpy.serialization import deserialize_message, serialize_message
+        import sensor_msgs.msg
+    except ImportError:
+        pass
+    else:
+        def round_trip(buffer):
+            msg = deserialize_message(buffer, sensor_msgs.msg.PointCloud2)
+            msg.header.frame_id = 'odom'
+            return serialize_message(msg)
+
+        report["deserialize"] = cpu_seconds_per_mb(round_trip, serialize_message(
+            deserialize_message(buffer, sensor_msgs.msg.PointCloud2)))
+
+    print('\n{:.0f} kB frame'.format(len(buffer) / 1e3))
+    for name, seconds in report.items():
+        print('{:<12} {:8.3f} ms CPU per MB'.format(name, seconds * 1e3))
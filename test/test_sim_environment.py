@@ -0,0 +1,184 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('pygame')
+pytest.importorskip('numpy')
+mock_carla = pytest.importorskip('mock_carla')
+
+import manual_control  # noqa: E402
+
+if manual_control.carla is not mock_carla:
+    pytest.skip('the CARLA Python API is installed, mock_carla is not in use',
+                allow_module_level=True)
+
+CONFIG = {
+    "type": "vehicle.lincoln.mkz",
+    "id": "ego",
+    "sensors": [
+        {"type": "sensor.other.imu", "id": "imu%d" % index,
+         "spawn_point": {"x": 0.0, "y": 0.0, "z": 2.0, "roll": 0.0, "pitch": 0.0, "yaw": 0.0}}
+        for index in range(4)
+    ]
+}
+
+
+def synchronous_world(rpc_latency=0.0):
+    """Server, its world in synchronous mode and a client"""
+    server = mock_carla.Server(rpc_latency=rpc_latency)
+    world = server.world
+    settings = world.get_settings()
+    settings.synchronous_mode = True
+    world.apply_settings(settings)
+    return server, world, mock_carla.Client(server=server)
+
+
+def destroy_batches(client):
+    return [[command.actor_id for command in batch] for batch in client.batches
+            if isinstance(batch[0], mock_carla.DestroyActor)]
+
+
+def test_restart_waits_for_frames_instead_of_sleeping():
+    _, world, client = synchronous_world()
+
+    start = time.perf_counter()
+    sim_env = manual_control.SimEnvironment(world, CONFIG, client)
+    sim_env.destroy()
+    sim_env.restart()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0
+    assert world.get_snapshot().frame == 2
+    assert destroy_batches(client) == [[2, 3, 4, 5, 1]]
+
+
+def test_wait_for_actors_times_out():
+    _, world, _ = synchronous_world()
+    world.tick = lambda: None
+
+    with pytest.raises(RuntimeError):
+        manual_control.wait_for_actors(world, [42], timeout=0.01)
+
+
+def fleet_config(vehicle_count):
+    return {"vehicles": [dict(CONFIG, id="vehicle%d" % index) for index in range(vehicle_count)]}
+
+
+def test_fleet_spawns_every_vehicle_with_its_sensors():
+    server, world, client = synchronous_world()
+    server.spawn_failures.append(("sensor.*", "blueprint not found"))
+    sim_env = manual_control.SimEnvironment(world, fleet_config(3), client)
+
+    assert sim_env.fleet
+    assert len(sim_env.vehicles) == 3
+    assert sim_env.vehicle is sim_env.vehicles[0]
+    assert [len(sensors) for sensors in sim_env.vehicle_sensors] == [3, 4, 4]
+    assert sim_env.spawn_report["errors"] == {"vehicle0/imu0": "blueprint not found"}
+
+    sim_env.destroy()
+    assert len(destroy_batches(client)[-1]) == 3 + 11
+    assert sim_env.vehicles == [] and sim_env.sensors == []
+    assert world.get_actors() == []
+
+
+def test_fleet_rejects_duplicate_vehicle_ids():
+    _, world, client = synchronous_world()
+    with pytest.raises(ValueError):
+        manual_control.SimEnvironment(world, {"vehicles": [CONFIG, CONFIG]}, client)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('vehicle_count', [1, 8, 32])
+def test_fleet_spawn_throughput(vehicle_count):
+    server, world, client = synchronous_world(rpc_latency=0.002)
+    rpcs = server.rpcs
+    sim_env = manual_control.SimEnvironment(world, fleet_config(vehicle_count), client)
+    spawn_rpcs = server.rpcs - rpcs
+    sim_env.destroy()
+
+    print('\n{:>3d} vehicles, {:>3d} sensors: {} RPCs, spawned in {:.1f} ms'.format(
+        vehicle_count, len(CONFIG["sensors"]) * vehicle_count, spawn_rpcs,
+        sim_env.spawn_report["spawn_seconds"] * 1e3))
+    assert len(destroy_batches(client)) == 1
+
+
+def test_batch_spawn_reports_errors_per_sensor():
+    server, world, client = synchronous_world()
+    server.spawn_failures.append(("sensor.*", "blueprint not found"))
+    sim_env = manual_control.SimEnvironment(world, CONFIG, client)
+
+    assert sim_env.spawn_report["mode"] == "batch"
+    assert sim_env.spawn_report["errors"] == {"imu0": "blueprint not found"}
+    assert len(sim_env.sensors) == 3
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('sensor_count', [4, 24])
+def test_batch_spawn_against_sequential_spawn(sensor_count):
+    config = dict(CONFIG, sensors=CONFIG["sensors"][:1] * sensor_count)
+    report = {}
+    for batch in (True, False):
+        server, world, client = synchronous_world(rpc_latency=0.002)
+        rpcs = server.rpcs
+        sim_env = manual_control.SimEnvironment(world, dict(config, batch_spawn=batch), client)
+        report[sim_env.spawn_report["mode"]] = (server.rpcs - rpcs,
+                                                sim_env.spawn_report["spawn_seconds"])
+
+    print('\n{:>3d} sensors: batch {} RPCs {:.1f} ms, sequential {} RPCs {:.1f} ms'.format(
+        sensor_count,
+        report["batch"][0], report["batch"][1] * 1e3,
+        report["sequential"][0], report["sequential"][1] * 1e3))
+    assert report["batch"][0] < report["sequential"][0]
+
+
+def test_invalid_config_is_rejected_before_spawning():
+    _, world, client = synchronous_world()
+    config = dict(CONFIG, sensors=[
+        dict(CONFIG["sensors"][0], attributes={"noise_accel_stddev_x": 0.1, "fov": 90}),
+        dict(CONFIG["sensors"][0], type="sensor.radar.*"),
+    ])
+
+    with pytest.raises(ValueError) as error:
+        manual_control.SimEnvironment(world, config, client)
+
+    assert "imu0: sensor.other.imu has no attribute fov" in str(error.value)
+    assert "No blueprint matches sensor.radar.*" in str(error.value)
+    assert world.get_actors() == []
+
+
+class MapClient(object):
+    def __init__(self, map_name, ticks_until_ready=0):
+        self.map_name = map_name
+        self.ticks_until_ready = ticks_until_ready
+        self.loads = []
+
+    def get_world(self):
+        return SimpleNamespace(get_map=lambda: SimpleNamespace(name='Carla/Maps/' + self.map_name))
+
+    def load_world(self, map_name):
+        self.loads.append(map_name)
+        self.map_name = map_name
+        return SimpleNamespace(wait_for_tick=self.wait_for_tick)
+
+    def wait_for_tick(self, seconds):
+        if self.ticks_until_ready:
+            self.ticks_until_ready -= 1
+            raise RuntimeError("time-out while waiting for the simulator")
+
+
+def test_load_map_skips_reload_of_current_map():
+    client = MapClient('Mine_01')
+    manual_control.load_map(client, 'Mine_01')
+    assert client.loads == []
+
+
+def test_load_map_waits_for_first_tick():
+    client = MapClient('Town01', ticks_until_ready=2)
+    manual_control.load_map(client, 'Mine_01')
+    assert client.loads == ['Mine_01']
+    assert client.ticks_until_ready == 0
+
+    client = MapClient('Town01', ticks_until_ready=100)
+    with pytest.raises(RuntimeError):
+        manual_control.load_map(client, 'Mine_01', timeout=0.0)
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from state_cache import VehicleStateCache
+
+mock_carla = pytest.importorskip('mock_carla')
+
+
+def driving_vehicle():
+    world = mock_carla.Server().world
+    settings = world.get_settings()
+    settings.synchronous_mode = True
+    world.apply_settings(settings)
+    blueprint = world.get_blueprint_library().find('vehicle.tesla.model3')
+    vehicle = world.spawn_actor(blueprint, world.get_map().get_spawn_points()[0])
+    vehicle.apply_control(mock_carla.VehicleControl(throttle=1.0, steer=0.3))
+    world.tick()
+    return world, vehicle
+
+
+def test_state_matches_the_vehicle_at_the_snapshot_frame():
+    world, vehicle = driving_vehicle()
+    cache = VehicleStateCache()
+    assert cache.get(vehicle.id) is None
+
+    for _ in range(5):
+        world.tick()
+    cache.update(world.get_snapshot())
+    state = cache.get(vehicle.id)
+
+    assert state.frame == cache.frame == world.get_snapshot().frame
+    assert state.transform.location.x == vehicle.get_transform().location.x
+    assert state.velocity.x == vehicle.get_velocity().x
+    assert state.angular_velocity.z == vehicle.get_angular_velocity().z
+    assert cache.get(12345) is None
+
+
+def test_actor_is_looked_up_once_per_update():
+    world, vehicle = driving_vehicle()
+    cache = VehicleStateCache()
+    cache.update(world.get_snapshot())
+
+    first = cache.get(vehicle.id)
+    assert cache.get(vehicle.id) is first
+    assert cache.lookups == 1
+
+    world.tick()
+    # Readers keep the old frame until the next update
+    assert cache.get(vehicle.id) is first
+    cache.update(world.get_snapshot())
+    assert cache.get(vehicle.id).frame == first.frame + 1
+    assert cache.get(vehicle.id).transform.location.x > first.transform.location.x
+    assert cache.lookups == 2
+
+
+def test_concurrent_readers_see_one_frame_per_state():
+    world, vehicle = driving_vehicle()
+    cache = VehicleStateCache()
+    cache.update(world.get_snapshot())
+    snapshots = {}
+    mismatches = []
+
+    def read():
+        for _ in range(2000):
+            state = cache.get(vehicle.id)
+            if state.transform is not snapshots[state.frame].find(vehicle.id).get_transform():
+                mismatches.append(state.frame)
+
+    snapshots[cache.frame] = world.get_snapshot()
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for _ in range(50):
+        world.tick()
+        snapshot = world.get_snapshot()
+        snapshots[snapshot.frame] = snapshot
+        cache.update(snapshot)
+    for reader in readers:
+        reader.join()
+
+    assert mismatches == []
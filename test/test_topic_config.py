@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from topic_config import vehicle_config
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIG = {
+    "loop_rate": 0.05,
+    "lidar_sub_topic": "/carla/{vehicle}/lidar",
+    "lidar_pub_topic": "/lidar",
+}
+
+
+def test_topics_are_formatted_per_vehicle():
+    config = vehicle_config(CONFIG, "truck1")
+    assert config["lidar_sub_topic"] == "/carla/truck1/lidar"
+    assert config["lidar_pub_topic"] == "/lidar"
+    assert config["loop_rate"] == 0.05
+
+    config = vehicle_config(CONFIG, "truck1", namespaced=True)
+    assert config["lidar_sub_topic"] == "/carla/truck1/lidar"
+    assert config["lidar_pub_topic"] == "lidar"
+    assert CONFIG["lidar_sub_topic"] == "/carla/{vehicle}/lidar"
+
+
+def test_sensor_generator_runs_without_carla():
+    # A None entry in sys.modules makes every import of carla fail. The
+    # modules are imported through the package, as by the entry point
+    script = (
+        "import importlib.util, sys\n"
+        "sys.modules['carla'] = None\n"
+        "sys.path.insert(0, {!r})\n"
+        "from carla_simulation import sensor_generator, topic_config\n"
+        "if importlib.util.find_spec('rclpy'):\n"
+        "    from carla_simulation import sensor_generator_node\n"
+    ).format(ROOT_DIR)
+    subprocess.run([sys.executable, '-c', script], check=True)
+
+
+def test_fleet_output_files_are_suffixed_with_the_vehicle_id():
+    config = dict(CONFIG, tracing={"trace_file": "/tmp/latency.json", "capacity": 64},
+                  record={"uri": "/tmp/bags/run/", "storage_id": "mcap"})
+
+    first = vehicle_config(config, "truck1", namespaced=True)
+    second = vehicle_config(config, "truck2", namespaced=True)
+    assert first["tracing"] == {"trace_file": "/tmp/latency_truck1.json", "capacity": 64}
+    assert second["tracing"]["trace_file"] == "/tmp/latency_truck2.json"
+    assert first["record"] == {"uri": "/tmp/bags/run_truck1", "storage_id": "mcap"}
+
+    # A single vehicle keeps the configured names
+    single = vehicle_config(config, "ego")
+    assert single["tracing"]["trace_file"] == "/tmp/latency.json"
+    assert config["tracing"]["trace_file"] == "/tmp/latency.json"
@@ -0,0 +1,296 @@
+import threading
+import tracemalloc
+
+import pytest
+
+rclpy = pytest.importorskip('rclpy')
+pytest.importorskip('nav_msgs')
+pytest.importorskip('sensor_msgs')
+pytest.importorskip('sensor_driver_msgs')
+
+import carla  # noqa: E402
+import sensor_msgs.msg  # noqa: E402
+import std_msgs.msg  # noqa: E402
+from vehicle_info_publisher import VehicleInfoPublisher  # noqa: E402
+
+CONFIG = {
+    "loop_rate": 0.05,
+    "gnss_sub_topic": "/carla/ego/gnss",
+    "imu_sub_topic": "/carla/ego/imu",
+    "lidar_sub_topic": "/carla/ego/lidar",
+    "lidar_pub_topic": "/test/lidar",
+    "gps_pub_topic": "/test/gps",
+    "odom_pub_topic": "/test/odom",
+    "velocity_pub_topic": "/test/velocity",
+    "imu_pub_topic": "/test/imu",
+    "position_pub_topic": "/test/position",
+}
+
+
+class FakeVehicle(object):
+    def __init__(self):
+        self.transform = carla.Transform(carla.Location(x=1.0, y=2.0, z=0.5),
+                                         carla.Rotation(pitch=1.0, yaw=45.0, roll=-2.0))
+        self.velocity = carla.Vector3D(x=3.0, y=-1.0, z=0.0)
+        self.angular_velocity = carla.Vector3D(x=0.0, y=0.0, z=10.0)
+
+    def get_transform(self):
+        return self.transform
+
+    def get_velocity(self):
+        return self.velocity
+
+    def get_angular_velocity(self):
+        return self.angular_velocity
+
+
+@pytest.fixture
+def publisher():
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), CONFIG)
+    node.update_carla_lidar_data(sensor_msgs.msg.PointCloud2())
+    node.update_carla_gnss_data(sensor_msgs.msg.NavSatFix())
+    node.update_carla_imu_data(sensor_msgs.msg.Imu())
+    yield node
+    node.cleanup()
+    node.destroy_node()
+    rclpy.shutdown()
+
+
+def test_published_topics_do_not_shadow_the_node_publishers(publisher):
+    node_publishers = list(publisher.publishers)
+    assert all(pub in node_publishers for pub in publisher.published_topics().values())
+
+
+def test_publish_reuses_messages(publisher):
+    publisher.publish_vehicle_data()
+    messages = [publisher.gps_data, publisher.odom_data, publisher.velocity_data,
+                publisher.position_data, publisher.pseudo_odom.pose.pose,
+                publisher.pseudo_position, publisher.pseudo_velocity]
+
+    publisher.publish_vehicle_data()
+
+    reused = [publisher.gps_data, publisher.odom_data, publisher.velocity_data,
+              publisher.position_data, publisher.pseudo_odom.pose.pose,
+              publisher.pseudo_position, publisher.pseudo_velocity]
+    assert all(old is new for old, new in zip(messages, reused))
+
+
+def test_publish_does_not_allocate_in_steady_state(publisher):
+    for _ in range(10):
+        publisher.publish_vehicle_data()
+
+    tracemalloc.start(5)
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(500):
+            publisher.publish_vehicle_data()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    sources = [tracemalloc.Filter(True, '*vehicle_info_publisher.py'),
+               tracemalloc.Filter(True, '*carla_data_to_ros.py')]
+    growth = after.filter_traces(sources).compare_to(before.filter_traces(sources), 'filename')
+    assert sum(stat.count_diff for stat in growth) <= 0
+
+
+def stamped(msg, sec):
+    msg.header.stamp.sec = sec
+    return msg
+
+
+def test_multi_threaded_executor_ingests_while_publishing():
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), dict(CONFIG, executor="multi_threaded"))
+    errors = []
+
+    def ingest():
+        try:
+            for sec in range(200):
+                node.update_carla_imu_data(stamped(sensor_msgs.msg.Imu(), sec))
+                node.update_carla_lidar_data(stamped(sensor_msgs.msg.PointCloud2(), sec))
+        except Exception as error:
+            errors.append(error)
+
+    try:
+        # Every sensor and the publish timer get their own callback group
+        groups = [node.gnss_sub.callback_group, node.imu_sub.callback_group,
+                  node.lidar_sub.callback_group, node.timer.callback_group]
+        assert len(set(map(id, groups))) == len(groups)
+        assert node.default_callback_group not in groups
+
+        thread = threading.Thread(target=ingest)
+        thread.start()
+        while thread.is_alive():
+            node.publish_vehicle_data()
+        thread.join()
+        assert not errors
+        assert node.input_versions["imu"] == 200
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def test_lidar_publish_mode_skips_unchanged_topics():
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), dict(CONFIG, publish_mode="lidar"))
+    try:
+        assert not hasattr(node, 'timer')
+        node.update_carla_imu_data(stamped(sensor_msgs.msg.Imu(), 1))
+        node.update_carla_gnss_data(stamped(sensor_msgs.msg.NavSatFix(), 1))
+        node.update_carla_lidar_data(stamped(sensor_msgs.msg.PointCloud2(), 1))
+        node.update_carla_lidar_data(stamped(sensor_msgs.msg.PointCloud2(), 1))
+        node.update_carla_lidar_data(stamped(sensor_msgs.msg.PointCloud2(), 2))
+
+        stats = node.get_publish_stats()
+        assert stats["published"]["lidar"] == 2
+        assert stats["published"]["imu"] == 1
+        assert stats["skipped"] == {"imu": 1}
+        assert stats["duplicates"] == {"lidar": 1}
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def test_synchronized_publish_mode_publishes_one_bundle_per_frame():
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), dict(CONFIG, publish_mode="synchronized"))
+    try:
+        lidar = stamped(sensor_msgs.msg.PointCloud2(), 1)
+        gnss = stamped(sensor_msgs.msg.NavSatFix(), 1)
+        node.synchronizer.add("lidar", lidar)
+        node.synchronizer.add("gnss", stamped(sensor_msgs.msg.NavSatFix(), 0))
+        node.synchronizer.add("gnss", gnss)
+        assert node.get_publish_stats()["published"] == {}
+
+        node.synchronizer.add("imu", stamped(sensor_msgs.msg.Imu(), 1))
+        assert node.carla_gnss_data is gnss
+        assert node.carla_lidar_data is lidar
+        assert node.get_publish_stats()["published"]["odom"] == 1
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def test_lidar_passthrough_relays_serialized_cloud():
+    from rclpy.serialization import deserialize_message, serialize_message
+
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), dict(CONFIG, publish_mode="lidar",
+                                                    lidar_passthrough=True))
+    try:
+        cloud = stamped(sensor_msgs.msg.PointCloud2(), 3)
+        cloud.header.frame_id = "ego/lidar"
+        cloud.data = bytes(range(16)) * 4
+        node.update_carla_lidar_raw(serialize_message(cloud))
+
+        assert isinstance(node.lidar_data, bytes)
+        relayed = deserialize_message(node.lidar_data, sensor_msgs.msg.PointCloud2)
+        assert relayed.header.frame_id == "odom"
+        assert relayed.data.tobytes() == cloud.data.tobytes()
+        assert node.odom_data.header.stamp.sec == 3
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def test_tracing_records_latency_from_the_tick():
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), dict(CONFIG, publish_mode="lidar",
+                                                    tracing={"capacity": 64}))
+    try:
+        node.tracer.tick(20, 1.0)
+        node.update_carla_imu_data(stamped(sensor_msgs.msg.Imu(), 1))
+        node.update_carla_lidar_data(stamped(sensor_msgs.msg.PointCloud2(), 1))
+
+        # gps and odom are traced from gnss, which was not received
+        assert node.tracer.counts == {"lidar": 1, "velocity": 1, "imu": 1, "position": 1}
+        assert [trace[1] for trace in node.tracer.traces] == [20] * 4
+        assert node.tracer.summary()["lidar"]["total"][0] > 0
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def test_vehicle_state_is_read_from_the_state_cache_once_per_frame():
+    from state_cache import VehicleState
+
+    class Cache(object):
+        def __init__(self, vehicle):
+            self.vehicle = vehicle
+            self.frame = 1
+            self.gets = 0
+
+        def get(self, actor_id):
+            self.gets += 1
+            return VehicleState(self.frame, 0.05 * self.frame, self.vehicle.transform,
+                                self.vehicle.velocity, self.vehicle.angular_velocity)
+
+    class StaleVehicle(FakeVehicle):
+        id = 7
+
+        def get_transform(self):
+            raise AssertionError("read from the vehicle instead of the state cache")
+
+    vehicle = StaleVehicle()
+    cache = Cache(vehicle)
+    rclpy.init()
+    node = VehicleInfoPublisher(vehicle, CONFIG, state_cache=cache)
+    try:
+        node.update_vehicle_state_info()
+        assert node.pseudo_position.x == 1.0
+
+        vehicle.transform = carla.Transform(carla.Location(x=5.0), carla.Rotation())
+        node.header = std_msgs.msg.Header(frame_id="map")
+        node.update_vehicle_state_info()
+        assert node.pseudo_position.x == 1.0
+        assert node.pseudo_odom.header is node.header
+
+        cache.frame = 2
+        node.update_vehicle_state_info()
+        assert node.pseudo_position.x == 5.0
+        assert cache.gets == 3
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def test_fleet_publishers_share_one_rotation_matrix_cache():
+    import carla_data_to_ros
+
+    config = dict(CONFIG, rotation_matrix_cache={"maxsize": 16})
+    rclpy.init()
+    nodes = []
+    try:
+        nodes.append(VehicleInfoPublisher(FakeVehicle(), config, namespace="truck1"))
+        cache = carla_data_to_ros.get_rotation_matrix_cache()
+        nodes.append(VehicleInfoPublisher(FakeVehicle(), config, namespace="truck2"))
+        assert carla_data_to_ros.get_rotation_matrix_cache() is cache
+    finally:
+        for node in nodes:
+            node.cleanup()
+            node.destroy_node()
+        carla_data_to_ros.disable_rotation_matrix_cache()
+        rclpy.shutdown()
+
+
+def test_lidar_pipeline_waits_for_the_first_cloud():
+    config = dict(CONFIG, lidar_pipeline=[{"stage": "crop", "max_range": 50.0}])
+    rclpy.init()
+    node = VehicleInfoPublisher(FakeVehicle(), config)
+    try:
+        # Timer publish mode, no lidar received yet
+        node.publish_vehicle_data()
+        assert node.processed_lidar_version == 0
+        assert node.lidar_pipeline.calls == 0
+    finally:
+        node.cleanup()
+        node.destroy_node()
+        rclpy.shutdown()